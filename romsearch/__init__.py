@@ -9,6 +9,7 @@ from .modules import (
     DupeParser,
     GameFinder,
     RAHasher,
+    ROMBatchChooser,
     ROMDownloader,
     ROMChooser,
     ROMCleaner,
@@ -27,6 +28,7 @@ __all__ = [
     "DupeParser",
     "GameFinder",
     "RAHasher",
+    "ROMBatchChooser",
     "ROMDownloader",
     "ROMChooser",
     "ROMCleaner",
@@ -1,7 +1,9 @@
 from .gamefinder_dev import check_regex_parsing, parse_games_from_dat
 from .rahasher_dev import check_rahasher_names
+from .romparser_dev import benchmark_game_allocations
 
 __all__ = [
+    "benchmark_game_allocations",
     "check_regex_parsing",
     "check_rahasher_names",
     "parse_games_from_dat",
@@ -10,6 +10,7 @@ from ..util import (
     get_directory_name,
     normalize_name,
     get_region_free_name,
+    CompiledRegexConfig,
 )
 
 
@@ -36,6 +37,11 @@ def check_regex_parsing(dat_filename):
 
     regex_config = regex_config
 
+    compiled_regex_config = CompiledRegexConfig(
+        regex_config=regex_config,
+        default_config=default_config,
+    )
+
     # Parse all the names in the dat file
     all_file_dict = {}
     for f in all_files:
@@ -47,13 +53,11 @@ def check_regex_parsing(dat_filename):
         )
         short_name = get_short_name(
             full_name,
-            regex_config=regex_config,
-            default_config=default_config,
+            compiled_regex_config=compiled_regex_config,
         )
         region_free_name = get_region_free_name(
             full_name,
-            regex_config=regex_config,
-            default_config=default_config,
+            compiled_regex_config=compiled_regex_config,
         )
 
         all_file_dict[f] = {
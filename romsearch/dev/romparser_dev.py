@@ -0,0 +1,114 @@
+import copy
+import logging
+import os
+import time
+import tracemalloc
+
+from romsearch import ROMSearch
+from .gamefinder_dev import parse_games_from_dat
+from ..util import load_json
+
+
+def benchmark_game_allocations(
+    config_file,
+    platform,
+    all_games=None,
+    n_games=None,
+):
+    """Benchmark memory allocations for ROMParser and ROMChooser, per game
+
+    For each game, this counts the calls to copy.deepcopy, and uses tracemalloc to
+    get the peak memory and the number of memory blocks still held afterwards. Returns
+    a dictionary of the mean values per game
+
+    Args:
+        config_file (string): Path to the config file
+        platform (string): Platform name
+        all_games (dict): Dictionary of games and their ROM files. Defaults to None, which
+            will parse them from the dat
+        n_games (int): Number of games to benchmark. Defaults to None, which will use all
+            of them
+    """
+
+    if all_games is None:
+        all_games = parse_games_from_dat(config_file, platform)
+
+    rs = ROMSearch(config_file)
+    rs.logger.setLevel(logging.WARNING)
+
+    # Choose ROMs per game, so that's included for each game
+    rs.batch_romchooser = False
+
+    platform_config = rs.get_platform_config(platform)
+
+    # Load the dat and retool files once, so we're not timing that
+    dat = None
+    retool = None
+    parsed_dat_dir = rs.config.get("dirs", {}).get("parsed_dat_dir", None)
+    if parsed_dat_dir is not None:
+        dat_file = os.path.join(parsed_dat_dir, f"{platform} (dat parsed).json")
+        if os.path.exists(dat_file):
+            dat = load_json(dat_file)
+        retool_file = os.path.join(parsed_dat_dir, f"{platform} (retool).json")
+        if os.path.exists(retool_file):
+            retool = load_json(retool_file)["variants"]
+
+    games = list(all_games.keys())
+    if n_games is not None:
+        games = games[:n_games]
+
+    # Count calls to deepcopy. Calls within deepcopy itself aren't counted, so this is
+    # the number of times we've asked for a copy
+    n_deepcopies = [0]
+    orig_deepcopy = copy.deepcopy
+
+    def counted_deepcopy(*args, **kwargs):
+        n_deepcopies[0] += 1
+        return orig_deepcopy(*args, **kwargs)
+
+    total_deepcopies = 0
+    total_peak = 0
+    total_blocks = 0
+    total_time = 0
+
+    copy.deepcopy = counted_deepcopy
+    tracemalloc.start()
+    try:
+        for game in games:
+            n_deepcopies[0] = 0
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+            start_blocks = len(tracemalloc.take_snapshot().traces)
+
+            start_time = time.perf_counter()
+            rom_dict = rs.parse_and_choose_game(
+                rom_files=all_games[game],
+                platform=platform,
+                game=game,
+                dat=dat,
+                retool=retool,
+                ra_hash=None,
+                platform_config=platform_config,
+            )
+            total_time += time.perf_counter() - start_time
+
+            total_peak += tracemalloc.get_traced_memory()[1] - start_memory
+            total_blocks += len(tracemalloc.take_snapshot().traces) - start_blocks
+            total_deepcopies += n_deepcopies[0]
+
+            del rom_dict
+    finally:
+        tracemalloc.stop()
+        copy.deepcopy = orig_deepcopy
+
+    n = max(len(games), 1)
+
+    benchmark = {
+        "n_games": len(games),
+        "deepcopies_per_game": total_deepcopies / n,
+        "peak_kb_per_game": total_peak / n / 1024,
+        "blocks_per_game": total_blocks / n,
+        "time_per_game": total_time / n,
+    }
+
+    return benchmark
@@ -5,7 +5,12 @@ from PySide6.QtWidgets import QApplication, QMainWindow, QTreeWidgetItem
 
 import romsearch
 from romsearch import ROMSearch
-from romsearch.util import load_yml, load_json
+from romsearch.util import (
+    load_yml,
+    load_json_cache,
+    SQLiteROMCache,
+    get_sqlite_cache_file,
+)
 from .gui_config import ConfigWindow
 from .gui_utils import get_gui_logger
 
@@ -121,6 +126,7 @@ class ROMBrowser(QMainWindow):
         self.all_dats = {}
         self.all_dupes = {}
         self.all_retool = {}
+        self.all_retool_index = {}
         self.all_ra_hash = {}
         self.all_games = {}
 
@@ -166,7 +172,7 @@ class ROMBrowser(QMainWindow):
                 logger=self.logger,
             )
 
-            dat_dict, subchannel_dict, dupe_dict, retool_dict, ra_hash_dict, all_games = (
+            dat_dict, subchannel_dict, dupe_dict, retool_dict, ra_hash_dict, all_games, retool_index = (
                 rs.get_all_games(
                     platform=self.current_platform,
                 )
@@ -179,6 +185,7 @@ class ROMBrowser(QMainWindow):
             self.all_dats[self.current_platform] = copy.deepcopy(dat_dict)
             self.all_dupes[self.current_platform] = copy.deepcopy(dupe_dict)
             self.all_retool[self.current_platform] = copy.deepcopy(retool_dict)
+            self.all_retool_index[self.current_platform] = retool_index
             self.all_ra_hash[self.current_platform] = copy.deepcopy(ra_hash_dict)
             self.all_games[self.current_platform] = copy.deepcopy(all_games)
 
@@ -190,11 +197,18 @@ class ROMBrowser(QMainWindow):
             cache_file = os.path.join(
                 cache_dir, f"cache ({self.current_platform}).json"
             )
-            if os.path.exists(cache_file):
-                cache = load_json(cache_file)
-                cache = copy.deepcopy(cache[self.current_platform])
+            sqlite_cache_file = get_sqlite_cache_file(cache_dir, self.current_platform)
+            cache_backend = rs.config.get("romsearch", {}).get("cache_backend", "json")
+
+            # We colour every game and ROM in the tree by whether it's in the cache,
+            # so pull the whole thing out at once rather than querying for each one
+            if cache_backend == "sqlite" and os.path.exists(sqlite_cache_file):
+                sqlite_cache = SQLiteROMCache(sqlite_cache_file)
+                cache = sqlite_cache.to_dict()
+                sqlite_cache.close()
             else:
-                cache = {}
+                cache = load_json_cache(cache_file)
+                cache = copy.deepcopy(cache.get(self.current_platform, {}))
             self.cache[self.current_platform] = copy.deepcopy(cache)
 
         self.set_games(all_games=self.all_games[self.current_platform])
@@ -330,6 +344,7 @@ class ROMBrowser(QMainWindow):
                 ra_hash=self.all_ra_hash[self.current_platform],
                 platform_config=platform_config,
                 log_line_length=100,
+                retool_index=self.all_retool_index[self.current_platform],
             )
 
             self.all_games[self.current_platform][game] = copy.deepcopy(rom_dict)
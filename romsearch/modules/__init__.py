@@ -3,7 +3,7 @@ from .datparser import DATParser
 from .dupeparser import DupeParser
 from .gamefinder import GameFinder
 from .rahasher import RAHasher
-from .romchooser import ROMChooser
+from .romchooser import ROMChooser, ROMBatchChooser
 from .romcleaner import ROMCleaner
 from .romcompressor import ROMCompressor
 from .romdownloader import ROMDownloader
@@ -18,6 +18,7 @@ __all__ = [
     "DupeParser",
     "GameFinder",
     "RAHasher",
+    "ROMBatchChooser",
     "ROMChooser",
     "ROMCleaner",
     "ROMCompressor",
@@ -7,8 +7,7 @@ from ..util import (
     load_json,
     save_json,
     setup_logger,
-    get_dat,
-    format_dat,
+    get_formatted_dat,
     centred_string,
 )
 
@@ -180,8 +179,7 @@ class DATMapper:
                     )
                 )
                 return None
-            old_dat = get_dat(old_dat_name)
-            old_dat = format_dat(old_dat)
+            old_dat = get_formatted_dat(old_dat_name)
             save_json(old_dat, old_dat_name_json)
 
         return old_dat
@@ -203,8 +201,7 @@ class DATMapper:
         dat_mappings = {}
 
         # Pull out a) the number of files and b) a list of checksums for each
-        # individual ROM file for the two dats. Sort them so we can hunt through
-        # more quickly
+        # individual ROM file for the two dats
         dat_checksums = get_checksums(
             dat,
             sort=True,
@@ -214,14 +211,12 @@ class DATMapper:
             sort=True,
         )
 
-        # Keep track of ones we've matched for speed, since they should be unique
-        d_found = [False] * len(dat)
-        od_found = [False] * len(old_dat)
-
-        od_keys = list(old_dat.keys())
+        # Keep track of ones we've matched, since they should be unique
+        d_found = set()
+        od_found = set()
 
         # First, just search for exact matches
-        for idx_d, d in enumerate(dat):
+        for d in dat:
 
             od_checksums = old_dat_checksums.get(d, {}).get("md5", None)
             if od_checksums is None:
@@ -230,43 +225,60 @@ class DATMapper:
             # If we have a match, mark as found. Names match,
             # so we don't need to map
             if dat_checksums[d]["md5"] == od_checksums:
+                d_found.add(d)
+                od_found.add(d)
+
+        # Index the remaining old dat entries by the number of files and their checksums,
+        # keeping the original order so the first match wins
+        old_dat_index = {}
+        for od in old_dat:
+            if od in od_found:
+                continue
 
-                idx_od = od_keys.index(d)
+            od_key = (old_dat_checksums[od]["n_files"], tuple(old_dat_checksums[od]["md5"]))
+            old_dat_index.setdefault(od_key, []).append(od)
 
-                d_found[idx_d] = True
-                od_found[idx_od] = True
+        ambiguous_matches = {}
 
-        for idx_d, d in enumerate(dat):
+        for d in dat:
 
             # If we've already matched, move on
-            if d_found[idx_d]:
+            if d in d_found:
                 continue
 
-            for idx_od, od in enumerate(old_dat):
+            d_key = (dat_checksums[d]["n_files"], tuple(dat_checksums[d]["md5"]))
+            od_candidates = old_dat_index.get(d_key, [])
 
-                # If we've already matched, move on
-                if d_found[idx_d]:
-                    continue
-                if od_found[idx_od]:
-                    continue
-
-                # If we don't have the same number of files, skip
-                if dat_checksums[d]["n_files"] != old_dat_checksums[od]["n_files"]:
-                    continue
+            if len(od_candidates) == 0:
+                continue
 
-                # Check if names match
-                names_match = d == od
+            # If there are multiple possible matches, flag that up
+            if len(od_candidates) > 1:
+                ambiguous_matches[d] = copy.deepcopy(od_candidates)
 
-                # If we have a match, mark as found
-                if dat_checksums[d]["md5"] == old_dat_checksums[od]["md5"]:
-                    d_found[idx_d] = True
-                    od_found[idx_od] = True
+            od = od_candidates.pop(0)
+            d_found.add(d)
+            od_found.add(od)
 
-                    # If the names don't match, then append them to the dictionary
-                    if not names_match:
-                        dat_mappings[d] = od
+            # If the names don't match, then append them to the dictionary
+            if d != od:
+                dat_mappings[d] = od
 
-                    break
+        if len(ambiguous_matches) > 0:
+            self.logger.warning(f"{'-' * self.log_line_length}")
+            self.logger.warning(
+                centred_string(
+                    f"Found {len(ambiguous_matches)} ambiguous matches between dat files:",
+                    total_length=self.log_line_length,
+                )
+            )
+            for d, od_candidates in ambiguous_matches.items():
+                self.logger.warning(
+                    centred_string(
+                        f"{d} -> {od_candidates[0]} (also matches {', '.join(od_candidates[1:])})",
+                        total_length=self.log_line_length,
+                    )
+                )
 
         # Save this to yml
         save_yml(out_file, dat_mappings)
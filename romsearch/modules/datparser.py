@@ -12,8 +12,9 @@ from ..util import (
     setup_logger,
     unzip_file,
     save_json,
-    get_dat,
-    format_dat,
+    load_pickle,
+    save_pickle,
+    get_formatted_dat,
 )
 
 ALLOWED_GROUPS = [
@@ -79,6 +80,8 @@ class DATParser:
         self.dat_dir = self.config.get("dirs", {}).get("dat_dir", None)
         self.parsed_dat_dir = self.config.get("dirs", {}).get("parsed_dat_dir", None)
 
+        self.use_cache = self.config.get("datparser", {}).get("use_cache", True)
+
         self.platform = platform
 
         # Read in the specific platform configuration
@@ -111,6 +114,9 @@ class DATParser:
         self.out_file = os.path.join(
             self.parsed_dat_dir, f"{self.platform} (dat parsed).json"
         )
+        self.cache_file = os.path.join(
+            self.parsed_dat_dir, f"{self.platform} (dat parsed).pkl"
+        )
 
         self.log_line_sep = log_line_sep
         self.log_line_length = log_line_length
@@ -203,16 +209,36 @@ class DATParser:
             if zip_file is None:
                 return False
 
+            # If the zip hasn't changed since the last run, we can skip parsing entirely
+            cache_key = self.get_cache_key(zip_file)
+            rom_dict = None
+            if self.use_cache:
+                rom_dict = self.load_cached_rom_dict(cache_key)
+
+            if rom_dict is not None:
+                self.logger.info(f"{'-' * self.log_line_length}")
+                self.logger.info(
+                    centred_string("Using cached parsed dat for:", total_length=self.log_line_length)
+                )
+                self.logger.info(
+                    centred_string(
+                        f"{os.path.split(zip_file)[-1]}", total_length=self.log_line_length
+                    )
+                )
+
+                # Other modules read the JSON directly, so make sure it's there
+                if not os.path.exists(self.out_file):
+                    self.save_rom_dict(rom_dict)
+
+                self.logger.info(f"{self.log_line_sep * self.log_line_length}")
+
+                return rom_dict
+
             # Unzip the file if it doesn't already exist
             dat_file_name = zip_file.replace(".zip", ".dat")
             if not os.path.exists(dat_file_name):
                 unzip_file(zip_file, self.dat_dir)
 
-            dat = get_dat(dat_file_name)
-
-            if dat is None:
-                return False
-
             self.logger.info(f"{'-' * self.log_line_length}")
 
             self.logger.info(
@@ -224,10 +250,14 @@ class DATParser:
                 )
             )
 
-            rom_dict = format_dat(dat)
+            # Stream the games out of the dat, rather than holding the full XML tree in memory
+            rom_dict = get_formatted_dat(dat_file_name)
 
             self.save_rom_dict(rom_dict)
 
+            if self.use_cache:
+                self.save_cached_rom_dict(rom_dict, cache_key)
+
         self.logger.info(f"{self.log_line_sep * self.log_line_length}")
 
         return rom_dict
@@ -352,3 +382,73 @@ class DATParser:
 
         out_file = os.path.join(self.out_file)
         save_json(rom_dict, out_file)
+
+    def get_cache_key(
+        self,
+        zip_file,
+    ):
+        """Get the key for the parsed dat cache from the zip file name, size and modification time
+
+        Args:
+            zip_file (str): Path to the zip file
+        """
+
+        zip_stat = os.stat(zip_file)
+
+        cache_key = {
+            "zip_file": os.path.split(zip_file)[-1],
+            "size": zip_stat.st_size,
+            "mtime": zip_stat.st_mtime_ns,
+        }
+
+        return cache_key
+
+    def load_cached_rom_dict(
+        self,
+        cache_key,
+    ):
+        """Load the cached parsed dat, if it exists and matches the current zip file
+
+        Args:
+            cache_key (dict): Key for the current zip file
+        """
+
+        if not os.path.exists(self.cache_file):
+            return None
+
+        try:
+            cache = load_pickle(self.cache_file)
+        except Exception:
+            self.logger.debug(
+                centred_string(
+                    "Could not read parsed dat cache, will re-parse",
+                    total_length=self.log_line_length,
+                )
+            )
+            return None
+
+        if not isinstance(cache, dict) or cache.get("key", None) != cache_key:
+            return None
+
+        return cache.get("rom_dict", None)
+
+    def save_cached_rom_dict(
+        self,
+        rom_dict,
+        cache_key,
+    ):
+        """Save the parsed dat to the cache, along with the key for the zip file
+
+        Args:
+            rom_dict (dict): Parsed dat dictionary
+            cache_key (dict): Key for the current zip file
+        """
+
+        if not os.path.exists(self.parsed_dat_dir):
+            os.makedirs(self.parsed_dat_dir)
+
+        cache = {
+            "key": cache_key,
+            "rom_dict": rom_dict,
+        }
+        save_pickle(cache, self.cache_file)
@@ -12,8 +12,10 @@ from ..util import (
     setup_logger,
     load_yml,
     load_json,
-    match_retool_search_terms,
+    SearchTermIndex,
+    RetoolIndex,
     get_directory_name,
+    get_compiled_regex_config,
 )
 
 DUPE_DEFAULT = {
@@ -193,10 +195,10 @@ def add_dupe_entry_to_game_dict(
             to inherit
     """
 
-    game_name = copy.deepcopy(game["original_name"])
+    game_name = game["original_name"]
 
     if isinstance(parent, str):
-        parent_name = copy.deepcopy(parent)
+        parent_name = parent
         dupe_entry = DUPE_DEFAULT
     elif isinstance(parent, dict):
         parent_name = parent["parent_name"]
@@ -206,7 +208,7 @@ def add_dupe_entry_to_game_dict(
 
     # Update the directory name, so that it matches the short parent name
     new_dir_name = get_directory_name(parent_name)
-    game["dir_name"] = copy.deepcopy(new_dir_name)
+    game["dir_name"] = new_dir_name
 
     parent_name_lower = parent_name.lower()
     game_dict_keys = [key for key in game_dict.keys()]
@@ -214,7 +216,7 @@ def add_dupe_entry_to_game_dict(
 
     if parent_name_lower not in game_dict_keys_lower:
         game_dict[parent_name] = {}
-        final_parent_name = copy.deepcopy(parent_name)
+        final_parent_name = parent_name
     else:
         final_parent_idx = game_dict_keys_lower.index(parent_name_lower)
         final_parent_name = game_dict_keys[final_parent_idx]
@@ -243,13 +245,16 @@ class GameFinder:
         platform,
         dat=None,
         retool=None,
+        retool_index=None,
         ra_hashes=None,
+        parsed_names=None,
         config_file=None,
         config=None,
         dupe_dict=None,
         platform_config=None,
         default_config=None,
         regex_config=None,
+        compiled_regex_config=None,
         logger=None,
         log_line_sep="=",
         log_line_length=100,
@@ -264,8 +269,14 @@ class GameFinder:
             config_file (str, optional): Path to config file. Defaults to None.
             config (dict, optional): Configuration dictionary. Defaults to None.
             dupe_dict (dict, optional): Dupe dictionary. Defaults to None.
+            retool_index (RetoolIndex, optional): Pre-built index of the retool variants. Defaults to None,
+                which will build it from retool if needed
+            parsed_names (dict, optional): Store of parsed filenames, shared with ROMParser. Defaults to None,
+                which will use a store just for this GameFinder
             default_config (dict, optional): Default configuration dictionary. Defaults to None.
             regex_config (dict, optional): Dictionary of regex config. Defaults to None.
+            compiled_regex_config (CompiledRegexConfig, optional): Pre-compiled regex config. Defaults to None,
+                which will compile from regex_config and default_config
             logger (logging.Logger, optional): Logger instance. Defaults to None.
             log_line_length (int, optional): Line length of log. Defaults to 100
         """
@@ -311,13 +322,28 @@ class GameFinder:
             regex_config = load_yml(regex_file)
         self.regex_config = regex_config
 
+        if compiled_regex_config is None:
+            compiled_regex_config = get_compiled_regex_config(
+                regex_config=self.regex_config,
+                default_config=self.default_config,
+            )
+        self.compiled_regex_config = compiled_regex_config
+
         self.dat = dat
         self.retool = retool
+        self.retool_index = retool_index
         self.ra_hashes = ra_hashes
+
+        # Filenames are parsed when applying filters, so keep hold of them
+        if parsed_names is None:
+            parsed_names = {}
+        self.parsed_names = parsed_names
+        self.filter_config = None
         self.platform_config = platform_config
 
         # Info for dupes
         self.dupe_dict = dupe_dict
+        self.dupe_index = None
         self.dupe_dir = config.get("dirs", {}).get("dupe_dir", None)
         self.filter_dupes = config.get("gamefinder", {}).get("filter_dupes", True)
 
@@ -389,7 +415,7 @@ class GameFinder:
             game_dict = {}
 
             for f in files:
-                short_name = copy.deepcopy(files[f]["short_name"])
+                short_name = files[f]["short_name"]
                 game_dict[short_name] = {
                     short_name: DUPE_DEFAULT,
                 }
@@ -501,6 +527,9 @@ class GameFinder:
                 return None
             self.dupe_dict = load_json(dupe_file)
 
+        # Build the lookup once, rather than searching the whole dupe dict for each file
+        self.dupe_index = self.get_dupe_index()
+
         game_dict = {}
 
         # Loop over games, and the dupes dictionary. Also pull out various other important info
@@ -578,84 +607,65 @@ class GameFinder:
 
         # Keep track of the fact that we might have region-free names here
         if isinstance(game_name, dict):
-            full_name = copy.deepcopy(game_name["full_name"])
-            short_name = copy.deepcopy(game_name["short_name"])
-            region_free_name = copy.deepcopy(game_name["region_free_name"])
+            full_name = game_name["full_name"]
+            short_name = game_name["short_name"]
+            region_free_name = game_name["region_free_name"]
         else:
-            full_name = copy.deepcopy(game_name)
-            short_name = copy.deepcopy(game_name)
-            region_free_name = copy.deepcopy(game_name)
-
-        # We do this by lowercase checking
-        dupes = [{g: self.dupe_dict[g]} for g in self.dupe_dict]
+            full_name = game_name
+            short_name = game_name
+            region_free_name = game_name
 
-        # Pull out all the clones (and whether they've got name types) so we can check that way as well
-        all_clones = []
-        name_types = []
-
-        for d in self.dupe_dict:
-            all_clones.append(
-                {key: self.dupe_dict[d][key] for key in self.dupe_dict[d]}
-            )
-
-        for clone in all_clones:
-            name_type = [clone[k].get("name_type", None) for k in clone]
-            name_types.append(name_type)
+        if self.dupe_index is None:
+            self.dupe_index = self.get_dupe_index()
 
         found_dupe = False
 
         found_parents = []
 
-        # Check all the clones within the dupes. These can potentially
-        # have different name types, so loop
-        for clone, name_type, dupe in zip(all_clones, name_types, dupes):
-
-            for c, n in zip(clone, name_type):
+        # Find all the clones within the dupes that match. These can potentially
+        # have different name types, which the index takes care of
+        dupe_matches = self.dupe_index.match(
+            full_name=full_name,
+            short_name=short_name,
+            region_free_name=region_free_name,
+        )
 
-                found_dupe_in_clone = match_retool_search_terms(
-                    full_name=full_name,
-                    search_term=c,
-                    short_name=short_name,
-                    region_free_name=region_free_name,
-                    match_type=n,
-                )
-                if found_dupe_in_clone:
-                    found_dupe = True
+        for parent_name, c in dupe_matches:
 
-                if found_dupe_in_clone:
+            found_dupe = True
 
-                    parent_name = list(dupe.keys())[0]
-                    dupe_entry = copy.deepcopy(clone[c])
+            clone = self.dupe_dict[parent_name]
+            dupe_entry = copy.deepcopy(clone[c])
 
-                    # We need to apply filters here, hey
-                    filters = clone[c].get("filters", None)
-                    if filters is not None:
+            # We need to apply filters here, hey
+            filters = clone[c].get("filters", None)
+            if filters is not None:
 
-                        parent_name, dupe_entry = self.apply_filters(
-                            parent_name=parent_name,
-                            dupe_entry=dupe_entry,
-                            game_name=game_name,
-                            filters=filters,
-                        )
+                parent_name, dupe_entry = self.apply_filters(
+                    parent_name=parent_name,
+                    dupe_entry=dupe_entry,
+                    game_name=game_name,
+                    filters=filters,
+                )
 
-                    is_compilation = dupe_entry.get("is_compilation", False)
-                    is_superset = dupe_entry.get("is_superset", False)
+            is_compilation = dupe_entry.get("is_compilation", False)
+            is_superset = dupe_entry.get("is_superset", False)
 
-                    # Set up the dictionary
-                    found_parent = {
-                        "parent_name": parent_name,
-                        "dupe_name": c,
-                        "dupe_entry": dupe_entry,
-                        "is_compilation": is_compilation,
-                        "is_superset": is_superset,
-                    }
+            # Set up the dictionary
+            found_parent = {
+                "parent_name": parent_name,
+                "dupe_name": c,
+                "dupe_entry": dupe_entry,
+                "is_compilation": is_compilation,
+                "is_superset": is_superset,
+            }
 
-                    # Don't duplicate
-                    if found_parent not in found_parents:
-                        found_parents.append(found_parent)
+            # Don't duplicate
+            if found_parent not in found_parents:
+                found_parents.append(found_parent)
 
         if not found_dupe:
-            found_parents = copy.deepcopy(short_name)
+            found_parents = short_name
 
         if found_parents is None:
             raise ValueError("Could not find a parent name!")
@@ -665,6 +675,24 @@ class GameFinder:
 
         return found_parents
 
+    def get_dupe_index(self):
+        """Build a lookup of the dupe dict clones, keyed by their search terms
+
+        Each clone is stored as (parent name, clone name), under its name type
+        """
+
+        dupe_index = SearchTermIndex()
+
+        for parent_name in self.dupe_dict:
+            for c in self.dupe_dict[parent_name]:
+                dupe_index.add(
+                    search_term=c,
+                    value=(parent_name, c),
+                    match_type=self.dupe_dict[parent_name][c].get("name_type", None),
+                )
+
+        return dupe_index
+
     def apply_filters(
         self,
         game_name,
@@ -683,22 +711,30 @@ class GameFinder:
         # Parse out the filename
         file_to_parse = {game_name["full_name"]: game_name}
 
-        # Don't use RA hashes here
-        rp_config = copy.deepcopy(self.config)
-        if "romparser" not in rp_config:
-            rp_config["romparser"] = {}
-        rp_config["romparser"]["use_ra_hashes"] = False
+        # Don't use RA hashes here. The config only needs setting up once
+        if self.filter_config is None:
+            self.filter_config = copy.deepcopy(self.config)
+            if "romparser" not in self.filter_config:
+                self.filter_config["romparser"] = {}
+            self.filter_config["romparser"]["use_ra_hashes"] = False
+
+        # Only index the retool variants once, rather than for every parse
+        if self.retool_index is None and self.retool is not None:
+            self.retool_index = RetoolIndex(retool=self.retool)
 
         rp = ROMParser(
             platform=self.platform,
             game=parent_name,
             dat=self.dat,
             retool=self.retool,
+            retool_index=self.retool_index,
             ra_hashes=self.ra_hashes,
-            config=rp_config,
+            parsed_names=self.parsed_names,
+            config=self.filter_config,
             platform_config=self.platform_config,
             default_config=self.default_config,
             regex_config=self.regex_config,
+            compiled_regex_config=self.compiled_regex_config,
             logger=self.logger,
         )
         rom_parsed = rp.run(file_to_parse)
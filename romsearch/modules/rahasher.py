@@ -1,8 +1,12 @@
 import copy
+import math
 import os
 import requests
+from requests.adapters import HTTPAdapter
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 
 import romsearch
 from ..util import (
@@ -12,10 +16,46 @@ from ..util import (
     load_json,
     save_json,
     get_file_time,
+    get_ra_file_hashes,
+    RAIndex,
+    get_ra_index_key,
+    TokenBucket,
+    get_retry_after,
 )
 
 RA_URL = "https://retroachievements.org/API"
 
+# HTTP status codes where we should back off and try again
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+
+
+def get_local_hash(
+    file_name,
+    header=None,
+    file_exts=None,
+):
+    """Get local RA hashes for a single file, within a worker process
+
+    Returns the file name along with the hashes, or None for the hashes if the file
+    couldn't be read
+
+    Args:
+        file_name (str): Path to file
+        header (str): Header type to strip. Defaults to None
+        file_exts (list): File extensions to hash. Defaults to None, which will hash everything
+    """
+
+    try:
+        hashes = get_ra_file_hashes(
+            file_name,
+            header=header,
+            file_exts=file_exts,
+        )
+    except (OSError, ValueError):
+        hashes = None
+
+    return file_name, hashes
+
 
 class RAHasher:
 
@@ -85,6 +125,40 @@ class RAHasher:
             cache_period = float(cache_period)
         self.cache_period = cache_period
 
+        # API requests share a session, and are rate limited by a token bucket. The API URL
+        # can be changed, e.g. for testing against a local server
+        self.api_url = self.config.get("rahasher", {}).get("api_url", RA_URL)
+        self.max_concurrent_requests = self.config.get("rahasher", {}).get("max_concurrent_requests", 4)
+        self.requests_per_second = self.config.get("rahasher", {}).get("requests_per_second", 2)
+        self.max_retries = self.config.get("rahasher", {}).get("max_retries", 5)
+        self.request_timeout = self.config.get("rahasher", {}).get("request_timeout", 60)
+
+        self.rate_limiter = TokenBucket(
+            rate=self.requests_per_second,
+            capacity=self.max_concurrent_requests,
+        )
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.max_concurrent_requests,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # Local hashing of files in the raw directory
+        self.raw_dir = self.config.get("dirs", {}).get("raw_dir", None)
+        self.local_hashing = self.config.get("rahasher", {}).get("local_hashing", False)
+        self.max_parallel_hashes = self.config.get("rahasher", {}).get("max_parallel_hashes", 1)
+
+        # Optionally save the platform-level hash index, so it doesn't need rebuilding each run
+        self.cache_index = self.config.get("rahasher", {}).get("cache_index", False)
+
+        # If we can, we'll hash files ourselves. This works for plain md5 hashes,
+        # optionally stripping a header
+        self.hash_method = self.platform_config.get("ra_hash_method", None)
+        self.hash_header = self.platform_config.get("ra_hash_header", None)
+
         self.log_line_sep = log_line_sep
         self.log_line_length = log_line_length
 
@@ -232,9 +306,10 @@ class RAHasher:
 
         console_id = self.platform_config["ra_id"]
 
-        url = f"{RA_URL}/API_GetGameList.php?z={self.username}&y={self.api_key}&i={console_id}&h=1&f=1"
-        resp = requests.get(url=url)
-        data = resp.json()
+        data = self.api_get(
+            "API_GetGameList.php",
+            params={"z": self.username, "y": self.api_key, "i": console_id, "h": 1, "f": 1},
+        )
 
         save_json(data, out_file)
 
@@ -244,7 +319,6 @@ class RAHasher:
         self,
         in_file,
         ra_game_info=None,
-        sleep_time=0.5,
     ):
         """Format the GameList neatly
 
@@ -252,7 +326,6 @@ class RAHasher:
             in_file (str): Input GameList file
             ra_game_info (dict): RA game info. Defaults to None, which will use an empty
                 dictionary
-            sleep_time (float): Sleep time for API queries. Defaults to 0.5
         """
 
         game_list = load_json(in_file)
@@ -267,7 +340,8 @@ class RAHasher:
             )
         )
 
-        n_updated = 0
+        # Find everything that needs updating
+        games_to_update = []
         for d in game_list:
 
             # RA uses "Title: Subtitle" logic, while No-Intro/Redump do not
@@ -281,24 +355,36 @@ class RAHasher:
             if game_list_mod_time == ra_game_info_mod_time:
                 continue
 
-            # Format this string neatly
-            self.logger.info(
-                centred_string(
-                    f"Getting/updating hashes for {clean_title}",
-                    total_length=self.log_line_length,
-                )
+            games_to_update.append((clean_title, d))
+
+        # Use IDs to get all the useful hash info. Requests are rate limited, with a few
+        # in flight at once, and the results come back in order
+        n_updated = 0
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
+            all_game_hashes = executor.map(
+                self.get_game_hash,
+                [d["ID"] for _, d in games_to_update],
             )
 
-            # Use ID to get all the useful hash info
-            game_hashes = self.get_game_hash(d["ID"])
-            d["Hashes"] = copy.deepcopy(game_hashes)
+            try:
+                for (clean_title, d), game_hashes in zip(games_to_update, all_game_hashes):
 
-            ra_game_info[clean_title] = copy.deepcopy(d)
+                    # Format this string neatly
+                    self.logger.info(
+                        centred_string(
+                            f"Getting/updating hashes for {clean_title}",
+                            total_length=self.log_line_length,
+                        )
+                    )
 
-            # To avoid overloading the API, add a pause here
-            time.sleep(sleep_time)
+                    d["Hashes"] = copy.deepcopy(game_hashes)
 
-            n_updated += 1
+                    ra_game_info[clean_title] = copy.deepcopy(d)
+
+                    n_updated += 1
+            except Exception:
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
 
         self.logger.info(
             centred_string(
@@ -329,14 +415,272 @@ class RAHasher:
     ):
         """Using a game ID, get list of the game hashes"""
 
-        url = f"{RA_URL}/API_GetGameHashes.php?i={game_id}&y={self.api_key}&z={self.username}"
-        resp = requests.get(url=url)
-        game_hashes = resp.json()
+        game_hashes = self.api_get(
+            "API_GetGameHashes.php",
+            params={"i": game_id, "y": self.api_key, "z": self.username},
+        )
 
         game_hashes = game_hashes["Results"]
 
         return game_hashes
 
+    def api_get(
+        self,
+        endpoint,
+        params,
+    ):
+        """Query the RA API, respecting rate limits
+
+        If the server asks us to back off (via a Retry-After header), then all requests
+        will wait for that long. Otherwise, failed requests are retried with an
+        exponential backoff
+
+        Args:
+            endpoint (str): API endpoint, e.g. API_GetGameList.php
+            params (dict): Query parameters
+        """
+
+        url = f"{self.api_url}/{endpoint}"
+
+        for attempt in range(self.max_retries + 1):
+
+            self.rate_limiter.acquire()
+
+            retry_after = None
+            try:
+                resp = self.session.get(url, params=params, timeout=self.request_timeout)
+                if resp.status_code not in RETRY_STATUS_CODES:
+                    resp.raise_for_status()
+                    return resp.json()
+
+                error = f"HTTP {resp.status_code}"
+                retry_after = get_retry_after(resp.headers.get("Retry-After", None))
+
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = f"{type(e).__name__}"
+
+            if attempt == self.max_retries:
+                raise ValueError(f"Failed to query {endpoint} after {self.max_retries + 1} attempts ({error})")
+
+            # If we've been told how long to wait, then pause all requests. Otherwise, back off
+            # just this one
+            if retry_after is not None:
+                wait_time = retry_after
+                self.rate_limiter.pause(wait_time)
+            else:
+                wait_time = 2 ** attempt
+
+            self.logger.warning(
+                centred_string(
+                    f"{endpoint} failed ({error}), retrying in {wait_time:.1f}s",
+                    total_length=self.log_line_length,
+                )
+            )
+
+            if retry_after is None:
+                time.sleep(wait_time)
+
+    def get_local_hashes(self):
+        """Hash files in the raw directory, to match against RA hashes
+
+        Hashes are cached by file size and modification time, so only new or changed files
+        are hashed. Returns a dictionary of {raw file name: [md5, ...]}
+        """
+
+        if not self.local_hashing:
+            return None
+
+        if self.hash_method != "md5" and self.hash_header is None:
+            self.logger.info(
+                centred_string(
+                    f"Cannot locally hash files for {self.platform}, skipping",
+                    total_length=self.log_line_length,
+                )
+            )
+            return None
+
+        if self.raw_dir is None or self.ra_hash_dir is None:
+            self.logger.warning(
+                centred_string(
+                    "raw_dir and ra_hash_dir need to be defined in config file for local hashing",
+                    total_length=self.log_line_length,
+                )
+            )
+            return None
+
+        self.logger.info(f"{self.log_line_sep * self.log_line_length}")
+        self.logger.info(
+            centred_string(
+                f"Running local RA hashing for {self.platform}",
+                total_length=self.log_line_length,
+            )
+        )
+        self.logger.info(f"{self.log_line_sep * self.log_line_length}")
+
+        raw_dir = os.path.join(self.raw_dir, self.platform)
+
+        local_hash_file = os.path.join(
+            self.ra_hash_dir,
+            f"{self.platform} (local hashes).json",
+        )
+        local_hash_cache = {}
+        if os.path.exists(local_hash_file):
+            try:
+                local_hash_cache = load_json(local_hash_file)
+            except ValueError:
+                local_hash_cache = {}
+
+        file_exts = self.platform_config.get("file_exts", None)
+        if file_exts is not None:
+            file_exts = [f.lower() for f in file_exts]
+
+        # Find everything that's new or has changed since we last hashed it
+        new_local_hash_cache = {}
+        files_to_hash = []
+        if os.path.exists(raw_dir):
+            for f in sorted(os.listdir(raw_dir)):
+                full_f = os.path.join(raw_dir, f)
+                if not os.path.isfile(full_f):
+                    continue
+
+                stat = os.stat(full_f)
+                cached = local_hash_cache.get(f, {})
+                if (cached.get("size", None) == stat.st_size
+                        and cached.get("mtime_ns", None) == stat.st_mtime_ns
+                        and cached.get("header", None) == self.hash_header
+                ):
+                    new_local_hash_cache[f] = cached
+                    continue
+
+                new_local_hash_cache[f] = {
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "header": self.hash_header,
+                    "hashes": {},
+                }
+                files_to_hash.append(full_f)
+
+        self.logger.info(
+            centred_string(
+                f"Hashing {len(files_to_hash)} new/updated files "
+                f"({len(new_local_hash_cache) - len(files_to_hash)} cached)",
+                total_length=self.log_line_length,
+            )
+        )
+
+        hash_kwargs = {
+            "header": self.hash_header,
+            "file_exts": file_exts,
+        }
+
+        if self.max_parallel_hashes > 1 and len(files_to_hash) > 1:
+            max_workers = min(self.max_parallel_hashes, len(files_to_hash))
+            chunksize = max(1, math.ceil(len(files_to_hash) / (max_workers * 4)))
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                all_hashes = list(
+                    executor.map(
+                        partial(get_local_hash, **hash_kwargs),
+                        files_to_hash,
+                        chunksize=chunksize,
+                    )
+                )
+        else:
+            all_hashes = [get_local_hash(f, **hash_kwargs) for f in files_to_hash]
+
+        for full_f, hashes in all_hashes:
+            f = os.path.basename(full_f)
+
+            # If we couldn't read the file, don't cache it so we try again next time
+            if hashes is None:
+                self.logger.warning(
+                    centred_string(
+                        f"Could not hash {f}",
+                        total_length=self.log_line_length,
+                    )
+                )
+                new_local_hash_cache.pop(f, None)
+                continue
+
+            new_local_hash_cache[f]["hashes"] = hashes
+
+        if not os.path.exists(self.ra_hash_dir):
+            os.makedirs(self.ra_hash_dir)
+        save_json(new_local_hash_cache, local_hash_file)
+
+        local_hashes = {
+            f: list(new_local_hash_cache[f]["hashes"].values())
+            for f in new_local_hash_cache
+        }
+
+        self.logger.info(f"{self.log_line_sep * self.log_line_length}")
+
+        return local_hashes
+
+    def get_ra_index(
+        self,
+        ra_hashes,
+        ra_file_exts=None,
+    ):
+        """Build an index of the RA hashes, to be shared by every ROMParser for the platform
+
+        If caching the index, this will load it from disk if the RA hashes haven't changed
+        since it was last built
+
+        Args:
+            ra_hashes (dict): RA hash dictionary
+            ra_file_exts (list): File extensions to strip from RA names. Defaults to None
+        """
+
+        if ra_hashes is None:
+            return None
+
+        if self.hash_method not in ["md5", "custom"]:
+            return None
+
+        index_file = None
+        index_key = None
+        if self.cache_index and self.ra_hash_dir is not None:
+            index_file = os.path.join(
+                self.ra_hash_dir,
+                f"{self.platform} (ra index).pkl",
+            )
+            index_key = get_ra_index_key(
+                ra_hashes,
+                hash_method=self.hash_method,
+                ra_file_exts=ra_file_exts,
+            )
+
+            if os.path.exists(index_file):
+                ra_index = RAIndex.load(index_file, index_key=index_key)
+                if ra_index is not None:
+                    self.logger.debug(
+                        centred_string(
+                            f"Loaded RA hash index from {index_file}",
+                            total_length=self.log_line_length,
+                        )
+                    )
+                    return ra_index
+
+        ra_index = RAIndex(
+            ra_hashes=ra_hashes,
+            hash_method=self.hash_method,
+            ra_file_exts=ra_file_exts,
+        )
+
+        self.logger.debug(
+            centred_string(
+                f"Built RA hash index with {len(ra_index)} hashes",
+                total_length=self.log_line_length,
+            )
+        )
+
+        if index_file is not None:
+            if not os.path.exists(self.ra_hash_dir):
+                os.makedirs(self.ra_hash_dir)
+            ra_index.save(index_file, index_key=index_key)
+
+        return ra_index
+
     def save_ra_game_info(
         self,
         ra_game_info,
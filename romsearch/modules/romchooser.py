@@ -1,6 +1,7 @@
 from collections import Counter
 
 import copy
+import logging
 import numpy as np
 import os
 from packaging import version
@@ -35,6 +36,53 @@ DAT_FILTERS = [
 ]
 
 
+# Weights for the criteria used to rank ROMs, where each criterion is an integer and
+# higher is better. These are the same weights as the original floating point scores,
+# but in units of 0.01 so everything is an exact integer. Weights overlap, so e.g. a
+# ROM matching 10 more preferred languages outranks a budget edition
+RANKING_WEIGHTS = {
+    "has_cheevos": 10**15,
+    "is_superset": 10**14,
+    "region": 10**10,
+    "budget_edition": 10**9,
+    "language": 10**8,
+    "priority": 10**7,
+    "revision": 10**6,
+    "improved_version": 10**6,
+    "modern_version": 10**6,
+    "version": 10**5,
+    "alternate": 10**5,
+    "demoted_version": 10**3,
+    "is_compilation": 10**2,
+}
+
+# Criteria that are only added in if there are ties, in order
+RANKING_TIE_BREAK_WEIGHTS = {
+    "default_region": 10**2,
+    "default_language": 10**0,
+}
+
+RANKING_DTYPE = np.dtype(
+    [
+        ("has_cheevos", np.int64),
+        ("is_superset", np.int64),
+        ("region", np.int64),
+        ("budget_edition", np.int64),
+        ("language", np.int64),
+        ("priority", np.int64),
+        ("revision", np.int64),
+        ("improved_version", np.int64),
+        ("modern_version", np.int64),
+        ("version", np.int64),
+        ("alternate", np.int64),
+        ("demoted_version", np.int64),
+        ("is_compilation", np.int64),
+        ("default_region", np.int64),
+        ("default_language", np.int64),
+    ]
+)
+
+
 def argsort(seq):
     return sorted(range(len(seq)), key=seq.__getitem__)
 
@@ -93,21 +141,74 @@ def remove_rom_dict_entries(
     return rom_dict
 
 
-def add_versioned_score(files, rom_dict, key):
-    """Get an order for versioned strings"""
+def get_list_mask(roms, key, list_preferences):
+    """Get a mask of ROMs to exclude, where none of the list values are in the preferences
 
-    # Ensure we have a version here. If blank, set to v0
-    rom_dict = copy.deepcopy(rom_dict)
-    for f in rom_dict:
-        rom_dict[f][key] = get_sanitized_version(rom_dict[f][key])
+    ROMs with no values in the list are kept
+
+    Args:
+        roms (list): List of ROMs
+        key (str): Key for the list in each ROM
+        list_preferences (list): List of values to keep
+    """
+
+    list_preferences = set(list_preferences)
 
-    versions = [version.parse(rom_dict[f][key]) for f in files]
-    versions_sorted = np.unique(sorted(versions))
+    mask = np.fromiter(
+        (
+            len(rom[key]) > 0 and list_preferences.isdisjoint(rom[key])
+            for rom in roms
+        ),
+        dtype=bool,
+        count=len(roms),
+    )
 
-    file_scores_version = np.zeros(len(files))
-    for i, v in enumerate(versions_sorted):
-        v_idx = np.where(np.asarray(versions) == v)[0]
-        file_scores_version[v_idx] += i
+    return mask
+
+
+def add_versioned_score(files, rom_dict, key, groups=None):
+    """Get an order for versioned strings
+
+    Args:
+        files (list): List of files to score
+        rom_dict (dict): Dictionary of ROMs
+        key (str): Key for the version string in the rom_dict
+        groups (np.ndarray): Group (e.g. game) for each file. Versions are only
+            ordered within each group. Defaults to None, which puts all files in
+            the same group
+    """
+
+    # Ensure we have a version here. If blank, set to v0. Don't edit the rom_dict,
+    # since we only need the sanitized versions here. Many files share versions,
+    # so only parse each one once
+    parsed_versions = {}
+    versions = []
+    for f in files:
+        v = rom_dict[f][key]
+        if v not in parsed_versions:
+            parsed_versions[v] = version.parse(get_sanitized_version(v))
+        versions.append(parsed_versions[v])
+
+    if len(versions) == 0:
+        return np.zeros(0)
+
+    # Get an integer code for each version, so equal versions share a code
+    version_codes = {v: i for i, v in enumerate(sorted(set(versions)))}
+    codes = np.array([version_codes[v] for v in versions], dtype=np.int64)
+
+    if groups is None:
+        groups = np.zeros(len(files), dtype=np.int64)
+
+    # The score is the position of each version within the unique versions in its group
+    group_codes, inverse = np.unique(
+        np.asarray(groups, dtype=np.int64) * len(version_codes) + codes,
+        return_inverse=True,
+    )
+    unique_groups = group_codes // len(version_codes)
+    group_starts = np.searchsorted(unique_groups, unique_groups, side="left")
+    ranks = np.arange(len(group_codes)) - group_starts
+
+    file_scores_version = ranks[inverse.ravel()].astype(float)
 
     return file_scores_version
 
@@ -137,6 +238,106 @@ def add_ordered_score(files, rom_dict, priorities, score_key):
     return scores
 
 
+def get_sort_order(scores, groups):
+    """Get the order that sorts scores within groups, and where each group starts
+
+    Args:
+        scores (np.ndarray): Scores to sort
+        groups (np.ndarray): Group for each score
+    """
+
+    # lexsort uses the last key as the primary one, so sort by group first
+    order = np.lexsort((scores, groups))
+    sorted_groups = groups[order]
+
+    new_group = np.ones(len(scores), dtype=bool)
+    new_group[1:] = sorted_groups[1:] != sorted_groups[:-1]
+
+    return order, new_group
+
+
+def get_tied_groups(scores, groups):
+    """Find which scores are in a group that has any tied scores
+
+    Args:
+        scores (np.ndarray): Scores to check
+        groups (np.ndarray): Group for each score
+    """
+
+    order, new_group = get_sort_order(scores, groups)
+    sorted_scores = scores[order]
+
+    tied = np.zeros(len(scores), dtype=bool)
+    tied[1:] = sorted_scores[1:] == sorted_scores[:-1]
+    tied &= ~new_group
+
+    tied_groups = np.unique(groups[order][tied])
+
+    return np.isin(groups, tied_groups)
+
+
+def get_ranking_score(ranking, groups):
+    """Get the total score for each ROM in a ranking
+
+    This is the weighted sum of the criteria. The tie-breaking criteria are only
+    added for groups that still have tied scores, as in the original scoring
+
+    Args:
+        ranking (np.ndarray): Structured array of ranking criteria, with RANKING_DTYPE
+        groups (np.ndarray): Group (e.g. game) for each ROM
+    """
+
+    scores = np.zeros(len(ranking), dtype=np.int64)
+    for c in RANKING_WEIGHTS:
+        scores += RANKING_WEIGHTS[c] * ranking[c]
+
+    for c in RANKING_TIE_BREAK_WEIGHTS:
+        tied = get_tied_groups(scores, groups)
+        scores[tied] += RANKING_TIE_BREAK_WEIGHTS[c] * ranking[c][tied]
+
+    return scores
+
+
+def get_ranked_scores(ranking, groups=None):
+    """Get scores from a ranking, where higher is better and ties get the same score
+
+    ROMs are sorted by their total score within each group, and the score is the dense
+    rank within that (starting from 1 for the worst ROM)
+
+    Args:
+        ranking (np.ndarray): Structured array of ranking criteria, with RANKING_DTYPE
+        groups (np.ndarray): Group (e.g. game) for each ROM. ROMs are only ranked
+            within each group. Defaults to None, which puts all ROMs in the same group
+    """
+
+    n_roms = len(ranking)
+    if n_roms == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    if groups is None:
+        groups = np.zeros(n_roms, dtype=np.int64)
+    groups = np.asarray(groups)
+
+    total_scores = get_ranking_score(ranking, groups)
+
+    order, new_group = get_sort_order(total_scores, groups)
+    sorted_scores = total_scores[order]
+
+    # Bump the rank every time the score changes, resetting for each group
+    changed = np.zeros(n_roms, dtype=bool)
+    changed[1:] = sorted_scores[1:] != sorted_scores[:-1]
+    changed &= ~new_group
+
+    n_changed = np.cumsum(changed)
+    group_starts = np.maximum.accumulate(np.where(new_group, np.arange(n_roms), 0))
+    ranks = 1 + n_changed - n_changed[group_starts]
+
+    scores = np.zeros(n_roms, dtype=np.int64)
+    scores[order] = ranks
+
+    return scores
+
+
 def filter_by_list(
     rom_dict,
     key,
@@ -577,133 +778,133 @@ class ROMChooser:
 
         return True
 
-    def get_best_roms(
+    def get_rom_ranking(
         self,
         files,
         rom_dict,
+        groups=None,
     ):
-        """Get the best ROM(s) from a list, using a scoring system"""
-
-        # Because we have a lot of potential regions and languages, use a 2
-        # order of magnitude buffer. Everything else, just 1
-
-        # Small bumps for default region and language orders
-        default_language_score = 1e0
-        default_region_score = 1e2
-
-        # Positive scores
-        improved_version_score = 1e4
-        version_score = 1e5
-        revision_score = 1e6
-        budget_edition_score = 1e7
-        language_score = 1e8
-        region_score = 1e10
-        superset_score = 1e12
-        cheevo_score = 1e13
-
-        # Negative scores
-        compilation_score = -1e0
-        demoted_version_score = -1e1
-        alternate_version_score = -1e3
-        modern_version_score = -1e4
-        priority_score = -1e5
-
-        file_scores = np.zeros(len(files))
+        """Get the per-criterion ranking values for a list of ROMs
 
-        # Just stepping through the scores in order.
+        Each criterion is an integer where higher is better, so negative criteria
+        (e.g. modern versions) are stored as negative values. See RANKING_WEIGHTS for
+        how these are combined
 
-        # Positive scores
-
-        # Improved version
-        file_scores += improved_version_score * np.array(
-            [int(rom_dict[f]["improved_version"]) for f in files]
-        )
-
-        # Version numbering, which needs to be parsed. We edit these to only add a little each time
-        version_score_to_add = add_versioned_score(files, rom_dict, "version")
-        file_scores += version_score * (1 + (version_score_to_add - 1) / 100)
+        Args:
+            files (list): List of files to rank
+            rom_dict (dict): Dictionary of ROMs
+            groups (np.ndarray): Group (e.g. game) for each file, for criteria that
+                depend on the other ROMs. Defaults to None, which puts all files in
+                the same group
+        """
 
-        # Revision numbering, again parsed
-        revision_score_to_add = add_versioned_score(files, rom_dict, "revision")
-        file_scores += revision_score * (1 + (revision_score_to_add - 1) / 100)
+        ranking = np.zeros(len(files), dtype=RANKING_DTYPE)
+
+        for i, f in enumerate(files):
+            rom = rom_dict[f]
+            ranking[i] = (
+                int(rom["has_cheevos"]),
+                int(rom.get("is_superset", False)),
+                0,
+                int(rom["budget_edition"]),
+                0,
+                1 - int(rom["priority"]),
+                0,
+                int(rom["improved_version"]),
+                -int(rom["modern_version"]),
+                0,
+                -int(rom["alternate"]),
+                -int(rom["demoted_version"]),
+                -int(rom.get("is_compilation", False)),
+                0,
+                0,
+            )
 
-        # Budget edition
-        file_scores += budget_edition_score * np.array(
-            [int(rom_dict[f]["budget_edition"]) for f in files]
+        # Ordered and versioned scores, which depend on the other ROMs
+        ranking["region"] = add_ordered_score(
+            files, rom_dict, priorities=self.region_preferences, score_key="regions"
         )
-
-        # Language priorities
-        language_score_to_add = add_ordered_score(
+        ranking["language"] = add_ordered_score(
             files, rom_dict, priorities=self.language_preferences, score_key="languages"
         )
-        file_scores += language_score * (1 + (language_score_to_add - 1) / 100)
+        ranking["revision"] = add_versioned_score(
+            files, rom_dict, "revision", groups=groups
+        )
+        ranking["version"] = add_versioned_score(
+            files, rom_dict, "version", groups=groups
+        )
 
-        # Regions priorities
-        region_score_to_add = add_ordered_score(
+        # Default region and language orders, which will only break ties
+        ranking["default_region"] = add_ordered_score(
             files,
             rom_dict,
-            priorities=self.region_preferences,
+            priorities=self.default_region_preferences,
             score_key="regions",
         )
-        file_scores += region_score * (1 + (region_score_to_add - 1) / 100)
-
-        # Superset score
-        file_scores += superset_score * np.array(
-            [rom_dict[f].get("is_superset", False) for f in files]
+        ranking["default_language"] = add_ordered_score(
+            files,
+            rom_dict,
+            priorities=self.default_language_preferences,
+            score_key="languages",
         )
 
-        # Achievement hashes
-        file_scores += cheevo_score * np.array(
-            [int(rom_dict[f]["has_cheevos"]) for f in files]
-        )
+        return ranking
 
-        # Negative scores
+    def get_best_roms(
+        self,
+        files,
+        rom_dict,
+    ):
+        """Get the best ROM(s) from a list, using a ranking system
 
-        # Compilation score
-        file_scores += compilation_score * np.array(
-            [rom_dict[f].get("is_compilation", False) for f in files]
-        )
+        This returns a score for each ROM, where higher is better and tied ROMs
+        have the same score
 
-        # Demoted version
-        file_scores += demoted_version_score * np.array(
-            [int(rom_dict[f]["demoted_version"]) for f in files]
-        )
+        Args:
+            files (list): List of files to rank
+            rom_dict (dict): Dictionary of ROMs
+        """
 
-        # Alternate version
-        file_scores += alternate_version_score * np.array(
-            [int(rom_dict[f]["alternate"]) for f in files]
-        )
+        ranking = self.get_rom_ranking(files, rom_dict)
+        file_scores = get_ranked_scores(ranking)
 
-        # Modern version
-        file_scores += modern_version_score * np.array(
-            [int(rom_dict[f]["modern_version"]) for f in files]
-        )
+        self.log_ranking(files, ranking, file_scores)
 
-        # Priority scoring. We subtract 1 so that the highest priority has no change
-        file_scores += priority_score * (
-            np.array([int(rom_dict[f]["priority"]) for f in files]) - 1
-        )
+        return file_scores
 
-        # If we have some with matching file scores, then include default priorities. First, regions
-        if len(file_scores) != len(set(file_scores)):
-            # Default region priorities
-            region_score_to_add = add_ordered_score(
-                files,
-                rom_dict,
-                priorities=self.default_region_preferences,
-                score_key="regions",
-            )
-            file_scores += default_region_score * (1 + (region_score_to_add - 1) / 100)
+    def log_ranking(
+        self,
+        files,
+        ranking,
+        file_scores,
+    ):
+        """Log out the per-criterion breakdown of a ranking, at debug level
 
-        # If still the same, then languages
-        if len(file_scores) != len(set(file_scores)):
-            # Default language priorities
-            language_score_to_add = add_ordered_score(
-                files, rom_dict, priorities=self.default_language_preferences, score_key="languages"
+        Args:
+            files (list): List of ranked files
+            ranking (np.ndarray): Structured array of ranking criteria
+            file_scores (np.ndarray): Ranked scores for the files
+        """
+
+        for i, f in enumerate(files):
+            breakdown = [
+                f"{c}: {ranking[c][i]}" for c in ranking.dtype.names if ranking[c][i] != 0
+            ]
+            self.logger.debug(
+                left_aligned_string(
+                    f"-> {f} [Rank score: {file_scores[i]}]",
+                    total_length=self.log_line_length,
+                )
             )
-            file_scores += default_language_score * (1 + (language_score_to_add - 1) / 100)
+            if len(breakdown) > 0:
+                self.logger.debug(
+                    left_aligned_string(
+                        f"--> {', '.join(breakdown)}",
+                        total_length=self.log_line_length,
+                    )
+                )
 
-        return file_scores
+        return True
 
     def get_best_rom(
         self,
@@ -726,3 +927,231 @@ class ROMChooser:
                 rom_dict[r]["romchooser_score"] = float(rom_scores[i])
 
         return rom_dict
+
+
+class ROMBatchChooser(ROMChooser):
+
+    def __init__(
+        self,
+        platform,
+        config_file=None,
+        config=None,
+        default_config=None,
+        regex_config=None,
+        logger=None,
+        log_line_sep="=",
+        log_line_length=100,
+    ):
+        """ROM choose tool, for all games in a platform at once
+
+        This makes the same choices as running the ROMChooser for each game, but
+        works on all the ROMs for a platform as one table, with a game column. The
+        filters are then boolean masks over that table, and ROMs are ranked within
+        each game in a single pass
+
+        Args:
+            platform (str): Platform name
+            config_file (str, optional): Path to config file. Defaults to None.
+            config (dict, optional): Configuration dictionary. Defaults to None.
+            default_config (dict, optional): Default configuration dictionary. Defaults to None.
+            regex_config (dict, optional): Configuration dictionary. Defaults to None.
+            logger (logging.Logger, optional): Logger instance. Defaults to None.
+            log_line_length (int, optional): Line length of log. Defaults to 100
+        """
+
+        # Games are only used for logging, so label the whole platform here
+        super().__init__(
+            platform=platform,
+            game="All games",
+            config_file=config_file,
+            config=config,
+            default_config=default_config,
+            regex_config=regex_config,
+            logger=logger,
+            log_line_sep=log_line_sep,
+            log_line_length=log_line_length,
+        )
+
+    def run(self, all_roms_dict):
+        """Run the ROM chooser over all games
+
+        Args:
+            all_roms_dict (dict): Dictionary of games, each a dictionary of ROMs
+        """
+
+        all_roms_dict = self.run_chooser(all_roms_dict)
+
+        # Log out per game, so it looks the same as running game by game
+        for game in all_roms_dict:
+
+            self.logger.info(f"{self.log_line_sep * self.log_line_length}")
+            self.logger.info(
+                centred_string(
+                    f"Running ROMChooser for {game}", total_length=self.log_line_length
+                )
+            )
+            self.logger.info(f"{self.log_line_sep * self.log_line_length}")
+
+            self.print_summary(all_roms_dict[game])
+
+            self.logger.info(f"{self.log_line_sep * self.log_line_length}")
+
+        # Filter out excluded ROMs before we return
+        all_roms_dict = {
+            game: {
+                key: all_roms_dict[game][key]
+                for key in all_roms_dict[game]
+                if not all_roms_dict[game][key]["excluded"]
+            }
+            for game in all_roms_dict
+        }
+
+        return all_roms_dict
+
+    def run_chooser(self, all_roms_dict):
+        """Make a ROM choice for every game, based on various factors
+
+        This follows the same steps as ROMChooser.run_chooser, but applies
+        the filters as masks over all the ROMs at once
+
+        Args:
+            all_roms_dict (dict): Dictionary of games, each a dictionary of ROMs
+        """
+
+        # Flatten everything into one table, keeping track of the game for each ROM
+        files = []
+        game_ids = []
+        roms = []
+        for game_id, game in enumerate(all_roms_dict):
+            for f in all_roms_dict[game]:
+                files.append(f)
+                game_ids.append(game_id)
+                roms.append(all_roms_dict[game][f])
+
+        n_roms = len(roms)
+        n_games = len(all_roms_dict)
+        game_ids = np.array(game_ids, dtype=np.int64)
+
+        # Add in whether these are excluded or not, why, and potentially a score
+        for rom in roms:
+            rom["excluded"] = False
+            rom["excluded_reason"] = []
+            rom["romchooser_score"] = 0
+
+        excluded = np.zeros(n_roms, dtype=bool)
+
+        for f in self.dat_filters:
+            self.logger.debug(
+                left_aligned_string(f"Filtering {f}", total_length=self.log_line_length)
+            )
+            if f in DAT_FILTERS:
+                mask = np.fromiter(
+                    (bool(rom.get(f, None)) for rom in roms), dtype=bool, count=n_roms
+                )
+                excluded = self.exclude_roms(roms, excluded, mask, f)
+            else:
+                raise ValueError(f"Unknown filter type {f}")
+
+        # Language
+        if self.filter_languages:
+            self.logger.debug(
+                left_aligned_string(
+                    f"Filtering languages", total_length=self.log_line_length
+                )
+            )
+            mask = get_list_mask(roms, "languages", self.language_preferences)
+            excluded = self.exclude_roms(roms, excluded, mask, "languages")
+
+        # Regions
+        if self.filter_regions:
+            self.logger.debug(
+                left_aligned_string(
+                    f"Filtering regions", total_length=self.log_line_length
+                )
+            )
+            mask = get_list_mask(roms, "regions", self.region_preferences)
+            excluded = self.exclude_roms(roms, excluded, mask, "regions")
+
+        # Modern versions
+        if self.exclude_modern:
+            self.logger.debug(
+                left_aligned_string(
+                    f"Removing modern versions", total_length=self.log_line_length
+                )
+            )
+            mask = np.fromiter(
+                (bool(rom.get("modern_version", None)) for rom in roms),
+                dtype=bool,
+                count=n_roms,
+            )
+            excluded = self.exclude_roms(roms, excluded, mask, "modern_version")
+
+        # If we have a split between singular titles and compilations, sort that out here.
+        # Compilations are only removed for games that have singular titles left
+        self.logger.debug(
+            left_aligned_string(
+                f"Potentially filtering compilations", total_length=self.log_line_length
+            )
+        )
+        is_compilation = np.fromiter(
+            (bool(rom.get("is_compilation", False)) for rom in roms),
+            dtype=bool,
+            count=n_roms,
+        )
+        n_singles = np.bincount(
+            game_ids[~excluded & ~is_compilation], minlength=n_games
+        )
+        mask = ~excluded & is_compilation & (n_singles[game_ids] > 0)
+        excluded = self.exclude_roms(roms, excluded, mask, "is_compilation")
+
+        # Rank the versions within each game, for games that have a choice to make
+        if self.use_best_version:
+            self.logger.debug(
+                left_aligned_string(
+                    f"Getting best version", total_length=self.log_line_length
+                )
+            )
+
+            n_left = np.bincount(game_ids[~excluded], minlength=n_games)
+            to_rank = np.flatnonzero(~excluded & (n_left[game_ids] > 1))
+
+            ranking = self.get_rom_ranking(
+                to_rank,
+                roms,
+                groups=game_ids[to_rank],
+            )
+            rom_scores = get_ranked_scores(ranking, groups=game_ids[to_rank])
+
+            for i, idx in enumerate(to_rank):
+                roms[idx]["romchooser_score"] = float(rom_scores[i])
+
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.log_ranking(
+                    [files[idx] for idx in to_rank],
+                    ranking,
+                    rom_scores,
+                )
+
+        return all_roms_dict
+
+    def exclude_roms(
+        self,
+        roms,
+        excluded,
+        mask,
+        reason,
+    ):
+        """Exclude ROMs from a mask, noting down why
+
+        Args:
+            roms (list): List of ROMs
+            excluded (np.ndarray): Boolean array of whether ROMs are already excluded
+            mask (np.ndarray): Boolean array of ROMs to exclude
+            reason (str): Reason for exclusion
+        """
+
+        for idx in np.flatnonzero(mask):
+            roms[idx]["excluded"] = True
+            roms[idx]["excluded_reason"].append(reason)
+
+        return excluded | mask
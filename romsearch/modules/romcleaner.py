@@ -1,6 +1,4 @@
 import copy
-import fnmatch
-import glob
 import numpy as np
 import os
 import shutil
@@ -10,11 +8,33 @@ from ..util import (
     centred_string,
     load_yml,
     setup_logger,
-    load_json,
-    save_json,
+    load_json_cache,
+    save_json_cache,
+    ALLOWED_CACHE_BACKENDS,
+    SQLiteROMCache,
+    get_sqlite_cache_file,
 )
 
 
+def normalise_path(
+    path,
+    case_sensitive=True,
+):
+    """Normalise a path so it can be used as a key in sets
+
+    Args:
+        path (str): Path to normalise
+        case_sensitive (bool): If False, will also normalise case the same way the
+            filesystem does (i.e. on Windows). Defaults to True
+    """
+
+    path = os.path.normpath(path)
+    if not case_sensitive:
+        path = os.path.normcase(path)
+
+    return path
+
+
 class ROMCleaner:
 
     def __init__(
@@ -81,10 +101,32 @@ class ROMCleaner:
 
         cache_file = os.path.join(cache_dir, f"cache ({platform}).json")
 
-        if os.path.exists(cache_file):
-            cache = load_json(cache_file)
+        self.cache_backend = self.config.get("romsearch", {}).get(
+            "cache_backend", "json"
+        )
+        if self.cache_backend not in ALLOWED_CACHE_BACKENDS:
+            raise ValueError(
+                f"cache_backend should be one of {ALLOWED_CACHE_BACKENDS}, not {self.cache_backend}"
+            )
+
+        if self.cache_backend == "sqlite":
+
+            # Pull the whole cache out, since we loop over everything. Keep track of what
+            # was there so we only need to delete what's been removed when saving
+            self.sqlite_cache = SQLiteROMCache(
+                get_sqlite_cache_file(cache_dir, platform)
+            )
+            self.sqlite_cache.migrate_json(cache_file, platform)
+            cache = {platform: self.sqlite_cache.to_dict()}
+            self.sqlite_cache_keys = {
+                (game, rom) for game in cache[platform] for rom in cache[platform][game]
+            }
         else:
-            cache = {}
+
+            # Load the cache, including anything journaled by ROMMover
+            self.sqlite_cache = None
+            self.sqlite_cache_keys = set()
+            cache = load_json_cache(cache_file)
 
         self.platform = platform
         self.cache_file = cache_file
@@ -158,6 +200,24 @@ class ROMCleaner:
         cache_cleaned = []
         dict_cleaned = {}
 
+        # Take a single snapshot of what's on disk, rather than checking each file separately
+        paths_on_disk, roms_on_disk = self.get_disk_snapshot(full_rom_dir)
+
+        # Build up a reverse index of ROMs that are claimed by included compilations or supersets,
+        # pointing to the games (by short name) that claim them
+        claimed_roms = {}
+        for rr in rom_dict:
+            for f in rom_dict[rr]:
+
+                f_superset = rom_dict[rr][f].get("is_superset", False)
+                f_compilation = rom_dict[rr][f].get("is_compilation", False)
+                f_excluded = rom_dict[rr][f].get("excluded", True)
+
+                if (f_superset or f_compilation) and not f_excluded:
+                    if f not in claimed_roms:
+                        claimed_roms[f] = set()
+                    claimed_roms[f].add(rom_dict[rr][f]["short_name"])
+
         # Find files in the cache that are no longer included
         if self.platform in self.cache:
             for r in self.cache[self.platform]:
@@ -185,29 +245,10 @@ class ROMCleaner:
                                 if f_short != r:
                                     excluded = True
 
-                        # If something has been excluded, but it is an included compilation/superset, then don't exclude
-                        if excluded:
-
-                            truly_excluded = copy.deepcopy(excluded)
-
-                            for rr in rom_dict:
-
-                                if not truly_excluded:
-                                    continue
-
-                                if f in rom_dict[rr].keys():
-
-                                    f_superset = rom_dict[rr][f].get("is_superset", False)
-                                    f_compilation = rom_dict[rr][f].get("is_compilation", False)
-                                    f_excluded = rom_dict[rr][f].get("excluded", True)
-
-                                    # Also, check the directory name against the short name here
-                                    f_short = rom_dict[rr][f]["short_name"]
-
-                                    if (f_superset or f_compilation) and not f_excluded and f_short == r:
-                                        truly_excluded = False
-
-                            excluded = copy.deepcopy(truly_excluded)
+                        # If something has been excluded, but it is an included compilation/superset
+                        # for this directory, then don't exclude
+                        if excluded and r in claimed_roms.get(f, set()):
+                            excluded = False
 
                     else:
 
@@ -227,28 +268,21 @@ class ROMCleaner:
             for r in self.cache[self.platform]:
                 for f in self.cache[self.platform][r]:
 
-                    # Just check if any files exist to speed things up
-                    files_exist = False
-
                     # If we don't have an output directory, we should clear this from the cache
                     rom_output_directory = self.cache[self.platform][r][f].get(
                         "output_directory", None
                     )
-                    if rom_output_directory is None:
-                        dict_cleaned[r].append(f)
-                        continue
 
-                    for rom_file in self.cache[self.platform][r][f]["all_files"]:
-                        rom_output_file = os.path.join(
-                            full_rom_dir, rom_output_directory, rom_file
+                    # Just check if any files exist
+                    files_exist = False
+                    if rom_output_directory is not None:
+                        files_exist = any(
+                            normalise_path(os.path.join(full_rom_dir, rom_output_directory, rom_file),
+                                           case_sensitive=False,
+                                           ) in paths_on_disk
+                            for rom_file in self.cache[self.platform][r][f]["all_files"]
                         )
 
-                        if os.path.exists(rom_output_file):
-                            files_exist = True
-
-                        if files_exist:
-                            continue
-
                     if not files_exist:
                         if r not in dict_cleaned:
                             dict_cleaned[r] = []
@@ -258,60 +292,31 @@ class ROMCleaner:
                                          cache_cleaned=cache_cleaned,
                                          )
 
-        # Find files on disk, searching recursively. This is a little different depending on
-        # whether we're separating out directories or not
-        if self.separate_directories:
-            roms_on_disk = glob.glob(
-                os.path.join(full_rom_dir, "*/", "*.*"),
-                recursive=True,
-                include_hidden=True,
-            )
-        else:
-            roms_on_disk = glob.glob(
-                os.path.join(full_rom_dir, "**", "*.*"),
-                recursive=True,
-                include_hidden=True,
-            )
-
         # Clear out files that are not in the cache
-        roms_in_cache = []
+        roms_in_cache = set()
         if self.platform in self.cache:
             for r in self.cache[self.platform]:
 
                 for f in self.cache[self.platform][r]:
 
-                    rom_output_directory = copy.deepcopy(
-                        self.cache[self.platform][r][f]["output_directory"]
-                    )
+                    rom_output_directory = self.cache[self.platform][r][f]["output_directory"]
 
                     for rom_file in self.cache[self.platform][r][f]["all_files"]:
                         rom_file_w_directory = os.path.join(
                             full_rom_dir, rom_output_directory, rom_file
                         )
-                        roms_in_cache.append(rom_file_w_directory)
+                        roms_in_cache.add(normalise_path(rom_file_w_directory))
 
         for r in roms_on_disk:
 
-            found_rom_in_cache = False
-
-            for c in roms_in_cache:
-
-                if found_rom_in_cache:
-                    continue
-
-                if fnmatch.fnmatchcase(r, c):
-                    found_rom_in_cache = True
-
-            if not found_rom_in_cache:
-
-                # Don't remove directories
-                if os.path.isdir(r):
-                    continue
+            if normalise_path(r) in roms_in_cache:
+                continue
 
-                r_short = os.path.basename(r)
-                if os.path.exists(r):
-                    os.remove(r)
-                roms_cleaned.append(r_short)
+            r_short = os.path.basename(r)
+            if os.path.exists(r):
+                os.remove(r)
+            paths_on_disk.discard(normalise_path(r, case_sensitive=False))
+            roms_cleaned.append(r_short)
 
         # Remove any empty directories, searching recursively
         for root, subdirs, _ in os.walk(full_rom_dir):
@@ -347,7 +352,7 @@ class ROMCleaner:
 
                                 mf_file = mf.readline().strip()
                                 full_mf_file = os.path.join(full_rom_dir, multi_disk_output_dir, mf_file)
-                                if not os.path.exists(full_mf_file):
+                                if normalise_path(full_mf_file, case_sensitive=False) not in paths_on_disk:
                                     excluded = True
 
                         # If we've excluded the file, we want to delete it here both from the cache and on disk
@@ -362,7 +367,6 @@ class ROMCleaner:
                                     os.remove(full_ff)
                                     roms_cleaned.append(ff)
 
-
         cache_cleaned = self.clean_cache(dict_cleaned=dict_cleaned,
                                          cache_cleaned=cache_cleaned,
                                          )
@@ -391,6 +395,43 @@ class ROMCleaner:
 
         return roms_cleaned, cache_cleaned
 
+    def get_disk_snapshot(self,
+                          full_rom_dir,
+                          ):
+        """Walk the ROM directory once, to get everything that's on disk
+
+        Returns a set of all (normalised) paths on disk, for existence checks, and a list
+        of ROM files that should be checked against the cache. If we're separating out
+        directories, these are only the files one directory down
+
+        Args:
+            full_rom_dir (str): Full path to the ROM directory
+        """
+
+        paths_on_disk = set()
+        roms_on_disk = []
+
+        for root, subdirs, files in os.walk(full_rom_dir):
+
+            for subdir in subdirs:
+                paths_on_disk.add(normalise_path(os.path.join(root, subdir), case_sensitive=False))
+
+            # Only pick up files one directory down if we're separating directories
+            is_rom_dir = True
+            if self.separate_directories:
+                rel_root = os.path.relpath(root, full_rom_dir)
+                is_rom_dir = rel_root != os.curdir and os.sep not in rel_root
+
+            for f in files:
+                full_f = os.path.join(root, f)
+                paths_on_disk.add(normalise_path(full_f, case_sensitive=False))
+
+                # Only include things that look like files with an extension
+                if is_rom_dir and "." in f:
+                    roms_on_disk.append(full_f)
+
+        return paths_on_disk, roms_on_disk
+
     def clean_cache(self,
                     dict_cleaned,
                     cache_cleaned=None,
@@ -432,7 +473,18 @@ class ROMCleaner:
         return cache_cleaned
 
     def save_cache(self):
-        """Save out the cache file"""
+        """Save out the cache file, and clear the journal"""
+
+        # For SQLite, just delete whatever we've removed
+        if self.sqlite_cache is not None:
+            platform_cache = self.cache.get(self.platform, {})
+            cache_keys = {
+                (game, rom) for game in platform_cache for rom in platform_cache[game]
+            }
+            self.sqlite_cache.remove_entries(
+                sorted(self.sqlite_cache_keys - cache_keys)
+            )
+            self.sqlite_cache_keys = cache_keys
+            return True
 
-        cache = copy.deepcopy(self.cache)
-        save_json(cache, self.cache_file, sort_key=self.platform)
+        save_json_cache(self.cache, self.cache_file, sort_key=self.platform)
@@ -1,9 +1,13 @@
 import copy
 import glob
+import json
 import numpy as np
 import os
 import re
 import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
 import romsearch
 from ..util import (
@@ -14,6 +18,9 @@ from ..util import (
     split,
     centred_string,
     remove_case_insensitive_matches,
+    load_json,
+    save_json,
+    get_file_time,
 )
 
 RCLONE_METHODS = [
@@ -199,6 +206,31 @@ class ROMDownloader:
 
         self.remote_dir = remote_dir
 
+        # How many rclone copies to run at once. This can be set per-remote
+        max_parallel_copies = self.config.get("romdownloader", {}).get(
+            "max_parallel_copies", 1
+        )
+        if isinstance(max_parallel_copies, dict):
+            max_parallel_copies = max_parallel_copies.get(self.remote_name, 1)
+        self.max_parallel_copies = max_parallel_copies
+
+        # Whether to copy files in batches, rather than one call per file. In this case,
+        # use max_parallel_copies for the number of rclone transfers
+        self.batch_copy = self.config.get("romdownloader", {}).get("batch_copy", False)
+        self.batch_transfers = self.max_parallel_copies if self.max_parallel_copies > 1 else 5
+
+        # Optionally use a (cached) listing of the remote, so we know what exists before copying
+        self.use_remote_listing = self.config.get("romdownloader", {}).get(
+            "use_remote_listing", False
+        )
+        remote_listing_cache_period = self.config.get("romdownloader", {}).get(
+            "remote_listing_cache_period", 24
+        )
+        if isinstance(remote_listing_cache_period, str):
+            remote_listing_cache_period = float(remote_listing_cache_period)
+        self.remote_listing_cache_period = remote_listing_cache_period
+        self.cache_dir = self.config.get("dirs", {}).get("cache_dir", os.getcwd())
+
         self.discord_url = self.config.get("discord", {}).get("webhook_url", None)
         self.dry_run = self.config.get("romdownloader", {}).get("dry_run", False)
 
@@ -460,7 +492,7 @@ class ROMDownloader:
         subchannel_original_dir=None,
         max_retries=5,
     ):
-        """Use rclone to copy files one-by-one
+        """Use rclone to copy files, either one-by-one or a number at once
 
         Args:
             remote_dir: rclone remote path
@@ -494,97 +526,349 @@ class ROMDownloader:
                 for f in get_tidy_files(os.path.join(str(subchannel_original_dir), "*"))
             ]
 
-        for fi, copy_file in enumerate(self.copy_files):
+        # If we're using the remote listing, we can skip anything that doesn't exist
+        remote_files = None
+        if self.use_remote_listing:
+            remote_files = self.get_remote_listing(
+                remote_dir=remote_dir,
+                subchannel=subchannel,
+                max_retries=max_retries,
+            )
 
-            # If we have a dictionary here, then we have files with priorities, so find the highest
-            # priority file that exists on the remote
-            if isinstance(self.copy_files, dict):
+        copy_kwargs = {
+            "n_files": n_files,
+            "remote_dir": remote_dir,
+            "out_dir": out_dir,
+            "subchannel": subchannel,
+            "subchannel_original_files": subchannel_original_files,
+            "remote_files": remote_files,
+            "max_retries": max_retries,
+        }
 
-                priorities = np.unique(
-                    [
-                        self.copy_files[copy_file][r]["score"]
-                        for r in self.copy_files[copy_file]
-                    ]
-                )[::-1]
+        if self.batch_copy:
 
-            # Otherwise, priorities is just a 0
-            else:
-                priorities = [0]
+            # Copy everything at each priority with a single rclone call
+            all_files_to_copy = self.rclone_copy_batch(
+                remote_dir=remote_dir,
+                out_dir=out_dir,
+                subchannel=subchannel,
+                subchannel_original_files=subchannel_original_files,
+                remote_files=remote_files,
+                max_retries=max_retries,
+            )
 
-            found_files_at_priority = False
+        elif self.max_parallel_copies > 1 and n_files > 1:
+
+            # Run a number of copies at once. Files for each game are still tried in priority
+            # order, and the logs for each game are kept together
+            with ThreadPoolExecutor(max_workers=self.max_parallel_copies) as executor:
+                futures = [
+                    executor.submit(
+                        self.rclone_copy_game,
+                        fi=fi,
+                        copy_file=copy_file,
+                        **copy_kwargs,
+                    )
+                    for fi, copy_file in enumerate(self.copy_files)
+                ]
+
+                try:
+                    for future in futures:
+                        files_to_copy, game_log = future.result()
+                        all_files_to_copy.extend(files_to_copy)
+                        self.flush_game_log(game_log)
+                except Exception:
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    raise
 
-            # Loop through priorities and download files at the highest possible priority
-            for priority in priorities:
+        else:
+            for fi, copy_file in enumerate(self.copy_files):
+                files_to_copy, game_log = self.rclone_copy_game(
+                    fi=fi,
+                    copy_file=copy_file,
+                    **copy_kwargs,
+                )
+                all_files_to_copy.extend(files_to_copy)
+                self.flush_game_log(game_log)
 
-                if found_files_at_priority:
-                    continue
+        # If we haven't moved anything, note that here
+        if len(all_files_to_copy) == 0:
+            self.logger.info(
+                centred_string(
+                    f"No files downloaded",
+                    total_length=self.log_line_length,
+                )
+            )
+        self.logger.info(f"{self.log_line_sep * self.log_line_length}")
+
+        # Do a pass through where we delete all extraneous files at the end
+        # If we're checking files, then do a pass where if we don't find the file in the includes, then
+        # we delete it
+        all_files = get_tidy_files(os.path.join(str(out_dir), "*"))
+
+        found_matches = []
 
-                if isinstance(self.copy_files, dict):
+        for f in all_files:
 
-                    fs = []
+            found_match = False
 
-                    for priority_key in self.copy_files[copy_file]:
+            for c in all_files_to_copy:
+                if f == c:
+                    found_match = True
 
-                        if (
-                            self.copy_files[copy_file][priority_key]["score"]
-                            != priority
-                        ):
-                            continue
+            if not found_match:
+                os.remove(os.path.join(str(out_dir), f))
+                found_matches.append(f)
 
-                        fs.append(self.copy_files[copy_file][priority_key]["name"])
+        return True
 
-                else:
-                    fs = [copy_file]
+    def rclone_copy_game(
+        self,
+        fi,
+        copy_file,
+        n_files,
+        remote_dir,
+        out_dir,
+        subchannel=None,
+        subchannel_original_files=None,
+        remote_files=None,
+        max_retries=5,
+    ):
+        """Use rclone to copy the files for a single game
 
-                all_files_to_copy.extend(fs)
+        Files are tried in priority order, and lower priority files will only be
+        copied if nothing at a higher priority is found. Rather than logging directly,
+        this returns the log messages, so they can be kept together when running
+        multiple copies at once
 
-                for f in fs:
+        Args:
+            fi: Index of the game
+            copy_file: Game (or file) to copy
+            n_files: Total number of games
+            remote_dir: rclone remote path
+            out_dir: directory to download to
+            subchannel: subchannel to copy to
+            subchannel_original_files: Files in the original directory for subchannel-related files.
+                Defaults to None
+            remote_files: Set of files on the remote. Defaults to None, which will
+                try to copy files without checking
+            max_retries: maximum number of retries
+        """
 
-                    if subchannel is not None:
-                        f_no_ext = os.path.splitext(f)[0]
+        if subchannel_original_files is None:
+            subchannel_original_files = []
 
-                        skip_sc = False
+        files_to_copy = []
+        game_log = []
 
-                        # If we don't have this file in the subchannel list, then just skip
-                        if not f_no_ext in self.subchannel_dict[subchannel]:
-                            self.logger.debug(
-                                centred_string(
-                                    f"{f_no_ext} not found in subchannel files",
-                                    total_length=self.log_line_length,
-                                )
-                            )
-                            skip_sc = True
-
-                        # And if we don't have the existing file on disc, also skip
-                        if not f_no_ext in subchannel_original_files:
-                            self.logger.debug(
-                                centred_string(
-                                    f"{f_no_ext} not found in original directory",
-                                    total_length=self.log_line_length,
-                                )
-                            )
-                            skip_sc = True
+        found_files_at_priority = False
 
-                        if skip_sc:
-                            all_files_to_copy.remove(f)
-                            continue
+        # Loop through priorities and download files at the highest possible priority
+        for fs in self.get_priority_files(copy_file):
 
-                    # If we already have the file, then skip if we have that option turned on
-                    out_file = os.path.join(out_dir, f)
-                    file_already_exists = os.path.exists(out_file)
+            if found_files_at_priority:
+                continue
 
-                    if file_already_exists and self.skip_existing_files:
+            for f in fs:
 
-                        self.logger.info(
-                            centred_string(
-                                f"[{fi + 1}/{n_files}]: {f} already in {out_dir}, skipping",
-                                total_length=self.log_line_length,
+                if subchannel is not None:
+                    if self.skip_subchannel_file(
+                        f=f,
+                        subchannel=subchannel,
+                        subchannel_original_files=subchannel_original_files,
+                        game_log=game_log,
+                    ):
+                        continue
+
+                files_to_copy.append(f)
+
+                # If we already have the file, then skip if we have that option turned on
+                out_file = os.path.join(out_dir, f)
+                file_already_exists = os.path.exists(out_file)
+
+                if file_already_exists and self.skip_existing_files:
+
+                    game_log.append(
+                        (
+                            "info",
+                            f"[{fi + 1}/{n_files}]: {f} already in {out_dir}, skipping",
+                        )
+                    )
+                    found_files_at_priority = True
+
+                elif remote_files is not None and f not in remote_files:
+
+                    game_log.append(
+                        (
+                            "warning",
+                            f"[{fi + 1}/{n_files}]: Could not find {self.remote_name}:{remote_dir}{f}.",
+                        )
+                    )
+
+                else:
+
+                    # Check if the file we're trying to download does not match exactly, but does
+                    # match in a case-insensitive way, and remove if so
+                    f_no_ext = os.path.splitext(f)[0]
+                    remove_case_insensitive_matches(file_to_match=f_no_ext,
+                                                    pattern=f,
+                                                    path=str(out_dir),
+                                                    )
+
+                    remote_file_name = f"{self.remote_name}:{remote_dir}{f}"
+
+                    cmd = (
+                        f"rclone copy "
+                        f"--inplace "
+                        f"--no-traverse "
+                        f"--disable-http2 "
+                        f"--multi-thread-streams=0 "
+                        f"--size-only "
+                        f'"{remote_file_name}" "{out_dir}" '
+                        f"-v "
+                    )
+
+                    short_out_dir = os.path.split(out_dir)[-1]
+
+                    if self.dry_run:
+                        game_log.append(
+                            (
+                                "info",
+                                f"Dry run, would rclone copy {short_out_dir}: {f} with:",
                             )
                         )
+                        game_log.append(("info", cmd))
                         found_files_at_priority = True
-
                     else:
 
+                        game_log.append(
+                            (
+                                "info",
+                                f"[{fi + 1}/{n_files}]: Running rclone copy for {short_out_dir}: {f}",
+                            )
+                        )
+
+                        retcode = self.run_rclone_copy(
+                            cmd=cmd,
+                            game_log=game_log,
+                            max_retries=max_retries,
+                        )
+
+                        if retcode == 9999:
+                            game_log.append(
+                                (
+                                    "warning",
+                                    f"Could not find {self.remote_name}:{remote_dir}{f}.",
+                                )
+                            )
+
+                        # Check if the file exists
+                        if os.path.exists(out_file):
+                            found_files_at_priority = True
+
+        if fi != n_files - 1 and found_files_at_priority:
+            game_log.append(("separator", None))
+
+        return files_to_copy, game_log
+
+    def rclone_copy_batch(
+        self,
+        remote_dir,
+        out_dir,
+        subchannel=None,
+        subchannel_original_files=None,
+        remote_files=None,
+        max_retries=5,
+    ):
+        """Use rclone to copy files in batches, via --files-from-raw
+
+        The highest priority files that don't already exist are all copied with a
+        single rclone call. Games where nothing was found then move onto the next
+        priority, and so on until everything has been found or we run out of files.
+        Returns the list of all files that were considered for copying
+
+        Args:
+            remote_dir: rclone remote path
+            out_dir: directory to download to
+            subchannel: subchannel to copy to
+            subchannel_original_files: Files in the original directory for subchannel-related files.
+                Defaults to None
+            remote_files: Set of files on the remote. Defaults to None, which will
+                try to copy files without checking
+            max_retries: maximum number of retries
+        """
+
+        if subchannel_original_files is None:
+            subchannel_original_files = []
+
+        files_to_copy = []
+        short_out_dir = os.path.split(out_dir)[-1]
+
+        # For each game, get the files grouped by priority, and keep track of which
+        # priority we're up to
+        priority_files = {
+            copy_file: self.get_priority_files(copy_file)
+            for copy_file in self.copy_files
+        }
+        priority_idx = {copy_file: 0 for copy_file in self.copy_files}
+
+        batch_round = 0
+
+        while len(priority_idx) > 0:
+
+            batch_round += 1
+            batch_log = []
+
+            batch_files = []
+            batch_games = {}
+
+            for copy_file in list(priority_idx.keys()):
+
+                # Move down through the priorities until we either find something or
+                # have something to copy, since there's no point waiting for the next
+                # batch if there's nothing to try at this priority
+                found_files_at_priority = False
+                game_batch_files = []
+
+                while (
+                    not found_files_at_priority
+                    and len(game_batch_files) == 0
+                    and priority_idx[copy_file] < len(priority_files[copy_file])
+                ):
+
+                    fs = priority_files[copy_file][priority_idx[copy_file]]
+                    priority_idx[copy_file] += 1
+
+                    for f in fs:
+
+                        if subchannel is not None:
+                            if self.skip_subchannel_file(
+                                f=f,
+                                subchannel=subchannel,
+                                subchannel_original_files=subchannel_original_files,
+                                game_log=batch_log,
+                            ):
+                                continue
+
+                        files_to_copy.append(f)
+
+                        # If we already have the file, then skip if we have that option turned on
+                        out_file = os.path.join(out_dir, f)
+                        if os.path.exists(out_file) and self.skip_existing_files:
+                            batch_log.append(("info", f"{f} already in {out_dir}, skipping"))
+                            found_files_at_priority = True
+                            continue
+
+                        # If it's not on the remote, don't bother trying to copy
+                        if remote_files is not None and f not in remote_files:
+                            batch_log.append(
+                                (
+                                    "warning",
+                                    f"Could not find {self.remote_name}:{remote_dir}{f}.",
+                                )
+                            )
+                            continue
+
                         # Check if the file we're trying to download does not match exactly, but does
                         # match in a case-insensitive way, and remove if so
                         f_no_ext = os.path.splitext(f)[0]
@@ -593,138 +877,385 @@ class ROMDownloader:
                                                         path=str(out_dir),
                                                         )
 
-                        remote_file_name = f"{self.remote_name}:{remote_dir}{f}"
-
-                        cmd = (
-                            f"rclone copy "
-                            f"--inplace "
-                            f"--no-traverse "
-                            f"--disable-http2 "
-                            f"--multi-thread-streams=0 "
-                            f"--size-only "
-                            f'"{remote_file_name}" "{out_dir}" '
-                            f"-v "
-                        )
+                        game_batch_files.append(f)
 
-                        short_out_dir = os.path.split(out_dir)[-1]
+                batch_files.extend(game_batch_files)
 
-                        if self.dry_run:
-                            self.logger.info(
-                                centred_string(
-                                    f"Dry run, would rclone copy {short_out_dir}: {f} with:",
-                                    total_length=self.log_line_length,
-                                )
-                            )
-                            self.logger.info(
-                                centred_string(cmd, total_length=self.log_line_length)
-                            )
-                            found_files_at_priority = True
-                        else:
+                if len(game_batch_files) > 0 and not found_files_at_priority:
+                    batch_games[copy_file] = game_batch_files
+                else:
+                    # Either we've found something, or we've run out of files to try
+                    priority_idx.pop(copy_file)
+
+            self.flush_game_log(batch_log)
+
+            if len(batch_files) == 0:
+                continue
+
+            batch_log = []
+
+            cmd = (
+                f"rclone copy "
+                f"--inplace "
+                f"--no-traverse "
+                f"--disable-http2 "
+                f"--multi-thread-streams=0 "
+                f"--size-only "
+                f"--transfers={self.batch_transfers} "
+                f'--files-from-raw "{{files_from}}" '
+                f'"{self.remote_name}:{remote_dir}" "{out_dir}" '
+                f"-v "
+            )
 
-                            retry = 0
-                            retcode = 1
+            if self.dry_run:
+                batch_log.append(
+                    (
+                        "info",
+                        f"Dry run, would rclone copy {short_out_dir}: {len(batch_files)} files with:",
+                    )
+                )
+                batch_log.append(("info", cmd.replace("{files_from}", "files.txt")))
+                for f in batch_files:
+                    batch_log.append(("info", f))
+                self.flush_game_log(batch_log)
 
-                            self.logger.info(
-                                centred_string(
-                                    f"[{fi + 1}/{n_files}]: Running rclone copy for {short_out_dir}: {f}",
-                                    total_length=self.log_line_length,
-                                )
+                # As with single copies, assume the first files we try would be found
+                for copy_file in batch_games:
+                    priority_idx.pop(copy_file, None)
+
+                continue
+
+            batch_log.append(
+                (
+                    "info",
+                    f"[Batch {batch_round}]: Running rclone copy for {short_out_dir}: {len(batch_files)} files",
+                )
+            )
+
+            # Write out the list of files for rclone. Use the raw version, so lines
+            # starting with # or ; aren't treated as comments
+            with tempfile.NamedTemporaryFile(
+                mode="w",
+                suffix=".txt",
+                encoding="utf-8",
+                delete=False,
+            ) as tmp:
+                tmp.write("\n".join(batch_files) + "\n")
+                files_from = tmp.name
+
+            try:
+                self.run_rclone_copy(
+                    cmd=cmd.replace("{files_from}", files_from),
+                    game_log=batch_log,
+                    max_retries=max_retries,
+                    kill_on_not_found=False,
+                )
+            finally:
+                os.remove(files_from)
+
+            # Anything we've found is done, everything else moves onto the next priority
+            for copy_file, fs in batch_games.items():
+                found_files_at_priority = False
+                for f in fs:
+                    if os.path.exists(os.path.join(out_dir, f)):
+                        found_files_at_priority = True
+                    else:
+                        batch_log.append(
+                            (
+                                "warning",
+                                f"Could not find {self.remote_name}:{remote_dir}{f}.",
                             )
+                        )
 
-                            # The retcode is set to 9999 if the file doesn't exist
-                            while retcode not in [0, 9999] and retry < max_retries:
-
-                                # Execute the command and capture the output
-                                with subprocess.Popen(
-                                    cmd,
-                                    text=True,
-                                    stdout=subprocess.PIPE,
-                                    stderr=subprocess.STDOUT,
-                                ) as process:
-                                    for line in process.stdout:
-
-                                        # Replace any potential tabs in the line, strip whitespace and skip newline
-                                        # at the end
-                                        line = re.sub(r"\s+", " ", line[:-1])
-                                        line = line.lstrip().rstrip()
-
-                                        if len(line) == 0:
-                                            continue
-
-                                        # Skip weird time notifications
-                                        if "Time may be set wrong" in line:
-                                            continue
-
-                                        # If the file doesn't exist, set a high number and immediately terminate the
-                                        # process
-                                        if (
-                                            "directory not found" in line
-                                            or "object not found" in line
-                                        ):
-                                            retcode = 9999
-                                            process.kill()
-                                            continue
-
-                                        # Log each line of the output using the provided logger
-                                        self.logger.info(
-                                            centred_string(
-                                                line,  # Exclude the newline character
-                                                total_length=self.log_line_length,
-                                            )
-                                        )
-
-                                if retcode != 9999:
-                                    retcode = process.poll()
-                                retry += 1
-
-                            # If we've hit the maximum retries and still we have errors, raise an error with the args
-                            if retcode not in [0, 9999]:
-                                raise subprocess.CalledProcessError(
-                                    retcode, process.args
-                                )
-                            if retcode == 9999:
-                                self.logger.warning(
-                                    centred_string(
-                                        f"Could not find {self.remote_name}:{remote_dir}{f}.",
-                                        total_length=self.log_line_length,
-                                    )
-                                )
+                if found_files_at_priority:
+                    priority_idx.pop(copy_file, None)
 
-                            # Check if the file exists
-                            if os.path.exists(out_file):
-                                found_files_at_priority = True
+            batch_log.append(("separator", None))
+            self.flush_game_log(batch_log)
 
-            if fi != len(self.copy_files) - 1 and found_files_at_priority:
-                self.logger.info(f"{'-' * self.log_line_length}")
+        return files_to_copy
 
-        # If we haven't moved anything, note that here
-        if len(all_files_to_copy) == 0:
-            self.logger.info(
+    def get_remote_listing(
+        self,
+        remote_dir,
+        subchannel=None,
+        max_retries=5,
+    ):
+        """Get a set of files on the remote, using rclone lsjson
+
+        This is cached in the cache directory, and only refreshed once the cache
+        is older than the cache period. If we can't get a listing, will return None
+
+        Args:
+            remote_dir: rclone remote path
+            subchannel: subchannel the remote path is for. Defaults to None
+            max_retries: maximum number of retries
+        """
+
+        cache_name = self.platform
+        if subchannel is not None:
+            cache_name += f" {subchannel}"
+
+        cache_file = os.path.join(self.cache_dir, f"remote listing ({cache_name}).json")
+        remote = f"{self.remote_name}:{remote_dir}"
+
+        # If we're within the cache period and it's for the same remote, just use that
+        if os.path.exists(cache_file):
+
+            cache_modtime = get_file_time(
+                cache_file,
+                return_as_str=False,
+            )
+            cache_age = (datetime.now() - cache_modtime).total_seconds() / 3600
+
+            remote_listing = load_json(cache_file)
+
+            if (
+                remote_listing.get("remote", None) == remote
+                and cache_age < self.remote_listing_cache_period
+            ):
+                self.logger.info(
+                    centred_string(
+                        f"Using remote listing cached {cache_age:.1f} hours ago",
+                        total_length=self.log_line_length,
+                    )
+                )
+                return set(remote_listing.get("files", []))
+
+        self.logger.info(
+            centred_string(
+                f"Getting remote listing for {remote}",
+                total_length=self.log_line_length,
+            )
+        )
+
+        cmd = (
+            f"rclone lsjson "
+            f"--files-only "
+            f"--no-mimetype "
+            f"--no-modtime "
+            f"--disable-http2 "
+            f'"{remote}"'
+        )
+
+        retry = 0
+        retcode = 1
+        result = None
+
+        while retcode != 0 and retry < max_retries:
+            result = subprocess.run(
+                cmd,
+                text=True,
+                capture_output=True,
+                encoding="utf-8",
+            )
+            retcode = result.returncode
+            retry += 1
+
+        if retcode != 0:
+            self.logger.warning(
                 centred_string(
-                    f"No files downloaded",
+                    f"Could not get remote listing for {remote}, will copy without it",
                     total_length=self.log_line_length,
                 )
             )
-        self.logger.info(f"{self.log_line_sep * self.log_line_length}")
+            return None
 
-        # Do a pass through where we delete all extraneous files at the end
-        # If we're checking files, then do a pass where if we don't find the file in the includes, then
-        # we delete it
-        all_files = get_tidy_files(os.path.join(str(out_dir), "*"))
+        files = [f["Path"] for f in json.loads(result.stdout)]
+        files.sort()
 
-        found_matches = []
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
 
-        for f in all_files:
+        save_json(
+            {
+                "remote": remote,
+                "files": files,
+            },
+            cache_file,
+        )
 
-            found_match = False
+        return set(files)
 
-            for c in all_files_to_copy:
-                if f == c:
-                    found_match = True
+    def get_priority_files(
+        self,
+        copy_file,
+    ):
+        """Get the files to copy for a game, grouped by priority from highest to lowest
 
-            if not found_match:
-                os.remove(os.path.join(str(out_dir), f))
-                found_matches.append(f)
+        Args:
+            copy_file: Game (or file) to copy
+        """
+
+        # If we don't have a dictionary, then there's just the one file
+        if not isinstance(self.copy_files, dict):
+            return [[copy_file]]
+
+        priorities = np.unique(
+            [
+                self.copy_files[copy_file][r]["score"]
+                for r in self.copy_files[copy_file]
+            ]
+        )[::-1]
+
+        priority_files = []
+        for priority in priorities:
+            fs = [
+                self.copy_files[copy_file][priority_key]["name"]
+                for priority_key in self.copy_files[copy_file]
+                if self.copy_files[copy_file][priority_key]["score"] == priority
+            ]
+            priority_files.append(fs)
+
+        return priority_files
+
+    def skip_subchannel_file(
+        self,
+        f,
+        subchannel,
+        subchannel_original_files,
+        game_log,
+    ):
+        """Check whether a file should be skipped for a subchannel
+
+        Args:
+            f: File name
+            subchannel: subchannel to copy to
+            subchannel_original_files: Files in the original directory for subchannel-related files
+            game_log: List to append log messages to
+        """
+
+        f_no_ext = os.path.splitext(f)[0]
+
+        skip_sc = False
+
+        # If we don't have this file in the subchannel list, then just skip
+        if not f_no_ext in self.subchannel_dict[subchannel]:
+            game_log.append(
+                (
+                    "debug",
+                    f"{f_no_ext} not found in subchannel files",
+                )
+            )
+            skip_sc = True
+
+        # And if we don't have the existing file on disc, also skip
+        if not f_no_ext in subchannel_original_files:
+            game_log.append(
+                (
+                    "debug",
+                    f"{f_no_ext} not found in original directory",
+                )
+            )
+            skip_sc = True
+
+        return skip_sc
+
+    def run_rclone_copy(
+        self,
+        cmd,
+        game_log,
+        max_retries=5,
+        kill_on_not_found=True,
+    ):
+        """Run an rclone copy command, retrying if it fails
+
+        Returns the return code, which is set to 9999 if a file doesn't exist
+        on the remote. When copying multiple files, this is only the case if
+        missing files are the only errors. Anything else will be retried
+
+        Args:
+            cmd: rclone command to run
+            game_log: List to append log messages to
+            max_retries: maximum number of retries
+            kill_on_not_found: If True, will stop rclone as soon as a file isn't found.
+                Set to False when copying multiple files at once. Defaults to True
+        """
+
+        retry = 0
+        retcode = 1
+
+        # The retcode is set to 9999 if the file doesn't exist
+        while retcode not in [0, 9999] and retry < max_retries:
+
+            # Keep track of whether files are missing, separately to any other errors
+            files_not_found = False
+            other_errors = False
+
+            # Execute the command and capture the output
+            with subprocess.Popen(
+                cmd,
+                text=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+            ) as process:
+                for line in process.stdout:
+
+                    # Replace any potential tabs in the line, strip whitespace and skip newline
+                    # at the end
+                    line = re.sub(r"\s+", " ", line[:-1])
+                    line = line.lstrip().rstrip()
+
+                    if len(line) == 0:
+                        continue
+
+                    # Skip weird time notifications
+                    if "Time may be set wrong" in line:
+                        continue
+
+                    # If the file doesn't exist, set a high number and immediately terminate the
+                    # process
+                    if (
+                        "directory not found" in line
+                        or "object not found" in line
+                    ):
+                        files_not_found = True
+                        if kill_on_not_found:
+                            retcode = 9999
+                            process.kill()
+                            continue
+                    elif "ERROR" in line:
+                        other_errors = True
+
+                    # Log each line of the output
+                    game_log.append(("info", line))
+
+            if retcode != 9999:
+                retcode = process.poll()
+
+                # If we're copying multiple files, only skip retrying if it failed because files
+                # weren't there
+                if retcode != 0 and files_not_found and not other_errors:
+                    retcode = 9999
+
+            retry += 1
+
+        # If we've hit the maximum retries and still we have errors, raise an error with the args
+        if retcode not in [0, 9999]:
+            raise subprocess.CalledProcessError(
+                retcode, process.args
+            )
+
+        return retcode
+
+    def flush_game_log(
+        self,
+        game_log,
+    ):
+        """Write out log messages collected while copying a game
+
+        Args:
+            game_log: List of (level, message) tuples. A level of "separator"
+                will write out a separating line
+        """
+
+        for level, message in game_log:
+            if level == "separator":
+                self.logger.info(f"{'-' * self.log_line_length}")
+                continue
+
+            log_func = getattr(self.logger, level)
+            log_func(centred_string(message, total_length=self.log_line_length))
 
         return True
 
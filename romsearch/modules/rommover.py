@@ -1,5 +1,6 @@
 import copy
 import glob
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import os
 import shutil
@@ -11,12 +12,19 @@ from .rompatcher import ROMPatcher
 from ..util import (
     get_directory_name,
     centred_string,
+    BufferedLogger,
     load_yml,
     setup_logger,
     unzip_file,
     load_json,
     save_json,
+    load_json_cache,
+    append_to_cache_journal,
+    save_json_cache,
     remove_case_insensitive_matches,
+    ALLOWED_CACHE_BACKENDS,
+    SQLiteROMCache,
+    get_sqlite_cache_file,
 )
 
 COMPRESSION_FILES = {
@@ -131,15 +139,61 @@ class ROMMover:
 
         cache_file = os.path.join(cache_dir, f"cache ({platform}).json")
 
-        if os.path.exists(cache_file):
-            cache = load_json(cache_file)
-        else:
-            cache = {}
+        self.cache_backend = self.config.get("romsearch", {}).get(
+            "cache_backend", "json"
+        )
+        if self.cache_backend not in ALLOWED_CACHE_BACKENDS:
+            raise ValueError(
+                f"cache_backend should be one of {ALLOWED_CACHE_BACKENDS}, not {self.cache_backend}"
+            )
 
         self.platform = platform
         self.cache_file = cache_file
+
+        if self.cache_backend == "sqlite":
+
+            # Entries are read and written one at a time, so we don't hold the cache in memory.
+            # Bring in any existing JSON cache the first time we see the database
+            self.sqlite_cache = SQLiteROMCache(
+                get_sqlite_cache_file(cache_dir, platform)
+            )
+            n_migrated = self.sqlite_cache.migrate_json(cache_file, platform)
+            if n_migrated > 0:
+                self.logger.info(
+                    centred_string(
+                        f"Migrated {n_migrated} entries from JSON cache",
+                        total_length=self.log_line_length,
+                    )
+                )
+            cache = {}
+        else:
+
+            # Load the cache, including anything journaled from a previous run that didn't finish
+            self.sqlite_cache = None
+            cache = load_json_cache(cache_file)
+
         self.cache = cache
 
+        # Updates are journaled per-ROM, and only written to the main cache file every so often
+        self.cache_compact_every = self.config.get("rommover", {}).get(
+            "cache_compact_every", 100
+        )
+        self.n_journal_entries = 0
+
+        # Keep track of CRCs for unzipped files, so we can skip extracting files that haven't changed
+        self.skip_unchanged_unzip = self.config.get("rommover", {}).get(
+            "skip_unchanged_unzip", True
+        )
+        self.crc_cache_file = os.path.join(cache_dir, f"crc cache ({platform}).json")
+        self.crc_cache = None
+        if self.skip_unchanged_unzip:
+            self.crc_cache = self.load_crc_cache()
+
+        # Number of ROMs to place at once
+        self.max_parallel_moves = self.config.get("rommover", {}).get(
+            "max_parallel_moves", 1
+        )
+
         # Pull in platform config that we need
         mod_dir = os.path.dirname(romsearch.__file__)
 
@@ -229,6 +283,7 @@ class ROMMover:
 
         roms_moved = self.move_roms(rom_dict)
         self.save_cache()
+        self.save_crc_cache()
 
         self.logger.info(f"{self.log_line_sep * self.log_line_length}")
 
@@ -336,337 +391,80 @@ class ROMMover:
 
         total_games = len(all_rom_dict)
 
+        # First, figure out where everything is going. Cache lookups and multi-disc tracking
+        # happen here, so that the placement itself can happen in parallel
+        rom_moves = []
+        placed_roms = set()
         for game_no, game in enumerate(all_rom_dict):
             rom_dict = all_rom_dict[game]
 
             for rom_no, rom in enumerate(rom_dict):
 
-                # Because the filename can change, keep it here
-                full_name = copy.deepcopy(rom_dict[rom]["full_name"])
-                rom_file = copy.deepcopy(rom_dict[rom]["download_name"])
-                short_name = copy.deepcopy(rom_dict[rom]["short_name"])
-
-                # If we're either a superset or a compilation, then
-                # inherit a game and directory name from the ROM
-                # instead. This will avoid multiple downloads in
-                # some circumstances
-                is_superset = rom_dict[rom].get("is_superset", False)
-                is_compilation = rom_dict[rom].get("is_compilation", False)
-
-                # Pull out a clean directory name and disc-free name in case we need it
-                if is_superset or is_compilation:
-                    dir_name = get_directory_name(full_name)
-                    game = copy.deepcopy(short_name)
-                else:
-                    dir_name = str(copy.deepcopy(rom_dict[rom]["dir_name"]))
-
-                # Keep track of what this original directory name is, since we might need
-                # it
-                dir_name_original = copy.deepcopy(dir_name)
-
-                disc_free_name = str(copy.deepcopy(rom_dict[rom]["disc_free_name"]))
-
-                cache_mod_time = (
-                    self.cache.get(self.platform, {})
-                    .get(game, {})
-                    .get(rom, {})
-                    .get("file_mod_time", 0)
-                )
-
-                # Figure out if we're patching the ROM, based on whether it's already been patched
-                # and if there's a patch file
-                rom_patched = (
-                    self.cache.get(self.platform, {})
-                    .get(game, {})
-                    .get(rom, {})
-                    .get("patched", False)
+                rom_move = self.get_rom_move(
+                    game_no=game_no,
+                    game=game,
+                    rom=rom,
+                    rom_dict=rom_dict,
                 )
-                patch_url = rom_dict.get(rom, {}).get("patch_file", "")
-
-                to_patch_rom = False
-                if not rom_patched and patch_url != "" and self.run_rompatcher:
-                    to_patch_rom = True
-
-                # Keep track if we're expecting a patched file
-                expecting_patched_rom = False
-                if patch_url != "" and self.run_rompatcher:
-                    expecting_patched_rom = True
-
-                # Keep track of absolute directories and relative directories to the
-                # platform itself, for cache reasons
-
-                # Decide whether to use platform name or ES-friendly name
-                if (
-                        self.config.get("rommover", {}).get("use_es_friendly_names", False)
-                        and self.platform_config.get("es_friendly_name", None) is not None
-                ):
-                    base_dir = self.platform_config.get("es_friendly_name")
-                else:
-                    base_dir = self.platform
-
-                # Build output path
-                if self.separate_directories:
-                    out_dir = os.path.join(self.rom_dir, base_dir, dir_name)
-                    out_base_dir = copy.deepcopy(dir_name)
-                else:
-                    out_dir = os.path.join(self.rom_dir, base_dir)
-                    out_base_dir = ""
-
-                # Skip if the file modification time matches the one in the cache, we're not patching, and the
-                # destination file exists
-
-                # If we're handling multi-disc files, and we have a multi-disc file, then make the output
-                # directory a hidden one
-                if rom_dict[rom]["multi_disc"] and self.handle_multi_discs:
-
-                    m3u_out_dir = copy.deepcopy(out_dir)
-                    out_dir = os.path.join(str(out_dir), f".{disc_free_name}")
 
-                    # Also update the dir name, since we use that later
-                    game_dir_name = copy.deepcopy(out_base_dir)
-                    out_base_dir = os.path.join(out_base_dir, f".{disc_free_name}")
-
-                    if disc_free_name not in all_multi_discs:
-                        all_multi_discs[disc_free_name] = {
-                            "m3u_out_dir": m3u_out_dir,
-                            "game": dir_name_original,
-                            "game_dir_name": game_dir_name,
-                            "relative_dir": f".{disc_free_name}",
-                            "out_files": [],
-                            "modified": False,
-                        }
-
-                # Loop over here, since the extensions might change. Search specifically by the filename
-                # to make things quicker
-                rom_file_no_ext = os.path.splitext(rom_file)[0]
-                out_files = glob.glob(os.path.join(str(out_dir), f"{rom_file_no_ext}*"))
-                short_out_files = [os.path.basename(o) for o in out_files]
-
-                final_file_exists = False
-                final_file_name = None
-
-                # First, search for an exact match, but only if we're not unzipping
-                if not self.unzip and not to_patch_rom:
-                    for o in short_out_files:
-
-                        if final_file_exists:
-                            continue
-
-                        if o == rom_file:
-                            final_file_exists = True
-                            final_file_name = os.path.basename(o)
-
-                # If we have unzip and compress set on, then we need to
-                # figure out which we're actually doing
-                unzip = copy.deepcopy(self.unzip)
-                compress = copy.deepcopy(self.compress)
-
-                if self.unzip and self.compress:
-
-                    raw_file = os.path.join(self.raw_dir, self.platform, rom_file)
-
-                    compress_suitable = self.check_compress_suitable(raw_file)
-                    if compress_suitable:
-                        unzip = False
-                        compress = True
-                    else:
-                        unzip = True
-                        compress = False
-
-                # If we're unzipping (and potentially patching), then pull the expected files out here and check again
-                if unzip or expecting_patched_rom:
-                    final_file_exists, final_file_name = self.check_files_exist(
-                        rom=rom_file,
-                        files=short_out_files,
-                        file_ext_key="file_exts",
-                        patched_rom=expecting_patched_rom,
-                    )
-
-                # If we're compressing, then pull the expected files out here and check again
-                if compress:
-                    final_file_exists, final_file_name = self.check_files_exist(
-                        rom=rom_file,
-                        files=short_out_files,
-                        file_ext_key="compress_file_exts",
-                        patched_rom=expecting_patched_rom,
-                    )
-
-                # Now check if we've got a match in all but case. Period here is important to avoid
-                # accidentally removing patched files
-                remove_case_insensitive_matches(file_to_match=rom_file_no_ext,
-                                                pattern=f"{rom_file_no_ext}.*",
-                                                path=str(out_dir),
-                                                )
-
-                # If nothing has changed, then move on
-                if (
-                        rom_dict[rom]["file_mod_time"] == cache_mod_time
-                        and final_file_exists
-                ):
-                    self.logger.info(
-                        centred_string(
-                            f"[{game_no + 1}/{total_games}]: No updates for {rom}, skipping",
-                            total_length=self.log_line_length,
-                        )
-                    )
-
-                    # Make sure we keep track of multi-disc stuff, even if we're not necessarily changing it
-                    if rom_dict[rom]["multi_disc"] and self.handle_multi_discs:
-                        if isinstance(final_file_name, str):
-                            final_file_name = [final_file_name]
-                            all_multi_discs[disc_free_name]["out_files"].extend(
-                                final_file_name
-                            )
-
-                    # Gracefully update the cache from earlier versions
-                    cache_files = (
-                        self.cache.get(self.platform, {})
-                        .get(game, {})
-                        .get(rom, {})
-                        .get("all_files", [])
-                    )
-
-                    if len(cache_files) == 0:
-
-                        # Log whether we've patched or not
-                        patched = False
-                        if expecting_patched_rom:
-                            patched = True
-                        rom_dict[rom]["patched"] = patched
-
-                        # Update the cache
-                        self.cache_update(
-                            game=game,
-                            rom=rom,
-                            files=short_out_files,
-                            out_dir=out_base_dir,
-                            rom_dict=rom_dict,
-                        )
+                # Supersets and compilations may have changed the game name
+                game = rom_move["game"]
 
+                # Supersets and compilations can be claimed by multiple games, but end up
+                # in the same place, so only place them once
+                if (game, rom) in placed_roms:
                     continue
+                placed_roms.add((game, rom))
 
-                # We need to keep track of output files
-                out_files = []
-
-                # If we're patching ROMs, then do that here
-                if to_patch_rom:
-
-                    rom_patch_file = os.path.join(self.raw_dir, self.platform, rom_file)
-
-                    patcher = ROMPatcher(
-                        platform=self.platform,
-                        config=self.config,
-                        platform_config=self.platform_config,
-                        regex_config=self.regex_config,
-                        logger=self.logger,
-                        log_line_length=self.log_line_length,
-                    )
-
-                    full_rom = patcher.run(
-                        file=str(rom_patch_file),
-                        patch_url=patch_url,
-                        rom_dict=rom_dict[rom],
-                    )
-
-                    unzip = False
-                    patched = True
-
-                else:
-                    full_dir = os.path.join(self.raw_dir, self.platform)
-                    full_rom = os.path.join(str(full_dir), rom_file)
+                if rom_move["multi_disc"] is not None:
+                    disc_free_name = rom_move["disc_free_name"]
+                    if disc_free_name not in all_multi_discs:
+                        all_multi_discs[disc_free_name] = copy.deepcopy(rom_move["multi_disc"])
 
-                    patched = False
+                rom_moves.append(rom_move)
 
-                # If we're compressing ROMs, do that here
-                if compress:
+        if self.max_parallel_moves > 1 and len(rom_moves) > 1:
 
-                    if to_patch_rom:
-                        raise NotImplementedError(
-                            "Currently cannot handle compressing of patched files"
-                        )
-
-                    rom_compress_file = os.path.join(
-                        self.raw_dir, self.platform, rom_file
+            # Place ROMs in a thread pool. Logs are held per-ROM, and the logs and cache
+            # updates are written out here in the original order
+            with ThreadPoolExecutor(max_workers=self.max_parallel_moves) as executor:
+                futures = [
+                    executor.submit(
+                        self.move_rom,
+                        rom_move=rom_move,
+                        total_games=total_games,
+                        logger=BufferedLogger(),
                     )
-
-                    full_rom = self.compress_file(
-                        rom_compress_file,
-                    )
-
-                # Log whether we've patched or not
-                rom_dict[rom]["patched"] = patched
-
-                # Move the main file. Don't delete folders as the game and the out directory
-                # don't necessarily match
-                move_file_success, moved_files = self.move_file(
-                    full_rom, game=game, out_dir=out_dir, unzip=unzip
-                )
-
-                if not move_file_success:
-                    self.logger.warning(
-                        centred_string(
-                            f"[{game_no + 1}/{total_games}]: {rom_file} not found in raw directory, skipping",
-                            total_length=self.log_line_length,
+                    for rom_move in rom_moves
+                ]
+
+                try:
+                    for rom_move, future in zip(rom_moves, futures):
+                        move_result = future.result()
+                        move_result["logger"].flush(self.logger)
+                        self.update_from_rom_move(
+                            rom_move=rom_move,
+                            move_result=move_result,
+                            all_multi_discs=all_multi_discs,
+                            roms_moved=roms_moved,
                         )
-                    )
-                    continue
-
-                out_files.extend(moved_files)
+                except Exception:
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    raise
 
-                self.logger.info(
-                    centred_string(
-                        f"[{game_no + 1}/{total_games}]: Moved {rom_file}",
-                        total_length=self.log_line_length,
-                    )
+        else:
+            for rom_move in rom_moves:
+                move_result = self.move_rom(
+                    rom_move=rom_move,
+                    total_games=total_games,
+                    logger=self.logger,
                 )
-
-                # If there are additional files to move/unzip, do that now
-                if "subchannels" in self.platform_config:
-                    for subchannel in self.platform_config["subchannels"]:
-
-                        add_full_dir = os.path.join(
-                            self.raw_dir, f"{self.platform} {subchannel}"
-                        )
-                        add_file = os.path.join(add_full_dir, rom_file)
-                        if os.path.exists(add_file):
-
-                            # These files should *always* be unzipped
-                            move_file_success, moved_files = self.move_file(
-                                add_file, game=game, out_dir=out_dir, unzip=True
-                            )
-
-                            if not move_file_success:
-                                self.logger.warning(
-                                    centred_string(
-                                        f"{rom_file} {subchannel} not found in raw directory, skipping",
-                                        total_length=self.log_line_length,
-                                    )
-                                )
-                            else:
-                                self.logger.info(
-                                    centred_string(
-                                        f"[{game_no + 1}/{total_games}]: Moved {rom_file} ({subchannel})",
-                                        total_length=self.log_line_length,
-                                    )
-                                )
-                                out_files.extend(moved_files)
-
-                # Add these to the multi-disc dictionary, if needed
-                if rom_dict[rom]["multi_disc"] and self.handle_multi_discs:
-                    all_multi_discs[disc_free_name]["out_files"].extend(out_files)
-                    all_multi_discs[disc_free_name]["modified"] = True
-
-                # Update and save the cache
-                self.cache_update(
-                    game=game,
-                    rom=rom,
-                    files=out_files,
-                    out_dir=out_base_dir,
-                    rom_dict=rom_dict,
+                self.update_from_rom_move(
+                    rom_move=rom_move,
+                    move_result=move_result,
+                    all_multi_discs=all_multi_discs,
+                    roms_moved=roms_moved,
                 )
-                self.save_cache()
-
-                roms_moved.append(rom_file)
 
         # Handle the multi-disc files by generating m3u playlists
         if self.handle_multi_discs and len(all_multi_discs) > 0:
@@ -722,7 +520,7 @@ class ROMMover:
                         files=[m3u_file_name],
                         out_dir=all_multi_discs[multi_disc]["game_dir_name"],
                     )
-                    self.save_cache()
+                    self.checkpoint_cache()
 
                     self.logger.info(
                         centred_string(
@@ -733,6 +531,428 @@ class ROMMover:
 
         return roms_moved
 
+    def get_rom_move(
+            self,
+            game_no,
+            game,
+            rom,
+            rom_dict,
+    ):
+        """Figure out where a ROM is going, and whether it needs patching
+
+        Args:
+            game_no: Index of the game, for logging
+            game: Game name
+            rom: ROM name
+            rom_dict: Dictionary of ROM properties for the game
+        """
+
+        # Because the filename can change, keep it here
+        full_name = copy.deepcopy(rom_dict[rom]["full_name"])
+        rom_file = copy.deepcopy(rom_dict[rom]["download_name"])
+        short_name = copy.deepcopy(rom_dict[rom]["short_name"])
+
+        # If we're either a superset or a compilation, then
+        # inherit a game and directory name from the ROM
+        # instead. This will avoid multiple downloads in
+        # some circumstances
+        is_superset = rom_dict[rom].get("is_superset", False)
+        is_compilation = rom_dict[rom].get("is_compilation", False)
+
+        # Pull out a clean directory name and disc-free name in case we need it
+        if is_superset or is_compilation:
+            dir_name = get_directory_name(full_name)
+            game = copy.deepcopy(short_name)
+        else:
+            dir_name = str(copy.deepcopy(rom_dict[rom]["dir_name"]))
+
+        # Keep track of what this original directory name is, since we might need
+        # it
+        dir_name_original = copy.deepcopy(dir_name)
+
+        disc_free_name = str(copy.deepcopy(rom_dict[rom]["disc_free_name"]))
+
+        cache_entry = self.get_cache_entry(game=game, rom=rom)
+
+        # Figure out if we're patching the ROM, based on whether it's already been patched
+        # and if there's a patch file
+        rom_patched = cache_entry.get("patched", False)
+        patch_url = rom_dict.get(rom, {}).get("patch_file", "")
+
+        to_patch_rom = False
+        if not rom_patched and patch_url != "" and self.run_rompatcher:
+            to_patch_rom = True
+
+        # Keep track if we're expecting a patched file
+        expecting_patched_rom = False
+        if patch_url != "" and self.run_rompatcher:
+            expecting_patched_rom = True
+
+        # Keep track of absolute directories and relative directories to the
+        # platform itself, for cache reasons
+
+        # Decide whether to use platform name or ES-friendly name
+        if (
+                self.config.get("rommover", {}).get("use_es_friendly_names", False)
+                and self.platform_config.get("es_friendly_name", None) is not None
+        ):
+            base_dir = self.platform_config.get("es_friendly_name")
+        else:
+            base_dir = self.platform
+
+        # Build output path
+        if self.separate_directories:
+            out_dir = os.path.join(self.rom_dir, base_dir, dir_name)
+            out_base_dir = copy.deepcopy(dir_name)
+        else:
+            out_dir = os.path.join(self.rom_dir, base_dir)
+            out_base_dir = ""
+
+        # If we're handling multi-disc files, and we have a multi-disc file, then make the output
+        # directory a hidden one
+        multi_disc = None
+        if rom_dict[rom]["multi_disc"] and self.handle_multi_discs:
+
+            m3u_out_dir = copy.deepcopy(out_dir)
+            out_dir = os.path.join(str(out_dir), f".{disc_free_name}")
+
+            # Also update the dir name, since we use that later
+            game_dir_name = copy.deepcopy(out_base_dir)
+            out_base_dir = os.path.join(out_base_dir, f".{disc_free_name}")
+
+            multi_disc = {
+                "m3u_out_dir": m3u_out_dir,
+                "game": dir_name_original,
+                "game_dir_name": game_dir_name,
+                "relative_dir": f".{disc_free_name}",
+                "out_files": [],
+                "modified": False,
+            }
+
+        rom_move = {
+            "game_no": game_no,
+            "game": game,
+            "rom": rom,
+            "rom_dict": rom_dict,
+            "rom_file": rom_file,
+            "disc_free_name": disc_free_name,
+            "cache_entry": cache_entry,
+            "patch_url": patch_url,
+            "to_patch_rom": to_patch_rom,
+            "expecting_patched_rom": expecting_patched_rom,
+            "out_dir": out_dir,
+            "out_base_dir": out_base_dir,
+            "multi_disc": multi_disc,
+        }
+
+        return rom_move
+
+    def move_rom(
+            self,
+            rom_move,
+            total_games,
+            logger,
+    ):
+        """Place a single ROM, patching/compressing/unzipping as needed
+
+        This doesn't touch the cache, so can safely be run in a thread. Returns
+        a dictionary of what happened, for the cache to be updated later
+
+        Args:
+            rom_move: Dictionary of where the ROM is going, from get_rom_move
+            total_games: Total number of games, for logging
+            logger: Logger to write to
+        """
+
+        game_no = rom_move["game_no"]
+        game = rom_move["game"]
+        rom = rom_move["rom"]
+        rom_dict = rom_move["rom_dict"]
+        rom_file = rom_move["rom_file"]
+        patch_url = rom_move["patch_url"]
+        to_patch_rom = rom_move["to_patch_rom"]
+        expecting_patched_rom = rom_move["expecting_patched_rom"]
+        out_dir = rom_move["out_dir"]
+
+        cache_mod_time = rom_move["cache_entry"].get("file_mod_time", 0)
+
+        move_result = {
+            "status": None,
+            "logger": logger,
+            "final_file_name": None,
+            "short_out_files": [],
+            "out_files": [],
+        }
+
+        # Loop over here, since the extensions might change. Search specifically by the filename
+        # to make things quicker
+        rom_file_no_ext = os.path.splitext(rom_file)[0]
+        out_files = glob.glob(os.path.join(str(out_dir), f"{rom_file_no_ext}*"))
+        short_out_files = [os.path.basename(o) for o in out_files]
+
+        final_file_exists = False
+        final_file_name = None
+
+        # First, search for an exact match, but only if we're not unzipping
+        if not self.unzip and not to_patch_rom:
+            for o in short_out_files:
+
+                if final_file_exists:
+                    continue
+
+                if o == rom_file:
+                    final_file_exists = True
+                    final_file_name = os.path.basename(o)
+
+        # If we have unzip and compress set on, then we need to
+        # figure out which we're actually doing
+        unzip = copy.deepcopy(self.unzip)
+        compress = copy.deepcopy(self.compress)
+
+        if self.unzip and self.compress:
+
+            raw_file = os.path.join(self.raw_dir, self.platform, rom_file)
+
+            compress_suitable = self.check_compress_suitable(raw_file)
+            if compress_suitable:
+                unzip = False
+                compress = True
+            else:
+                unzip = True
+                compress = False
+
+        # If we're unzipping (and potentially patching), then pull the expected files out here and check again
+        if unzip or expecting_patched_rom:
+            final_file_exists, final_file_name = self.check_files_exist(
+                rom=rom_file,
+                files=short_out_files,
+                file_ext_key="file_exts",
+                patched_rom=expecting_patched_rom,
+            )
+
+        # If we're compressing, then pull the expected files out here and check again
+        if compress:
+            final_file_exists, final_file_name = self.check_files_exist(
+                rom=rom_file,
+                files=short_out_files,
+                file_ext_key="compress_file_exts",
+                patched_rom=expecting_patched_rom,
+            )
+
+        # Now check if we've got a match in all but case. Period here is important to avoid
+        # accidentally removing patched files
+        remove_case_insensitive_matches(file_to_match=rom_file_no_ext,
+                                        pattern=f"{rom_file_no_ext}.*",
+                                        path=str(out_dir),
+                                        )
+
+        # Skip if the file modification time matches the one in the cache, and the
+        # destination file exists
+        if (
+                rom_dict[rom]["file_mod_time"] == cache_mod_time
+                and final_file_exists
+        ):
+            logger.info(
+                centred_string(
+                    f"[{game_no + 1}/{total_games}]: No updates for {rom}, skipping",
+                    total_length=self.log_line_length,
+                )
+            )
+
+            move_result["status"] = "unchanged"
+            move_result["final_file_name"] = final_file_name
+            move_result["short_out_files"] = short_out_files
+            return move_result
+
+        # We need to keep track of output files
+        out_files = []
+
+        # If we're patching ROMs, then do that here
+        if to_patch_rom:
+
+            rom_patch_file = os.path.join(self.raw_dir, self.platform, rom_file)
+
+            patcher = ROMPatcher(
+                platform=self.platform,
+                config=self.config,
+                platform_config=self.platform_config,
+                regex_config=self.regex_config,
+                logger=logger,
+                log_line_length=self.log_line_length,
+            )
+
+            full_rom = patcher.run(
+                file=str(rom_patch_file),
+                patch_url=patch_url,
+                rom_dict=rom_dict[rom],
+            )
+
+            unzip = False
+            patched = True
+
+        else:
+            full_dir = os.path.join(self.raw_dir, self.platform)
+            full_rom = os.path.join(str(full_dir), rom_file)
+
+            patched = False
+
+        # If we're compressing ROMs, do that here
+        if compress:
+
+            if to_patch_rom:
+                raise NotImplementedError(
+                    "Currently cannot handle compressing of patched files"
+                )
+
+            rom_compress_file = os.path.join(
+                self.raw_dir, self.platform, rom_file
+            )
+
+            full_rom = self.compress_file(
+                rom_compress_file,
+                logger=logger,
+            )
+
+        # Log whether we've patched or not
+        rom_dict[rom]["patched"] = patched
+
+        # Move the main file. Don't delete folders as the game and the out directory
+        # don't necessarily match
+        move_file_success, moved_files = self.move_file(
+            full_rom, game=game, out_dir=out_dir, unzip=unzip
+        )
+
+        if not move_file_success:
+            logger.warning(
+                centred_string(
+                    f"[{game_no + 1}/{total_games}]: {rom_file} not found in raw directory, skipping",
+                    total_length=self.log_line_length,
+                )
+            )
+            move_result["status"] = "missing"
+            return move_result
+
+        out_files.extend(moved_files)
+
+        logger.info(
+            centred_string(
+                f"[{game_no + 1}/{total_games}]: Moved {rom_file}",
+                total_length=self.log_line_length,
+            )
+        )
+
+        # If there are additional files to move/unzip, do that now
+        if "subchannels" in self.platform_config:
+            for subchannel in self.platform_config["subchannels"]:
+
+                add_full_dir = os.path.join(
+                    self.raw_dir, f"{self.platform} {subchannel}"
+                )
+                add_file = os.path.join(add_full_dir, rom_file)
+                if os.path.exists(add_file):
+
+                    # These files should *always* be unzipped
+                    move_file_success, moved_files = self.move_file(
+                        add_file, game=game, out_dir=out_dir, unzip=True
+                    )
+
+                    if not move_file_success:
+                        logger.warning(
+                            centred_string(
+                                f"{rom_file} {subchannel} not found in raw directory, skipping",
+                                total_length=self.log_line_length,
+                            )
+                        )
+                    else:
+                        logger.info(
+                            centred_string(
+                                f"[{game_no + 1}/{total_games}]: Moved {rom_file} ({subchannel})",
+                                total_length=self.log_line_length,
+                            )
+                        )
+                        out_files.extend(moved_files)
+
+        move_result["status"] = "moved"
+        move_result["out_files"] = out_files
+
+        return move_result
+
+    def update_from_rom_move(
+            self,
+            rom_move,
+            move_result,
+            all_multi_discs,
+            roms_moved,
+    ):
+        """Update the cache and multi-disc tracking after a ROM has been placed
+
+        Args:
+            rom_move: Dictionary of where the ROM is going, from get_rom_move
+            move_result: Dictionary of what happened, from move_rom
+            all_multi_discs: Dictionary of multi-disc info, to be updated
+            roms_moved: List of ROMs moved, to be updated
+        """
+
+        game = rom_move["game"]
+        rom = rom_move["rom"]
+        rom_dict = rom_move["rom_dict"]
+        disc_free_name = rom_move["disc_free_name"]
+        is_multi_disc = rom_move["multi_disc"] is not None
+
+        if move_result["status"] == "unchanged":
+
+            # Make sure we keep track of multi-disc stuff, even if we're not necessarily changing it
+            final_file_name = move_result["final_file_name"]
+            if is_multi_disc:
+                if isinstance(final_file_name, str):
+                    final_file_name = [final_file_name]
+                    all_multi_discs[disc_free_name]["out_files"].extend(
+                        final_file_name
+                    )
+
+            # Gracefully update the cache from earlier versions
+            cache_files = rom_move["cache_entry"].get("all_files", [])
+
+            if len(cache_files) == 0:
+
+                # Log whether we've patched or not
+                rom_dict[rom]["patched"] = rom_move["expecting_patched_rom"]
+
+                # Update the cache
+                self.cache_update(
+                    game=game,
+                    rom=rom,
+                    files=move_result["short_out_files"],
+                    out_dir=rom_move["out_base_dir"],
+                    rom_dict=rom_dict,
+                )
+
+            return False
+
+        if move_result["status"] != "moved":
+            return False
+
+        out_files = move_result["out_files"]
+
+        # Add these to the multi-disc dictionary, if needed
+        if is_multi_disc:
+            all_multi_discs[disc_free_name]["out_files"].extend(out_files)
+            all_multi_discs[disc_free_name]["modified"] = True
+
+        # Update and journal the cache
+        self.cache_update(
+            game=game,
+            rom=rom,
+            files=out_files,
+            out_dir=rom_move["out_base_dir"],
+            rom_dict=rom_dict,
+        )
+        self.checkpoint_cache()
+
+        roms_moved.append(rom_move["rom_file"])
+
+        return True
+
     def check_files_exist(
             self,
             rom,
@@ -824,12 +1044,12 @@ class ROMMover:
         if delete_folder and os.path.exists(out_dir):
             shutil.rmtree(out_dir)
 
-        if not os.path.exists(out_dir):
-            os.makedirs(out_dir)
+        # This might be running in a thread, so don't fail if another thread has made the directory
+        os.makedirs(out_dir, exist_ok=True)
         out_dir = str(out_dir)
 
         if unzip:
-            unzipped_files = unzip_file(zip_file_name, out_dir)
+            unzipped_files = unzip_file(zip_file_name, out_dir, crc_cache=self.crc_cache)
             moved_files.extend(unzipped_files)
         else:
             short_zip_file = os.path.split(zip_file_name)[-1]
@@ -847,19 +1067,25 @@ class ROMMover:
     def compress_file(
             self,
             rom,
+            logger=None,
     ):
         """Compress a file
 
         Args:
             rom: ROM name
+            logger: Logger to pass to ROMCompressor. Defaults to None, which
+                will use the ROMMover logger
         """
 
+        if logger is None:
+            logger = self.logger
+
         rc = ROMCompressor(
             platform=self.platform,
             config=self.config,
             compress_method=self.compress_method,
             compress_method_path=self.compress_method_path,
-            logger=self.logger,
+            logger=logger,
             log_line_length=self.log_line_length,
             log_line_sep=self.log_line_sep,
         )
@@ -886,21 +1112,11 @@ class ROMMover:
             rom_dict: Dictionary of ROM properties
         """
 
-        # If we don't have dictionaries already set, create
-        if self.platform not in self.cache:
-            self.cache[self.platform] = {}
-
-        if game not in self.cache[self.platform]:
-            self.cache[self.platform][game] = {}
-
-        if not self.cache[self.platform][game]:
-            self.cache[self.platform][game] = {}
-
         # Include info about whether the ROM has been patched or not,
         # the patch file, and all the files we've included and where
         # we've put em
 
-        self.cache[self.platform][game][rom] = {
+        entry = {
             "file_mod_time": rom_dict[rom]["file_mod_time"],
             "patch_file": rom_dict[rom]["patch_file"],
             "patched": rom_dict[rom]["patched"],
@@ -908,6 +1124,8 @@ class ROMMover:
             "all_files": files,
         }
 
+        self.set_cache_entry(game=game, rom=rom, entry=entry)
+
     def cache_update_multi_disc(
             self,
             game,
@@ -924,25 +1142,130 @@ class ROMMover:
             out_dir: Output directory for files, relative to [rom_dir]/[platform]
         """
 
+        # Include just info on where the m3u file is, and that it's a multi-disc file
+        entry = {
+            "multi_disc": True,
+            "output_directory": out_dir,
+            "all_files": files,
+        }
+
+        self.set_cache_entry(game=game, rom=m3u_name, entry=entry)
+
+    def get_cache_entry(
+            self,
+            game,
+            rom,
+    ):
+        """Get the cache entry for a ROM, or an empty dictionary if it's not cached
+
+        Args:
+            game: Game name
+            rom: ROM name in the cache
+        """
+
+        if self.sqlite_cache is not None:
+            entry = self.sqlite_cache.get_entry(game, rom)
+            if entry is None:
+                entry = {}
+            return entry
+
+        return self.cache.get(self.platform, {}).get(game, {}).get(rom, {})
+
+    def set_cache_entry(
+            self,
+            game,
+            rom,
+            entry,
+    ):
+        """Add or replace the cache entry for a ROM
+
+        For the SQLite backend this is a single-row write. Otherwise, the in-memory
+        cache is updated and the change journaled
+
+        Args:
+            game: Game name
+            rom: ROM name in the cache
+            entry: Cache entry
+        """
+
+        if self.sqlite_cache is not None:
+            self.sqlite_cache.set_entry(game, rom, entry)
+            return True
+
         # If we don't have dictionaries already set, create
         if self.platform not in self.cache:
             self.cache[self.platform] = {}
 
-        if game not in self.cache[self.platform]:
+        if not self.cache[self.platform].get(game, {}):
             self.cache[self.platform][game] = {}
 
-        if not self.cache[self.platform][game]:
-            self.cache[self.platform][game] = {}
+        self.cache[self.platform][game][rom] = entry
 
-        # Include just info on where the m3u file is, and that it's a multi-disc file
-        self.cache[self.platform][game][m3u_name] = {
-            "multi_disc": True,
-            "output_directory": out_dir,
-            "all_files": files,
-        }
+        self.journal_cache_entry(game=game, rom=rom)
+
+        return True
+
+    def journal_cache_entry(
+            self,
+            game,
+            rom,
+    ):
+        """Append a cache entry to the journal, so it's safe if we crash before the next save
+
+        Args:
+            game: Game name
+            rom: ROM name in the cache
+        """
+
+        append_to_cache_journal(
+            self.cache_file,
+            keys=[self.platform, game, rom],
+            value=self.cache[self.platform][game][rom],
+        )
+        self.n_journal_entries += 1
+
+    def checkpoint_cache(self):
+        """Write the cache out to the main file if enough updates have been journaled"""
+
+        # The SQLite backend writes as it goes
+        if self.sqlite_cache is not None:
+            return True
+
+        if self.n_journal_entries >= self.cache_compact_every:
+            self.save_cache()
+
+    def load_crc_cache(self):
+        """Load the CRC cache for unzipped files, starting fresh if it doesn't exist or is broken"""
+
+        if not os.path.exists(self.crc_cache_file):
+            return {}
+
+        try:
+            crc_cache = load_json(self.crc_cache_file)
+        except ValueError:
+            crc_cache = {}
+
+        return crc_cache
+
+    def save_crc_cache(self):
+        """Save out the CRC cache for unzipped files, dropping any that no longer exist"""
+
+        if self.crc_cache is None:
+            return False
+
+        # Files can be removed by ROMCleaner or moved around, so only keep what's still there
+        crc_cache = {f: self.crc_cache[f] for f in self.crc_cache if os.path.isfile(f)}
+
+        save_json(crc_cache, self.crc_cache_file)
+
+        return True
 
     def save_cache(self):
-        """Save out the cache file"""
+        """Save out the cache file, and clear the journal"""
+
+        # The SQLite backend writes as it goes
+        if self.sqlite_cache is not None:
+            return True
 
-        cache = copy.deepcopy(self.cache)
-        save_json(cache, self.cache_file, sort_key=self.platform)
+        save_json_cache(self.cache, self.cache_file, sort_key=self.platform)
+        self.n_journal_entries = 0
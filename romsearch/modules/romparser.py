@@ -11,9 +11,12 @@ from ..util import (
     get_file_time,
     load_yml,
     load_json,
-    match_retool_search_terms,
+    RetoolIndex,
+    ROMRecord,
     get_short_name,
     get_sanitized_version,
+    get_compiled_regex_config,
+    RAIndex,
 )
 
 DICT_DEFAULT_VALS = {"bool": False, "str": "", "list": []}
@@ -106,23 +109,6 @@ def apply_filters(
     return file_dict
 
 
-def is_ra_subset(name):
-    """Check if a name is a RetroAchievements subset
-
-    Args:
-        name (str): Name to check
-    """
-
-    match_pattern = "\\[Subset.*\\]"
-
-    match = find_pattern(match_pattern, name)
-    is_subset = False
-    if match is not None:
-        is_subset = True
-
-    return is_subset
-
-
 def check_match(i, j, checks_passed=None):
     """Check if two bools/strings/lists match
 
@@ -195,12 +181,17 @@ class ROMParser:
         game,
         dat=None,
         retool=None,
+        retool_index=None,
         ra_hashes=None,
+        local_ra_hashes=None,
+        ra_index=None,
+        parsed_names=None,
         config_file=None,
         config=None,
         platform_config=None,
         default_config=None,
         regex_config=None,
+        compiled_regex_config=None,
         logger=None,
         log_line_sep="=",
         log_line_length=100,
@@ -214,12 +205,22 @@ class ROMParser:
             game (str): Game name
             dat (dict): Parsed dat dictionary. Defaults to None, which will try to load the dat file if it exists
             retool (dict): Retool dictionary. Defaults to None, which will try to load the file if it exists
+            retool_index (RetoolIndex): Pre-built index of the retool variants, which can be shared between parsers.
+                Defaults to None, which will build it from retool when needed
             ra_hashes (dict): RA hash dictionary. Defaults to None, which will try to load the file if it exists
+            local_ra_hashes (dict): Dictionary of RA-style hashes calculated for files in the raw directory, of
+                {file name: [md5, ...]}. Defaults to None, which won't use any local hashes
+            ra_index (RAIndex): Pre-built index of the RA hashes, which can be shared between parsers.
+                Defaults to None, which will build it from ra_hashes when needed
+            parsed_names (dict): Store of parsed filenames, which can be shared so each name is only parsed once.
+                Defaults to None, which will parse every name
             config_file (str, optional): path to config file. Defaults to None.
             config (dict, optional): configuration dictionary. Defaults to None.
             platform_config (dict, optional): platform configuration dictionary. Defaults to None.
             default_config (dict, optional): default configuration dictionary. Defaults to None.
             regex_config (dict, optional): regex configuration dictionary. Defaults to None.
+            compiled_regex_config (CompiledRegexConfig, optional): pre-compiled regex configuration. Defaults
+                to None, which will compile from regex_config and default_config
             logger (logging.Logger, optional): logger instance. Defaults to None.
             log_line_length (int, optional): Line length of log. Defaults to 100
 
@@ -270,6 +271,14 @@ class ROMParser:
             regex_config = load_yml(regex_file)
         self.regex_config = regex_config
 
+        # Compiling the regex is expensive, so ideally this is passed in
+        if compiled_regex_config is None:
+            compiled_regex_config = get_compiled_regex_config(
+                regex_config=self.regex_config,
+                default_config=self.default_config,
+            )
+        self.compiled_regex_config = compiled_regex_config
+
         if platform_config is None:
             platform_config_file = os.path.join(
                 mod_dir, "configs", "platforms", f"{platform}.yml"
@@ -301,6 +310,7 @@ class ROMParser:
 
         # If we're using the retool file, pull it out here
         self.retool = retool
+        self.retool_index = retool_index
         if self.use_retool and self.retool is None:
             dat_dir = self.config.get("dirs", {}).get("parsed_dat_dir", None)
             if dat_dir is None:
@@ -312,6 +322,7 @@ class ROMParser:
 
         # If we're using the RA hashes, pull it out here
         self.ra_hashes = ra_hashes
+        self.ra_index = ra_index
         self.ra_dict = None
         if self.use_ra_hashes and self.ra_hashes is None:
             ra_hash_dir = self.config.get("dirs", {}).get("ra_hash_dir", None)
@@ -323,6 +334,12 @@ class ROMParser:
 
         self.hash_method = self.platform_config.get("ra_hash_method", None)
 
+        # Hashes for files we've already got, if we have them
+        self.local_ra_hashes = local_ra_hashes
+
+        # Filenames we've already parsed, keyed by name and title position
+        self.parsed_names = parsed_names
+
         self.log_line_sep = log_line_sep
         self.log_line_length = log_line_length
 
@@ -330,9 +347,12 @@ class ROMParser:
         self,
         files,
     ):
-        """Run the ROM parser"""
+        """Run the ROM parser
+
+        The files aren't edited, each gets its own copy that's filled in by the parsing
+        """
 
-        game_dict = copy.deepcopy(files)
+        game_dict = {}
 
         self.logger.debug(f"{self.log_line_sep * self.log_line_length}")
         self.logger.debug(
@@ -351,7 +371,9 @@ class ROMParser:
                 file_dict=copy.deepcopy(files[f]),
                 title_pos=title_pos,
             )
-            game_dict[f].update(f_parsed)
+
+            # Store as a compact record, since there can be a lot of these
+            game_dict[f] = ROMRecord(f_parsed)
 
         return game_dict
 
@@ -373,7 +395,7 @@ class ROMParser:
             file_dict = {}
 
         if self.use_filename:
-            file_dict = self.parse_filename(
+            file_dict = self.get_parsed_filename(
                 f=f,
                 file_dict=file_dict,
                 title_pos=title_pos,
@@ -521,7 +543,7 @@ class ROMParser:
         if file_dict is None:
             file_dict = {}
 
-        if self.retool is None:
+        if self.retool is None and self.retool_index is None:
             self.logger.warning(f"{self.log_line_sep * self.log_line_length}")
             self.logger.warning(
                 centred_string(
@@ -532,41 +554,26 @@ class ROMParser:
             self.logger.warning(f"{self.log_line_sep * self.log_line_length}")
             return file_dict
 
-        # Loop over the variants, see if we get a match
-        found_cat = False
-        for retool_dict in self.retool:
-
-            if found_cat:
-                continue
+        # Look up categories for any variants that match
+        file_cats = self.get_retool_index().get_categories(
+            full_name=file_dict["full_name"],
+            short_name=file_dict["short_name"],
+            region_free_name=file_dict["region_free_name"],
+        )
+        for file_cat in file_cats:
+            file_dict[file_cat] = True
 
-            # If we don't have titles within the dupe dict, skip
-            if "titles" not in retool_dict:
-                continue
+        return file_dict
 
-            # Match properly given search terms
-            full_name = copy.deepcopy(file_dict["full_name"])
-            short_name = copy.deepcopy(file_dict["short_name"])
-            region_free_name = copy.deepcopy(file_dict["region_free_name"])
-
-            for t in retool_dict["titles"]:
-                search_term = t["searchTerm"]
-                match_type = t.get("nameType", None)
-
-                found_retool_variant = match_retool_search_terms(
-                    full_name=full_name,
-                    search_term=search_term,
-                    short_name=short_name,
-                    region_free_name=region_free_name,
-                    match_type=match_type,
-                )
+    def get_retool_index(
+        self,
+    ):
+        """Get the retool variant index, building it if it hasn't been passed in"""
 
-                if found_retool_variant:
-                    retool_cats = retool_dict.get("categories", [])
-                    for retool_cat in retool_cats:
-                        file_cat = retool_cat.lower().replace(" ", "_")
-                        file_dict[file_cat] = True
+        if self.retool_index is None:
+            self.retool_index = RetoolIndex(retool=self.retool)
 
-        return file_dict
+        return self.retool_index
 
     def parse_dat(
         self,
@@ -583,7 +590,7 @@ class ROMParser:
         if file_dict is None:
             file_dict = {}
 
-        f = copy.deepcopy(file_dict.get("original_name", f))
+        f = file_dict.get("original_name", f)
 
         if self.dat is None:
             self.logger.warning(f"{self.log_line_sep * self.log_line_length}")
@@ -694,6 +701,16 @@ class ROMParser:
         if self.ra_dict is None:
             self.ra_dict = self.get_ra_dict()
 
+        # If we've hashed the file ourselves, then check for an exact match first
+        has_cheevos, patch_file = self.get_local_hash_match(
+            file_dict=file_dict,
+        )
+
+        if has_cheevos:
+            file_dict["has_cheevos"] = has_cheevos
+            file_dict["patch_file"] = patch_file
+            return file_dict
+
         # Get the potential RA match by name (this won't include potentially patched ROMs)
         has_cheevos, patch_file = self.get_ra_match(
             file_dict=file_dict,
@@ -729,66 +746,31 @@ class ROMParser:
 
         return file_dict
 
-    def get_ra_dict(
+    def get_ra_index(
         self,
     ):
-        """Get a big dictionary of RA hashes with useful info"""
-
-        # Pull out the particular key we need
-        if self.hash_method == "md5":
-            key = "MD5"
-        elif self.hash_method == "custom":
-            key = "Name"
-        else:
-            raise ValueError(f"Cannot currently handle {self.hash_method} hash method")
-
-        # Because of inconsistencies between naming schemes, just pull a huge dictionary out here rather than try
-        # to be clever
-        ra_dict = {}
-
-        for r in self.ra_hashes:
-            for h in self.ra_hashes[r]["Hashes"]:
-
-                # If the RA list is a subset, then skip
-                if is_ra_subset(r):
-                    continue
-
-                # Use the md5 as the unique key, and then name as the thing we'll match to.
-                # Ensure we lowercase the hash, just to be sure
-                md5 = copy.deepcopy(h["MD5"].lower())
-                id_name = copy.deepcopy(h[key])
-
-                # If for some weird reason there's no ID name, just skip
-                if id_name is None:
-                    continue
+        """Get the RA hash index, building it if it hasn't been passed in"""
 
-                # Also just pull out the ROM name, since we need that later
-                rom_name = copy.deepcopy(h["Name"])
-                rom_name = rom_name.strip()
+        if self.ra_index is None:
 
-                # Ensure we also lowercase the hash here, if we need to
-                if key in ["MD5"]:
-                    id_name = id_name.lower()
+            ra_hashes = self.ra_hashes
+            if ra_hashes is None:
+                ra_hashes = {}
 
-                # If we're dealing with names, there might
-                # be file extensions to strip
-                if key in ["Name"]:
-                    for ext in self.ra_file_exts:
-                        if id_name.endswith(ext):
-                            id_name = id_name.rstrip(ext)
+            self.ra_index = RAIndex(
+                ra_hashes=ra_hashes,
+                hash_method=self.hash_method,
+                ra_file_exts=self.ra_file_exts,
+            )
 
-                # FIXME: Here as a catch-all, hopefully won't be a problem
-                if md5 in ra_dict:
-                    raise ValueError(f"Hash {md5} multiply defined")
+        return self.ra_index
 
-                ra_dict[md5] = {
-                    "name": id_name,
-                    "full_name": rom_name,
-                    "dir_name": rom_name.split(" (")[0],
-                    "patch_url": h["PatchUrl"],
-                }
+    def get_ra_dict(
+        self,
+    ):
+        """Get a big dictionary of RA hashes with useful info, keyed by md5"""
 
-        return ra_dict
+        return self.get_ra_index().entries
 
     def get_ra_match(
         self,
@@ -828,11 +810,46 @@ class ROMParser:
         if len(self.ra_dict) == 0:
             return has_cheevos, patch_file
 
+        # Look up by name, rather than checking every hash
+        ra_index = self.get_ra_index()
         for m in match_list:
-            for r in self.ra_dict:
-                if m == self.ra_dict[r]["name"]:
-                    has_cheevos = True
-                    patch_file = copy.deepcopy(self.ra_dict[r]["patch_url"])
+            for r in ra_index.get_by_name(m):
+                has_cheevos = True
+                patch_file = self.ra_dict[r]["patch_url"]
+
+        if patch_file is None:
+            patch_file = ""
+
+        return has_cheevos, patch_file
+
+    def get_local_hash_match(
+        self,
+        file_dict,
+    ):
+        """Match a file to RetroAchievements supported files, using hashes of the file itself
+
+        Args:
+            file_dict (dict): Dictionary of ROM descriptions
+        """
+
+        has_cheevos = False
+        patch_file = ""
+
+        if self.local_ra_hashes is None:
+            return has_cheevos, patch_file
+
+        local_hashes = self.local_ra_hashes.get(file_dict.get("original_name", ""), [])
+        if len(local_hashes) == 0:
+            return has_cheevos, patch_file
+
+        if self.ra_dict is None:
+            self.ra_dict = self.get_ra_dict()
+
+        for h in local_hashes:
+            h = h.lower()
+            if h in self.ra_dict:
+                has_cheevos = True
+                patch_file = self.ra_dict[h]["patch_url"]
 
         if patch_file is None:
             patch_file = ""
@@ -863,7 +880,9 @@ class ROMParser:
 
         multiple_patch_files_found = False
 
-        for r in self.ra_dict:
+        # We need the names up to the first bracket to match, so only look at those
+        ra_index = self.get_ra_index()
+        for r in ra_index.get_by_dir_name(file_dict["dir_name"]):
 
             # If we want patch files, and we don't have them, skip
             if want_patched_files and self.ra_dict[r]["patch_url"] is None:
@@ -882,88 +901,87 @@ class ROMParser:
                 if "Translation" in self.ra_dict[r]["patch_url"]:
                     continue
 
-            # Start by ensuring the names up to the first bracket at least match
-            if file_dict["dir_name"] == self.ra_dict[r]["dir_name"]:
-
-                # Make sure we're not parsing this every time
-                r_is_parsed = self.ra_dict[r].get("is_parsed", False)
-                if not r_is_parsed:
-                    r_parsed = self.parse_filename(f=self.ra_dict[r]["full_name"])
-                    r_parsed["is_parsed"] = True
-                    self.ra_dict[r].update(r_parsed)
-                r_parsed = self.ra_dict.get(r)
-
-                # If we're a superset, then ensure the short names also match, since
-                # we need to be more stringent
-                is_superset = file_dict.get("is_superset", False)
-                ra_dict_short_name = get_short_name(
+            # Make sure we're not parsing this every time
+            r_is_parsed = self.ra_dict[r].get("is_parsed", False)
+            if not r_is_parsed:
+                r_parsed = self.parse_filename(f=self.ra_dict[r]["full_name"])
+                r_parsed["short_name"] = get_short_name(
                     self.ra_dict[r]["full_name"],
-                    regex_config=self.regex_config,
-                    default_config=self.default_config,
+                    compiled_regex_config=self.compiled_regex_config,
                 )
-                if is_superset and not file_dict["short_name"] == ra_dict_short_name:
-                    continue
-
-                # Force some version info in here, if the RA name doesn't have it
-                if r_parsed["version_no"] == "" and file_dict["version_no"] != "":
-                    f_sanitized = get_sanitized_version(file_dict["version_no"])
-                    if Version(f_sanitized) == Version("1"):
-                        r_parsed["version_no"] = copy.deepcopy(file_dict["version_no"])
+                r_parsed["is_parsed"] = True
+                self.ra_dict[r].update(r_parsed)
+            r_parsed = self.ra_dict.get(r)
+
+            # If we're a superset, then ensure the short names also match, since
+            # we need to be more stringent
+            is_superset = file_dict.get("is_superset", False)
+            if is_superset and not file_dict["short_name"] == r_parsed["short_name"]:
+                continue
 
-                # Now, make sure all the useful checks pass
-                ra_checks_passed = True
-                for check in self.ra_patch_checks:
+            # Force some version info in here, if the RA name doesn't have it. Work on
+            # a copy, since the index is shared between games
+            if r_parsed["version_no"] == "" and file_dict["version_no"] != "":
+                r_parsed = copy.copy(r_parsed)
+                f_sanitized = get_sanitized_version(file_dict["version_no"])
+                if Version(f_sanitized) == Version("1"):
+                    r_parsed["version_no"] = file_dict["version_no"]
 
-                    # If we've already failed, then just skip
-                    if not ra_checks_passed:
-                        continue
+            # Now, make sure all the useful checks pass
+            ra_checks_passed = True
+            for check in self.ra_patch_checks:
 
-                    ra_checks_passed = check_match(
-                        file_dict[check],
-                        r_parsed[check],
-                        checks_passed=ra_checks_passed,
-                    )
+                # If we've already failed, then just skip
+                if not ra_checks_passed:
+                    continue
 
-                    # After this first pass, also see if any of the regex checks are grouped,
-                    # and double-check the sublevel below. This is because we could have e.g.
-                    # mismatched modern types (like a GameCube version vs a Wii U Virtual Console
-                    # version), which inevitably won't match hashes
-                    if ra_checks_passed:
-                        if check not in self.regex_config:
-                            for r_c in self.regex_config:
-
-                                if not ra_checks_passed:
-                                    continue
-
-                                r_c_group = self.regex_config[r_c].get("group", None)
-                                if r_c_group == check:
-                                    ra_checks_passed = check_match(
-                                        file_dict[r_c],
-                                        r_parsed[r_c],
-                                        checks_passed=ra_checks_passed,
-                                    )
+                ra_checks_passed = check_match(
+                    file_dict[check],
+                    r_parsed[check],
+                    checks_passed=ra_checks_passed,
+                )
 
+                # After this first pass, also see if any of the regex checks are grouped,
+                # and double-check the sublevel below. This is because we could have e.g.
+                # mismatched modern types (like a GameCube version vs a Wii U Virtual Console
+                # version), which inevitably won't match hashes
                 if ra_checks_passed:
-
-                    # If we seem to have multiple patch files defined,
-                    # then raise a warning and assume there isn't a patch
-                    if patch_file != "":
-                        self.logger.warning(
-                            centred_string(
-                                f"Multiple potential patch files found for {file_dict['original_name']}",
-                                total_length=self.log_line_length,
-                            )
+                    if check not in self.regex_config:
+                        for r_c in self.compiled_regex_config.group_keys.get(check, []):
+
+                            if not ra_checks_passed:
+                                continue
+
+                            # Only check single-group keys here
+                            r_c_group = self.regex_config[r_c].get("group", None)
+                            if r_c_group == check:
+                                ra_checks_passed = check_match(
+                                    file_dict[r_c],
+                                    r_parsed[r_c],
+                                    checks_passed=ra_checks_passed,
+                                )
+
+            if ra_checks_passed:
+
+                # If we seem to have multiple patch files defined,
+                # then raise a warning and assume there isn't a patch
+                if patch_file != "":
+                    self.logger.warning(
+                        centred_string(
+                            f"Multiple potential patch files found for {file_dict['original_name']}",
+                            total_length=self.log_line_length,
                         )
-                        has_cheevos = False
-                        patch_file = None
-                        multiple_patch_files_found = True
+                    )
+                    has_cheevos = False
+                    patch_file = None
+                    multiple_patch_files_found = True
 
-                    else:
-                        has_cheevos = True
-                        patch_file = copy.deepcopy(self.ra_dict[r]["patch_url"])
+                else:
+                    has_cheevos = True
+                    patch_file = self.ra_dict[r]["patch_url"]
 
-                    if patch_file is None:
-                        patch_file = ""
+                if patch_file is None:
+                    patch_file = ""
 
         if patch_file is None:
             patch_file = ""
@@ -1019,6 +1037,53 @@ class ROMParser:
 
         return file_dict
 
+    def get_parsed_filename(
+        self,
+        f,
+        file_dict,
+        title_pos=None,
+    ):
+        """Parse info out of filename, reusing it if it's already been parsed
+
+        Args:
+            f (str): filename
+            file_dict (dict): Existing file dictionary
+            title_pos (int): Title position for compilations. Defaults to None
+        """
+
+        if self.parsed_names is None:
+            return self.parse_filename(
+                f=f,
+                file_dict=file_dict,
+                title_pos=title_pos,
+            )
+
+        key = (f, title_pos)
+        if key not in self.parsed_names:
+            self.parsed_names[key] = self.parse_filename(
+                f=f,
+                title_pos=title_pos,
+            )
+        parsed_name = self.parsed_names[key]
+
+        # If anything's already been set in the file dictionary, then parsing would
+        # combine with it, so we can't just copy over
+        if any(k in file_dict for k in parsed_name):
+            return self.parse_filename(
+                f=f,
+                file_dict=file_dict,
+                title_pos=title_pos,
+            )
+
+        # Copy lists over, since these can be edited later. They only hold strings,
+        # so a shallow copy is enough
+        for k, v in parsed_name.items():
+            if isinstance(v, list):
+                v = list(v)
+            file_dict[k] = v
+
+        return file_dict
+
     def parse_filename(
         self,
         f=None,
@@ -1045,12 +1110,12 @@ class ROMParser:
 
         if f is None:
             # Pull the filename out, which is the full name
-            f = copy.deepcopy(file_dict["full_name"])
+            f = file_dict["full_name"]
 
         # Split file into tags
         tags = [f"({x}" for x in f.rstrip(".zip").split(" (")][1:]
 
-        for regex_key in self.regex_config:
+        for regex_key, entry in self.compiled_regex_config.entries.items():
 
             # Are we potentially using the title position?
             use_title_pos = False
@@ -1058,67 +1123,23 @@ class ROMParser:
                 use_title_pos = True
 
             # Is this something problematic we should be skipping?
-            ignore_names = self.regex_config[regex_key].get("ignore_names", [])
-
-            if len(ignore_names) != 0:
-
-                found_ignore_name = False
-
-                for ignore_name in ignore_names:
-
-                    if found_ignore_name:
-                        continue
-
-                    if re.match(ignore_name, f) is not None:
-                        found_ignore_name = True
+            if self.compiled_regex_config.is_ignored(regex_key, f):
+                continue
 
-                if found_ignore_name:
-                    continue
+            regex_type = entry["type"]
+            group = entry["group"]
+            transform_regex = entry["transform_regex"]
+            transform_repl = entry["transform_repl"]
+            pattern_mappings = entry["pattern_mappings"]
+            regex = entry["regex"]
 
-            regex_type = self.regex_config[regex_key].get("type", "bool")
-            search_tags = self.regex_config[regex_key].get("search_tags", True)
-            group = self.regex_config[regex_key].get("group", None)
-            regex_flags = self.regex_config[regex_key].get("flags", "I")
-            transform_pattern = self.regex_config[regex_key].get(
-                "transform_pattern", None
-            )
-            transform_repl = self.regex_config[regex_key].get("transform_repl", None)
-
-            dict_default_val = DICT_DEFAULT_VALS.get(regex_type, None)
-            if dict_default_val is None:
-                raise ValueError(
-                    f"regex_type should be one of {list(DICT_DEFAULT_VALS.keys())}"
-                )
+            dict_default_val = DICT_DEFAULT_VALS[regex_type]
 
+            # Only lists need copying here, but a shallow copy is enough
             if regex_key not in file_dict:
-                file_dict[regex_key] = copy.deepcopy(dict_default_val)
-
-            if regex_flags == "NOFLAG":
-                regex_flags = re.NOFLAG
-            elif regex_flags == "I":
-                regex_flags = re.I
-            else:
-                raise ValueError("regex_flags should be one of 'NOFLAG', 'I'")
-
-            pattern = self.regex_config[regex_key]["pattern"]
-
-            pattern_mappings = None
-
-            if regex_type == "list":
-
-                if isinstance(self.default_config[regex_key], dict):
-                    str_to_join = [
-                        self.default_config[regex_key][key]
-                        for key in self.default_config[regex_key]
-                    ]
-                    pattern_mappings = self.default_config[regex_key]
-                else:
-                    str_to_join = copy.deepcopy(self.default_config[regex_key])
+                file_dict[regex_key] = copy.copy(dict_default_val)
 
-                pattern = pattern.replace(f"[{regex_key}]", "|".join(str_to_join))
-
-            regex = re.compile(pattern, flags=regex_flags)
-            if search_tags:
+            if entry["search_tags"]:
 
                 found_tag = False
 
@@ -1137,9 +1158,9 @@ class ROMParser:
                     )
                     if pattern_string is not None:
 
-                        if transform_pattern is not None:
-                            pattern_string = re.sub(
-                                transform_pattern, transform_repl, pattern_string
+                        if transform_regex is not None:
+                            pattern_string = transform_regex.sub(
+                                transform_repl, pattern_string
                             )
 
                         file_dict[regex_key] = pattern_string
@@ -1156,32 +1177,26 @@ class ROMParser:
                 if pattern_string is not None:
                     file_dict[regex_key] = pattern_string
 
-            # Update groups, if needed
-            if group is not None:
-
-                # We can have multiple groups per-tag, so take that into account
-                if isinstance(group, str):
-                    group = [group]
+            # Update groups, if needed. We can have multiple groups per-tag
+            for g in group:
 
-                for g in group:
+                if g not in file_dict:
+                    file_dict[g] = copy.copy(dict_default_val)
 
-                    if g not in file_dict:
-                        file_dict[g] = dict_default_val
-
-                    if regex_type == "bool":
-                        file_dict[g] = file_dict[g] | file_dict[regex_key]
-                    elif regex_type == "str":
-                        if file_dict[g] and file_dict[regex_key]:
-                            raise ValueError(
-                                "Can't combine multiple groups with type str"
-                            )
-                        else:
-                            file_dict[g] += file_dict[regex_key]
-                    elif regex_type == "list":
-                        file_dict[g].extend(file_dict[regex_key])
-                    else:
+                if regex_type == "bool":
+                    file_dict[g] = file_dict[g] | file_dict[regex_key]
+                elif regex_type == "str":
+                    if file_dict[g] and file_dict[regex_key]:
                         raise ValueError(
-                            f"regex_type should be one of {list(DICT_DEFAULT_VALS.keys())}"
+                            "Can't combine multiple groups with type str"
                         )
+                    else:
+                        file_dict[g] += file_dict[regex_key]
+                elif regex_type == "list":
+                    file_dict[g].extend(file_dict[regex_key])
+                else:
+                    raise ValueError(
+                        f"regex_type should be one of {list(DICT_DEFAULT_VALS.keys())}"
+                    )
 
         return file_dict
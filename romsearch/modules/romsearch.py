@@ -1,8 +1,13 @@
 import copy
 import glob
+import logging
+import math
+import multiprocessing
 import numpy as np
 import os
 import time
+from concurrent.futures import ProcessPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
 
 import romsearch
 from .datmapper import DATMapper
@@ -10,7 +15,7 @@ from .datparser import DATParser
 from .dupeparser import DupeParser
 from .gamefinder import GameFinder
 from .rahasher import RAHasher
-from .romchooser import ROMChooser
+from .romchooser import ROMChooser, ROMBatchChooser
 from .romcleaner import ROMCleaner
 from .romdownloader import ROMDownloader
 from .rommover import ROMMover
@@ -27,6 +32,8 @@ from ..util import (
     normalize_name,
     get_file_time,
     get_directory_name,
+    CompiledRegexConfig,
+    RetoolIndex,
 )
 
 ALLOWED_ROMSEARCH_METHODS = [
@@ -35,6 +42,151 @@ ALLOWED_ROMSEARCH_METHODS = [
 ]
 
 
+def run_platform_process(
+    platform,
+    config,
+    default_config,
+    regex_config,
+    log_line_sep="=",
+    log_line_length=100,
+):
+    """Run ROMSearch for a single platform, within a separate process
+
+    Sets up a logger for the platform, so logs from different platforms
+    don't get mixed together
+
+    Args:
+        platform (str): Platform name
+        config (dict): configuration dictionary
+        default_config (dict): default configuration dictionary
+        regex_config (dict): regex configuration dictionary
+        log_line_sep (str, optional): log line separator. Defaults to "=".
+        log_line_length (int, optional): log line length. Defaults to 100.
+    """
+
+    log_dir = config.get("dirs", {}).get("log_dir", os.path.join(os.getcwd(), "logs"))
+    log_level = config.get("logger", {}).get("level", "info")
+    logger = setup_logger(
+        log_level=log_level,
+        script_name="ROMSearch",
+        log_dir=log_dir,
+        additional_dir=platform,
+    )
+
+    rs = ROMSearch(
+        config=config,
+        default_config=default_config,
+        regex_config=regex_config,
+        logger=logger,
+    )
+    discord_summary = rs.run_platform(
+        platform=platform,
+        log_line_sep=log_line_sep,
+        log_line_length=log_line_length,
+    )
+
+    return discord_summary
+
+
+# State for the game workers, set once when each worker process starts
+GAME_WORKER_STATE = {}
+
+
+def init_game_worker(
+    log_queue,
+    log_level,
+    config,
+    default_config,
+    regex_config,
+    platform,
+    dat,
+    retool,
+    retool_index,
+    ra_hash,
+    local_ra_hashes,
+    ra_index,
+    parsed_names,
+    platform_config,
+    log_line_length=100,
+):
+    """Set up a worker process for parsing and choosing ROMs
+
+    This is run once per worker, so the (potentially large) dictionaries
+    only need to be sent over once, rather than for every game
+
+    Args:
+        log_queue (multiprocessing.Queue): Queue to pass log records back to the main process
+        log_level (int): Log level
+        config (dict): configuration dictionary
+        default_config (dict): default configuration dictionary
+        regex_config (dict): regex configuration dictionary
+        platform (str): Platform name
+        dat (dict): Dat dictionary
+        retool (dict): Retool dictionary
+        retool_index (RetoolIndex): Index of the retool variants for the platform
+        ra_hash (dict): RAHash dictionary
+        local_ra_hashes (dict): Locally calculated RA hashes for files in the raw directory
+        ra_index (RAIndex): Index of the RA hashes for the platform
+        parsed_names (dict): Store of already parsed filenames
+        platform_config (dict): Platform configuration
+        log_line_length (int, optional): log line length. Defaults to 100.
+    """
+
+    logger = logging.getLogger(f"ROMSearch worker {os.getpid()}")
+    logger.handlers.clear()
+    logger.addHandler(QueueHandler(log_queue))
+    logger.setLevel(log_level)
+    logger.propagate = False
+
+    GAME_WORKER_STATE["romsearch"] = ROMSearch(
+        config=config,
+        default_config=default_config,
+        regex_config=regex_config,
+        logger=logger,
+    )
+    GAME_WORKER_STATE["romsearch"].parsed_names = parsed_names
+    GAME_WORKER_STATE["kwargs"] = {
+        "platform": platform,
+        "dat": dat,
+        "retool": retool,
+        "retool_index": retool_index,
+        "ra_hash": ra_hash,
+        "local_ra_hashes": local_ra_hashes,
+        "ra_index": ra_index,
+        "platform_config": platform_config,
+        "log_line_length": log_line_length,
+    }
+
+
+def run_game_batch(
+    games,
+):
+    """Run the ROMParser and ROMChooser for a batch of games, within a worker process
+
+    Args:
+        games (dict): Dictionary of games and their ROM files
+    """
+
+    rs = GAME_WORKER_STATE["romsearch"]
+    kwargs = GAME_WORKER_STATE["kwargs"]
+
+    batch_roms_dict = {}
+
+    for game in games:
+        rom_dict = rs.parse_and_choose_game(
+            rom_files=games[game],
+            game=game,
+            **kwargs,
+        )
+
+        if len(rom_dict) == 0:
+            continue
+
+        batch_roms_dict[game] = rom_dict
+
+    return batch_roms_dict
+
+
 class ROMSearch:
 
     def __init__(
@@ -95,6 +247,12 @@ class ROMSearch:
             regex_config = load_yml(regex_file)
         self.regex_config = regex_config
 
+        # Expand and compile the regex patterns once, since they're used for every file
+        self.compiled_regex_config = CompiledRegexConfig(
+            regex_config=self.regex_config,
+            default_config=self.default_config,
+        )
+
         # Pull out platforms, make sure they're all valid
         platforms = self.config.get("platforms", None)
         if platforms is None:
@@ -130,6 +288,25 @@ class ROMSearch:
         self.run_rommover = self.config.get("romsearch", {}).get("run_rommover", True)
         self.dry_run = self.config.get("romsearch", {}).get("dry_run", False)
 
+        # How many platforms to run at once
+        self.max_parallel_platforms = self.config.get("romsearch", {}).get(
+            "max_parallel_platforms", 1
+        )
+
+        # How many processes to use for parsing and choosing ROMs within a platform
+        self.max_parallel_games = self.config.get("romsearch", {}).get(
+            "max_parallel_games", 1
+        )
+
+        # Whether to choose ROMs for all games in a platform at once, rather than game by game
+        self.batch_romchooser = self.config.get("romsearch", {}).get(
+            "batch_romchooser", False
+        )
+
+        # Filenames only need parsing once, so keep track of them. This is reset for
+        # each platform
+        self.parsed_names = {}
+
         # Finally, the discord URL if we're sending messages
         self.discord_url = self.config.get("discord", {}).get("webhook_url", None)
 
@@ -157,213 +334,359 @@ class ROMSearch:
             self.logger.info(centred_string(platform, total_length=log_line_length))
         self.logger.info(f"{log_line_sep * log_line_length}")
 
-        for platform in self.platforms:
+        if self.max_parallel_platforms > 1 and len(self.platforms) > 1:
+            self.run_parallel_platforms(
+                log_line_sep=log_line_sep,
+                log_line_length=log_line_length,
+            )
+        else:
+            for platform in self.platforms:
+                discord_summary = self.run_platform(
+                    platform=platform,
+                    log_line_sep=log_line_sep,
+                    log_line_length=log_line_length,
+                )
+                self.post_discord_summaries({platform: discord_summary})
 
-            self.logger.info(f"{log_line_sep * log_line_length}")
-            self.logger.info(
-                centred_string(f"Beginning {platform}", total_length=log_line_length)
+        self.logger.info(f"{log_line_sep * log_line_length}")
+        self.logger.info(
+            centred_string("ROMSearch complete", total_length=log_line_length)
+        )
+        self.logger.info(
+            centred_string(
+                f"Took {time.time() - start:.1f}s", total_length=log_line_length
             )
-            self.logger.info(f"{log_line_sep * log_line_length}")
+        )
+        self.logger.info(f"{log_line_sep * log_line_length}")
 
-            # Pull in platform-specific config
-            platform_config = self.get_platform_config(platform=platform)
+        return True
 
-            (
-                dat_dict,
-                subchannel_dict,
-                dupe_dict,
-                retool_dict,
-                ra_hash_dict,
-                all_games,
-            ) = self.get_all_games(
+    def run_platform(
+        self,
+        platform,
+        log_line_sep="=",
+        log_line_length=100,
+    ):
+        """Run ROMSearch for a single platform
+
+        Returns a dictionary of anything that should be posted to Discord,
+        keyed by the name of the post
+
+        Args:
+            platform (str): Platform name
+            log_line_sep (str, optional): log line separator. Defaults to "=".
+            log_line_length (int, optional): log line length. Defaults to 100.
+        """
+
+        self.logger.info(f"{log_line_sep * log_line_length}")
+        self.logger.info(
+            centred_string(f"Beginning {platform}", total_length=log_line_length)
+        )
+        self.logger.info(f"{log_line_sep * log_line_length}")
+
+        # Keep track of anything we want to post to Discord
+        discord_summary = {}
+
+        # Pull in platform-specific config
+        platform_config = self.get_platform_config(platform=platform)
+
+        (
+            dat_dict,
+            subchannel_dict,
+            dupe_dict,
+            retool_dict,
+            ra_hash_dict,
+            all_games,
+            retool_index,
+        ) = self.get_all_games(
+            platform=platform,
+            platform_config=platform_config,
+            log_line_sep=log_line_sep,
+            log_line_length=log_line_length,
+        )
+
+        local_ra_hashes = self.get_local_ra_hashes(
+            platform=platform,
+            platform_config=platform_config,
+            log_line_length=log_line_length,
+        )
+
+        ra_index = self.get_ra_index(
+            platform=platform,
+            platform_config=platform_config,
+            ra_hash_dict=ra_hash_dict,
+            log_line_length=log_line_length,
+        )
+
+        if self.max_parallel_games > 1 and len(all_games) > 1:
+            all_roms_dict = self.run_parallel_games(
+                all_games=all_games,
                 platform=platform,
+                dat=dat_dict,
+                retool=retool_dict,
+                ra_hash=ra_hash_dict,
+                local_ra_hashes=local_ra_hashes,
+                ra_index=ra_index,
+                retool_index=retool_index,
                 platform_config=platform_config,
-                log_line_sep=log_line_sep,
                 log_line_length=log_line_length,
             )
-
+        else:
             all_roms_dict = {}
-
             for game in all_games:
-
-                rom_files = all_games[game]
-                rom_dict = self.run_romparser(
-                    rom_files=rom_files,
+                rom_dict = self.parse_and_choose_game(
+                    rom_files=all_games[game],
                     platform=platform,
                     game=game,
                     dat=dat_dict,
                     retool=retool_dict,
                     ra_hash=ra_hash_dict,
+                    local_ra_hashes=local_ra_hashes,
+                    ra_index=ra_index,
+                    retool_index=retool_index,
                     platform_config=platform_config,
                     log_line_length=log_line_length,
                 )
 
-                if self.run_romchooser:
-                    # Here, we'll parse down the number of files to one game, one ROM
-                    chooser = ROMChooser(
-                        platform=platform,
-                        game=game,
-                        config=self.config,
-                        regex_config=self.regex_config,
-                        default_config=self.default_config,
-                        logger=self.logger,
-                        log_line_length=log_line_length,
-                    )
-                    rom_dict = chooser.run(rom_dict)
-
                 if len(rom_dict) == 0:
                     continue
 
                 # Save to a big dictionary, since we'll move all at once
                 all_roms_dict[game] = rom_dict
 
-            if self.dry_run:
-                self.logger.info(f"{log_line_sep * log_line_length}")
-                self.logger.info(
-                    centred_string(
-                        "Dry run, will not move any files", total_length=log_line_length
-                    )
+        # If we're choosing all at once, do that now everything's parsed
+        if self.run_romchooser and self.batch_romchooser:
+            chooser = ROMBatchChooser(
+                platform=platform,
+                config=self.config,
+                regex_config=self.regex_config,
+                default_config=self.default_config,
+                logger=self.logger,
+                log_line_length=log_line_length,
+            )
+            all_roms_dict = chooser.run(all_roms_dict)
+            all_roms_dict = {
+                game: all_roms_dict[game]
+                for game in all_roms_dict
+                if len(all_roms_dict[game]) > 0
+            }
+
+        if self.dry_run:
+            self.logger.info(f"{log_line_sep * log_line_length}")
+            self.logger.info(
+                centred_string(
+                    "Dry run, will not move any files", total_length=log_line_length
                 )
-                self.logger.info(f"{log_line_sep * log_line_length}")
-                continue
+            )
+            self.logger.info(f"{log_line_sep * log_line_length}")
+            return discord_summary
 
-            if not self.run_rommover:
-                self.logger.info(f"{log_line_sep * log_line_length}")
-                self.logger.info(
-                    centred_string(
-                        "ROMMover is not running, will not move anything",
-                        total_length=log_line_length,
-                    )
+        if not self.run_rommover:
+            self.logger.info(f"{log_line_sep * log_line_length}")
+            self.logger.info(
+                centred_string(
+                    "ROMMover is not running, will not move anything",
+                    total_length=log_line_length,
                 )
-                self.logger.info(f"{log_line_sep * log_line_length}")
-                continue
-
-            # If we filter then download, this is where we download. Use the download names!
-            if self.romsearch_method == "filter_then_download":
-
-                # Make sure to include priorities here
-                all_files = {}
-                for game in all_roms_dict:
-
-                    all_files[game] = {}
-                    for f in all_roms_dict[game]:
-                        name = copy.deepcopy(all_roms_dict[game][f]["download_name"])
-                        score = all_roms_dict[game][f].get("romchooser_score", 0)
-
-                        all_files[game][name] = {
-                            "name": copy.deepcopy(name),
-                            "score": copy.deepcopy(score),
-                        }
-
-                if self.run_romdownloader:
-                    downloader = ROMDownloader(
-                        platform=platform,
-                        config=self.config,
-                        platform_config=platform_config,
-                        logger=self.logger,
-                        rclone_method="copy",
-                        copy_files=all_files,
-                        subchannel_dict=subchannel_dict,
-                        log_line_length=log_line_length,
-                    )
-                    downloader.run()
+            )
+            self.logger.info(f"{log_line_sep * log_line_length}")
+            return discord_summary
 
-                # Replace the file time with the correct one on disk
-                for game in all_roms_dict:
+        # If we filter then download, this is where we download. Use the download names!
+        if self.romsearch_method == "filter_then_download":
 
-                    fs_to_pop = []
+            # Make sure to include priorities here
+            all_files = {}
+            for game in all_roms_dict:
 
-                    for f in all_roms_dict[game]:
-                        full_filename = os.path.join(
-                            self.raw_dir,
-                            platform,
-                            all_roms_dict[game][f]["download_name"],
-                        )
+                all_files[game] = {}
+                for f in all_roms_dict[game]:
+                    name = copy.deepcopy(all_roms_dict[game][f]["download_name"])
+                    score = all_roms_dict[game][f].get("romchooser_score", 0)
 
-                        # Flag things to remove if they don't exist on disk
-                        if not os.path.exists(full_filename):
-                            fs_to_pop.append(f)
-                            continue
+                    all_files[game][name] = {
+                        "name": copy.deepcopy(name),
+                        "score": copy.deepcopy(score),
+                    }
 
-                        file_mod_time = get_file_time(
-                            full_filename,
-                            datetime_format=self.default_config["datetime_format"],
-                        )
-                        all_roms_dict[game][f]["file_mod_time"] = file_mod_time
+            if self.run_romdownloader:
+                downloader = ROMDownloader(
+                    platform=platform,
+                    config=self.config,
+                    platform_config=platform_config,
+                    logger=self.logger,
+                    rclone_method="copy",
+                    copy_files=all_files,
+                    subchannel_dict=subchannel_dict,
+                    log_line_length=log_line_length,
+                )
+                downloader.run()
 
-                    for f_to_pop in fs_to_pop:
-                        all_roms_dict[game].pop(f_to_pop, None)
+            # Replace the file time with the correct one on disk
+            for game in all_roms_dict:
 
-            mover = ROMMover(
-                platform=platform,
-                config=self.config,
-                platform_config=platform_config,
-                regex_config=self.regex_config,
-                logger=self.logger,
-                log_line_length=log_line_length,
-            )
-            roms_moved = mover.run(all_roms_dict)
+                fs_to_pop = []
 
-            if self.discord_url is not None and len(roms_moved) > 0:
+                for f in all_roms_dict[game]:
+                    full_filename = os.path.join(
+                        self.raw_dir,
+                        platform,
+                        all_roms_dict[game][f]["download_name"],
+                    )
 
-                for items_split in split(roms_moved):
+                    # Flag things to remove if they don't exist on disk
+                    if not os.path.exists(full_filename):
+                        fs_to_pop.append(f)
+                        continue
 
-                    fields = []
+                    file_mod_time = get_file_time(
+                        full_filename,
+                        datetime_format=self.default_config["datetime_format"],
+                    )
+                    all_roms_dict[game][f]["file_mod_time"] = file_mod_time
 
-                    field_dict = {"name": platform, "value": "\n".join(items_split)}
-                    fields.append(field_dict)
+                for f_to_pop in fs_to_pop:
+                    all_roms_dict[game].pop(f_to_pop, None)
 
-                    if len(fields) > 0:
-                        discord_push(
-                            url=self.discord_url,
-                            name="ROMSearch",
-                            fields=fields,
-                        )
+        mover = ROMMover(
+            platform=platform,
+            config=self.config,
+            platform_config=platform_config,
+            regex_config=self.regex_config,
+            logger=self.logger,
+            log_line_length=log_line_length,
+        )
+        roms_moved = mover.run(all_roms_dict)
 
-            # Finally, clean up anything in the ROM directory that's been deleted
-            cleaner = ROMCleaner(
-                platform=platform,
-                config=self.config,
-                logger=self.logger,
-                log_line_length=log_line_length,
-            )
-            cleaned = cleaner.run(all_roms_dict)
+        discord_summary["ROMSearch"] = copy.deepcopy(roms_moved)
 
-            # Post these to Discord in chunks of 10
-            for c in cleaned:
-                if self.discord_url is not None and len(cleaned[c]) > 0:
+        # Finally, clean up anything in the ROM directory that's been deleted
+        cleaner = ROMCleaner(
+            platform=platform,
+            config=self.config,
+            logger=self.logger,
+            log_line_length=log_line_length,
+        )
+        cleaned = cleaner.run(all_roms_dict)
 
-                    for items_split in split(cleaned[c]):
+        for c in cleaned:
+            discord_summary[f"ROMCleaner [{c}]"] = copy.deepcopy(cleaned[c])
 
-                        fields = []
+        self.logger.info(f"{log_line_sep * log_line_length}")
+        self.logger.info(
+            centred_string(f"Completed {platform}", total_length=log_line_length)
+        )
+        self.logger.info(f"{log_line_sep * log_line_length}")
+
+        return discord_summary
 
-                        field_dict = {"name": platform, "value": "\n".join(items_split)}
-                        fields.append(field_dict)
+    def run_parallel_platforms(
+        self,
+        log_line_sep="=",
+        log_line_length=100,
+    ):
+        """Run platforms concurrently in a process pool
 
-                        if len(fields) > 0:
-                            discord_push(
-                                url=self.discord_url,
-                                name=f"ROMCleaner [{c}]",
-                                fields=fields,
-                            )
+        Each platform logs to its own directory, and the Discord posts are
+        collected and sent once everything has finished
 
-            self.logger.info(f"{log_line_sep * log_line_length}")
-            self.logger.info(
-                centred_string(f"Completed {platform}", total_length=log_line_length)
-            )
-            self.logger.info(f"{log_line_sep * log_line_length}")
+        Args:
+            log_line_sep (str, optional): log line separator. Defaults to "=".
+            log_line_length (int, optional): log line length. Defaults to 100.
+        """
+
+        max_workers = min(self.max_parallel_platforms, len(self.platforms))
 
         self.logger.info(f"{log_line_sep * log_line_length}")
-        self.logger.info(
-            centred_string("ROMSearch complete", total_length=log_line_length)
-        )
         self.logger.info(
             centred_string(
-                f"Took {time.time() - start:.1f}s", total_length=log_line_length
+                f"Running {len(self.platforms)} platforms with {max_workers} processes",
+                total_length=log_line_length,
             )
         )
         self.logger.info(f"{log_line_sep * log_line_length}")
 
+        discord_summaries = {}
+        platform_errors = {}
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                platform: executor.submit(
+                    run_platform_process,
+                    platform=platform,
+                    config=self.config,
+                    default_config=self.default_config,
+                    regex_config=self.regex_config,
+                    log_line_sep=log_line_sep,
+                    log_line_length=log_line_length,
+                )
+                for platform in self.platforms
+            }
+
+            # Keep the platforms in the order they were given
+            for platform in self.platforms:
+                try:
+                    discord_summaries[platform] = futures[platform].result()
+                except Exception as e:
+                    platform_errors[platform] = e
+                    continue
+
+                self.logger.info(
+                    centred_string(f"Completed {platform}", total_length=log_line_length)
+                )
+
+        self.post_discord_summaries(discord_summaries)
+
+        if len(platform_errors) > 0:
+            self.logger.warning(f"{log_line_sep * log_line_length}")
+            for platform, e in platform_errors.items():
+                self.logger.warning(
+                    centred_string(
+                        f"{platform} failed: {e!r}",
+                        total_length=log_line_length,
+                    )
+                )
+            self.logger.warning(f"{log_line_sep * log_line_length}")
+
+            # Re-raise the first error, so this doesn't fail silently
+            raise list(platform_errors.values())[0]
+
+        return True
+
+    def post_discord_summaries(
+        self,
+        discord_summaries,
+    ):
+        """Post summaries of what's changed to Discord, in chunks of 10
+
+        Args:
+            discord_summaries (dict): Dictionary of summaries per-platform,
+                as returned by run_platform
+        """
+
+        if self.discord_url is None:
+            return False
+
+        for platform in discord_summaries:
+            for name, items in discord_summaries[platform].items():
+
+                if len(items) == 0:
+                    continue
+
+                for items_split in split(items):
+
+                    fields = []
+
+                    field_dict = {"name": platform, "value": "\n".join(items_split)}
+                    fields.append(field_dict)
+
+                    if len(fields) > 0:
+                        discord_push(
+                            url=self.discord_url,
+                            name=name,
+                            fields=fields,
+                        )
+
         return True
 
     def get_platform_config(
@@ -392,6 +715,9 @@ class ROMSearch:
     ):
         """Get a dictionary of all games and ROM associations
 
+        Also returns the various dictionaries used along the way, and the index of the
+        retool variants so it only needs building once
+
         Args:
             platform (str): Platform name
             platform_config (dict): Platform configuration. If None, will load
@@ -408,6 +734,9 @@ class ROMSearch:
 
         raw_dir = os.path.join(self.raw_dir, platform)
 
+        # Start a fresh store of parsed names for this platform
+        self.parsed_names = {}
+
         ra_hash_dict = self.get_ra_hash_dict(
             platform=platform,
             log_line_length=log_line_length,
@@ -462,6 +791,11 @@ class ROMSearch:
             )
             dupe_dict, retool_dict = dupe_parser.run()
 
+        # Index the retool variants once, so they can be shared between GameFinder and ROMParser
+        retool_index = None
+        if retool_dict is not None:
+            retool_index = RetoolIndex(retool=retool_dict)
+
         if self.romsearch_method == "download_then_filter":
             # Run the rclone sync
             if self.run_romdownloader:
@@ -512,7 +846,7 @@ class ROMSearch:
 
             # The download name is generally just the same thing,
             # but if we have a remapping then it can change
-            download_name = copy.deepcopy(f)
+            download_name = f
             if dat_mappings is not None:
 
                 f_no_ext = f.rstrip(".zip")
@@ -528,18 +862,15 @@ class ROMSearch:
             )
             short_name = get_short_name(
                 full_name,
-                regex_config=self.regex_config,
-                default_config=self.default_config,
+                compiled_regex_config=self.compiled_regex_config,
             )
             region_free_name = get_region_free_name(
                 full_name,
-                regex_config=self.regex_config,
-                default_config=self.default_config,
+                compiled_regex_config=self.compiled_regex_config,
             )
             disc_free_name = get_disc_free_name(
                 full_name,
-                regex_config=self.regex_config,
-                default_config=self.default_config,
+                compiled_regex_config=self.compiled_regex_config,
             )
 
             all_file_dict[f] = {
@@ -558,8 +889,12 @@ class ROMSearch:
             platform=platform,
             config=self.config,
             dupe_dict=dupe_dict,
+            retool=retool_dict,
+            retool_index=retool_index,
+            parsed_names=self.parsed_names,
             default_config=self.default_config,
             regex_config=self.regex_config,
+            compiled_regex_config=self.compiled_regex_config,
             logger=self.logger,
             log_line_length=log_line_length,
         )
@@ -585,6 +920,7 @@ class ROMSearch:
             retool_dict,
             ra_hash_dict,
             all_games,
+            retool_index,
         )
 
     def get_ra_hash_dict(
@@ -612,6 +948,218 @@ class ROMSearch:
 
         return ra_hash_dict
 
+    def get_local_ra_hashes(
+        self,
+        platform,
+        platform_config=None,
+        log_line_length=100,
+    ):
+        """Get RetroAchievements hashes for files already in the raw directory
+
+        Args:
+            platform (str): Platform name
+            platform_config (dict, optional): Platform configuration. Defaults to None
+            log_line_length (int, optional): log line length. Defaults to 100.
+        """
+
+        local_ra_hashes = None
+        if self.run_rahasher:
+            ra_hasher = RAHasher(
+                platform=platform,
+                config=self.config,
+                platform_config=platform_config,
+                logger=self.logger,
+                log_line_length=log_line_length,
+            )
+            local_ra_hashes = ra_hasher.get_local_hashes()
+
+        return local_ra_hashes
+
+    def get_ra_index(
+        self,
+        platform,
+        platform_config=None,
+        ra_hash_dict=None,
+        log_line_length=100,
+    ):
+        """Get an index of the RetroAchievements hashes, shared between all the games
+
+        Args:
+            platform (str): Platform name
+            platform_config (dict, optional): Platform configuration. Defaults to None
+            ra_hash_dict (dict, optional): RA hash dictionary. Defaults to None
+            log_line_length (int, optional): log line length. Defaults to 100.
+        """
+
+        use_ra_hashes = self.config.get("romparser", {}).get("use_ra_hashes", False)
+
+        ra_index = None
+        if self.run_rahasher and use_ra_hashes and ra_hash_dict is not None:
+            ra_hasher = RAHasher(
+                platform=platform,
+                config=self.config,
+                platform_config=platform_config,
+                logger=self.logger,
+                log_line_length=log_line_length,
+            )
+            ra_index = ra_hasher.get_ra_index(
+                ra_hash_dict,
+                ra_file_exts=self.default_config.get("ra_file_exts", []),
+            )
+
+        return ra_index
+
+    def parse_and_choose_game(
+        self,
+        rom_files,
+        platform,
+        game,
+        dat,
+        retool,
+        ra_hash,
+        platform_config,
+        log_line_length=100,
+        local_ra_hashes=None,
+        ra_index=None,
+        retool_index=None,
+    ):
+        """Run the ROMParser and (optionally) the ROMChooser for a single game
+
+        If choosing ROMs for the whole platform at once, this only runs the ROMParser
+
+        Args:
+            rom_files: Dict of ROM files
+            platform (str): Platform name
+            game (str): Game name
+            dat (dict): Dat dictionary
+            retool (dict): Retool dictionary
+            ra_hash (dict): RAHash dictionary
+            platform_config (dict): Platform configuration
+            log_line_length (int, optional): log line length. Defaults to 100.
+            local_ra_hashes (dict, optional): Locally calculated RA hashes for files in the raw
+                directory. Defaults to None
+            ra_index (RAIndex, optional): Index of the RA hashes for the platform. Defaults to None
+            retool_index (RetoolIndex, optional): Index of the retool variants for the platform. Defaults
+                to None
+        """
+
+        rom_dict = self.run_romparser(
+            rom_files=rom_files,
+            platform=platform,
+            game=game,
+            dat=dat,
+            retool=retool,
+            ra_hash=ra_hash,
+            platform_config=platform_config,
+            log_line_length=log_line_length,
+            local_ra_hashes=local_ra_hashes,
+            ra_index=ra_index,
+            retool_index=retool_index,
+        )
+
+        if self.run_romchooser and not self.batch_romchooser:
+            # Here, we'll parse down the number of files to one game, one ROM
+            chooser = ROMChooser(
+                platform=platform,
+                game=game,
+                config=self.config,
+                regex_config=self.regex_config,
+                default_config=self.default_config,
+                logger=self.logger,
+                log_line_length=log_line_length,
+            )
+            rom_dict = chooser.run(rom_dict)
+
+        return rom_dict
+
+    def run_parallel_games(
+        self,
+        all_games,
+        platform,
+        dat,
+        retool,
+        ra_hash,
+        platform_config,
+        log_line_length=100,
+        local_ra_hashes=None,
+        ra_index=None,
+        retool_index=None,
+    ):
+        """Run the ROMParser and ROMChooser over batches of games in a process pool
+
+        The configs and the dat/retool/RA dictionaries are sent to each worker
+        once, when it starts up, and logs are passed back to this logger. The
+        output is the same as running through the games one at a time
+
+        Args:
+            all_games (dict): Dictionary of games and their ROM files
+            platform (str): Platform name
+            dat (dict): Dat dictionary
+            retool (dict): Retool dictionary
+            ra_hash (dict): RAHash dictionary
+            platform_config (dict): Platform configuration
+            log_line_length (int, optional): log line length. Defaults to 100.
+            local_ra_hashes (dict, optional): Locally calculated RA hashes for files in the raw
+                directory. Defaults to None
+            ra_index (RAIndex, optional): Index of the RA hashes for the platform. Defaults to None
+            retool_index (RetoolIndex, optional): Index of the retool variants for the platform. Defaults
+                to None
+        """
+
+        games = list(all_games.keys())
+
+        max_workers = min(self.max_parallel_games, len(games))
+
+        # Split into a few batches per worker, so they're kept busy without
+        # too much overhead per batch
+        batch_size = max(1, math.ceil(len(games) / (max_workers * 4)))
+        batches = [
+            {game: all_games[game] for game in games_split}
+            for games_split in split(games, chunk_size=batch_size)
+        ]
+
+        # Pass logs from the workers back through the handlers here
+        log_queue = multiprocessing.Queue()
+        log_listener = QueueListener(
+            log_queue,
+            *self.logger.handlers,
+            respect_handler_level=True,
+        )
+        log_listener.start()
+
+        all_roms_dict = {}
+
+        try:
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=init_game_worker,
+                initargs=(
+                    log_queue,
+                    self.logger.getEffectiveLevel(),
+                    self.config,
+                    self.default_config,
+                    self.regex_config,
+                    platform,
+                    dat,
+                    retool,
+                    retool_index,
+                    ra_hash,
+                    local_ra_hashes,
+                    ra_index,
+                    self.parsed_names,
+                    platform_config,
+                    log_line_length,
+                ),
+            ) as executor:
+
+                # map keeps the batches in order, so games stay in the same order
+                for batch_roms_dict in executor.map(run_game_batch, batches):
+                    all_roms_dict.update(batch_roms_dict)
+        finally:
+            log_listener.stop()
+
+        return all_roms_dict
+
     def run_romparser(
         self,
         rom_files,
@@ -622,6 +1170,9 @@ class ROMSearch:
         ra_hash,
         platform_config,
         log_line_length=100,
+        local_ra_hashes=None,
+        ra_index=None,
+        retool_index=None,
     ):
         """Run the ROMParser
 
@@ -634,6 +1185,11 @@ class ROMSearch:
             ra_hash (dict): RAHash dictionary
             platform_config (dict): Platform configuration
             log_line_length (int, optional): log line length. Defaults to 100.
+            local_ra_hashes (dict, optional): Locally calculated RA hashes for files in the raw
+                directory. Defaults to None
+            ra_index (RAIndex, optional): Index of the RA hashes for the platform. Defaults to None
+            retool_index (RetoolIndex, optional): Index of the retool variants for the platform. Defaults
+                to None
         """
 
         parse = ROMParser(
@@ -642,10 +1198,15 @@ class ROMSearch:
             dat=dat,
             retool=retool,
             ra_hashes=ra_hash,
+            local_ra_hashes=local_ra_hashes,
+            ra_index=ra_index,
+            retool_index=retool_index,
+            parsed_names=self.parsed_names,
             config=self.config,
             platform_config=platform_config,
             default_config=self.default_config,
             regex_config=self.regex_config,
+            compiled_regex_config=self.compiled_regex_config,
             logger=self.logger,
             log_line_length=log_line_length,
         )
@@ -1,17 +1,50 @@
 from .discord import discord_push
-from .general import split, match_retool_search_terms, normalize_name, get_file_time
+from .general import (
+    split,
+    match_retool_search_terms,
+    SearchTermIndex,
+    RetoolIndex,
+    normalize_name,
+    get_file_time,
+)
 from .io import (
     load_yml,
     save_yml,
     unzip_file,
+    get_file_crc,
+    get_cached_file_crc,
     load_json,
     save_json,
+    load_pickle,
+    save_pickle,
+    load_json_cache,
+    append_to_cache_journal,
+    save_json_cache,
     get_dat,
     format_dat,
+    iter_dat_games,
+    get_formatted_dat,
     remove_case_insensitive_matches,
 )
-from .logger import setup_logger, centred_string, left_aligned_string
+from .logger import setup_logger, centred_string, left_aligned_string, BufferedLogger
+from .sqlite_cache import (
+    ALLOWED_CACHE_BACKENDS,
+    SQLiteROMCache,
+    get_sqlite_cache_file,
+)
+from .rate_limiter import TokenBucket, get_retry_after
+from .ra_hashing import (
+    RA_HEADERS,
+    get_ra_header_size,
+    get_ra_hash_from_file,
+    get_ra_hash_from_zip_member,
+    get_ra_file_hashes,
+)
+from .ra_index import RAIndex, is_ra_subset, get_ra_index_key
+from .rom_record import ROMRecord
 from .regex_matching import (
+    CompiledRegexConfig,
+    get_compiled_regex_config,
     get_file_pattern,
     get_bracketed_file_pattern,
     get_directory_name,
@@ -23,10 +56,13 @@ from .regex_matching import (
 
 __all__ = [
     "setup_logger",
+    "BufferedLogger",
     "centred_string",
     "left_aligned_string",
     "load_yml",
     "save_yml",
+    "CompiledRegexConfig",
+    "get_compiled_regex_config",
     "get_bracketed_file_pattern",
     "get_file_pattern",
     "get_directory_name",
@@ -36,13 +72,38 @@ __all__ = [
     "get_sanitized_version",
     "load_json",
     "save_json",
+    "load_pickle",
+    "save_pickle",
+    "load_json_cache",
+    "append_to_cache_journal",
+    "save_json_cache",
+    "ALLOWED_CACHE_BACKENDS",
+    "SQLiteROMCache",
+    "get_sqlite_cache_file",
+    "TokenBucket",
+    "get_retry_after",
+    "RA_HEADERS",
+    "get_ra_header_size",
+    "get_ra_hash_from_file",
+    "get_ra_hash_from_zip_member",
+    "get_ra_file_hashes",
+    "RAIndex",
+    "is_ra_subset",
+    "get_ra_index_key",
+    "ROMRecord",
     "unzip_file",
+    "get_file_crc",
+    "get_cached_file_crc",
     "discord_push",
     "split",
     "get_file_time",
     "normalize_name",
     "match_retool_search_terms",
+    "SearchTermIndex",
+    "RetoolIndex",
     "get_dat",
     "format_dat",
+    "iter_dat_games",
+    "get_formatted_dat",
     "remove_case_insensitive_matches",
 ]
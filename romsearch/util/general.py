@@ -1,4 +1,3 @@
-import copy
 import os
 import re
 import time
@@ -41,9 +40,9 @@ def match_retool_search_terms(
 
     # Assign default short/region-free names if not supplied
     if short_name is None:
-        short_name = copy.deepcopy(full_name)
+        short_name = full_name
     if region_free_name is None:
-        region_free_name = copy.deepcopy(full_name)
+        region_free_name = full_name
 
     # If none, match against lowercased short name
     if match_type is None:
@@ -73,6 +72,214 @@ def match_retool_search_terms(
     return match_found
 
 
+class SearchTermIndex:
+
+    def __init__(self):
+        """Lookup table for retool search terms
+
+        Rather than running match_retool_search_terms against every search term for
+        every name, key the terms by their lowercased names, and only loop over the
+        regex terms if a combined regex says one of them might match. Matches come back
+        in the order they were added, so results are the same as looping over everything
+        """
+
+        self.lookups = {
+            None: {},
+            "full": {},
+            "regionFree": {},
+        }
+        self.regex_terms = []
+        self.n_terms = 0
+
+        # All the regex terms in one pattern, built when first needed
+        self.combined_regex = None
+
+    def add(
+        self,
+        search_term,
+        value,
+        match_type=None,
+    ):
+        """Add a search term to the index
+
+        Args:
+            search_term (str): Search term to match against
+            value: Value to return when this term matches
+            match_type (str): Type of matching. Defaults to None,
+                which will match against short name
+        """
+
+        if match_type in self.lookups:
+            key = search_term.lower()
+            if key not in self.lookups[match_type]:
+                self.lookups[match_type][key] = []
+            self.lookups[match_type][key].append((self.n_terms, value))
+        elif match_type == "regex":
+            self.regex_terms.append((self.n_terms, re.compile(search_term), value))
+            self.combined_regex = None
+        else:
+            raise ValueError(f"Unsure how to deal with name type {match_type}")
+
+        self.n_terms += 1
+
+    def match(
+        self,
+        full_name,
+        short_name=None,
+        region_free_name=None,
+    ):
+        """Get all values whose search terms match the names, in the order they were added
+
+        Args:
+            full_name (str): Full name for the ROM
+            short_name (str): Short name to match against. Defaults to None,
+                which inherits the full name
+            region_free_name (str): Region free name to match against. Defaults to None,
+                which inherits the full name
+        """
+
+        if short_name is None:
+            short_name = full_name
+        if region_free_name is None:
+            region_free_name = full_name
+
+        matches = []
+        matches.extend(self.lookups[None].get(short_name.lower(), []))
+        matches.extend(self.lookups["full"].get(full_name.lower(), []))
+        matches.extend(self.lookups["regionFree"].get(region_free_name.lower(), []))
+
+        if len(self.regex_terms) > 0:
+            if self.combined_regex is None:
+                self.combined_regex = self.get_combined_regex()
+
+            # If nothing in the combined regex matches, then only check the terms that
+            # couldn't be combined
+            regex_terms = self.regex_terms
+            if self.combined_regex is not False and self.combined_regex[0].search(full_name) is None:
+                regex_terms = self.combined_regex[1]
+
+            for term_idx, regex, value in regex_terms:
+                if regex.search(full_name) is not None:
+                    matches.append((term_idx, value))
+
+        matches.sort(key=lambda m: m[0])
+
+        return [m[1] for m in matches]
+
+    def get_combined_regex(self):
+        """Combine the regex terms into a single pattern, to quickly check if any might match
+
+        Terms with groups or flags can't safely be combined (since any backreferences or
+        flags would change), so these are returned separately to always be checked. Returns
+        False if the terms can't be combined at all
+        """
+
+        combinable = []
+        uncombinable = []
+        for term in self.regex_terms:
+            if term[1].groups == 0 and term[1].flags == re.UNICODE:
+                combinable.append(term[1].pattern)
+            else:
+                uncombinable.append(term)
+
+        if len(combinable) == 0:
+            return False
+
+        try:
+            combined_regex = re.compile("|".join(f"(?:{p})" for p in combinable))
+        except re.error:
+            return False
+
+        return combined_regex, uncombinable
+
+
+class RetoolIndex:
+
+    def __init__(
+        self,
+        retool=None,
+    ):
+        """Lookup table for the categories of retool variants
+
+        Each title in each variant is added to a SearchTermIndex, so the categories
+        for a name come from a lookup rather than looping over all the variants. This is
+        built once per platform, and can be shared between GameFinder and ROMParser
+
+        Args:
+            retool (list): List of retool variants. Defaults to None, which will create
+                an empty index
+        """
+
+        self.search_terms = SearchTermIndex()
+        self.categories = []
+
+        if retool is not None:
+            self.build(retool)
+
+    def build(
+        self,
+        retool,
+    ):
+        """Build the index from the retool variants
+
+        Args:
+            retool (list): List of retool variants
+        """
+
+        for retool_dict in retool:
+
+            # If we don't have titles within the dupe dict, skip
+            if "titles" not in retool_dict:
+                continue
+
+            retool_cats = retool_dict.get("categories", [])
+            variant_cats = [
+                retool_cat.lower().replace(" ", "_") for retool_cat in retool_cats
+            ]
+
+            for t in retool_dict["titles"]:
+                self.search_terms.add(
+                    search_term=t["searchTerm"],
+                    value=len(self.categories),
+                    match_type=t.get("nameType", None),
+                )
+
+            self.categories.append(variant_cats)
+
+        return True
+
+    def get_categories(
+        self,
+        full_name,
+        short_name=None,
+        region_free_name=None,
+    ):
+        """Get the categories for all the variants that match the names
+
+        Categories are lowercased and underscored, ready to be used as keys in the
+        file dictionary
+
+        Args:
+            full_name (str): Full name for the ROM
+            short_name (str): Short name to match against. Defaults to None,
+                which inherits the full name
+            region_free_name (str): Region free name to match against. Defaults to None,
+                which inherits the full name
+        """
+
+        file_cats = []
+        for variant_idx in self.search_terms.match(
+            full_name,
+            short_name=short_name,
+            region_free_name=region_free_name,
+        ):
+            for file_cat in self.categories[variant_idx]:
+                if file_cat not in file_cats:
+                    file_cats.append(file_cat)
+
+        return file_cats
+
+
 def normalize_name(
     f,
     disc_rename=None,
@@ -86,7 +293,7 @@ def normalize_name(
         disc_rename (dict, optional): Disc rename mappings. Defaults to None.
     """
 
-    f_norm = copy.deepcopy(f)
+    f_norm = f
 
     if disc_rename is not None:
         for k, v in disc_rename.items():
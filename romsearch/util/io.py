@@ -2,10 +2,13 @@ import copy
 import fnmatch
 import json
 import os
+import pickle
 import re
 import xmltodict
 import yaml
 import zipfile
+import zlib
+from xml.etree.ElementTree import iterparse
 
 
 class DumperEdit(yaml.Dumper):
@@ -43,22 +46,107 @@ def save_yml(f, data):
         )
 
 
+def get_file_crc(
+        file_name,
+        chunk_size=1024 * 1024,
+):
+    """Get the CRC32 of a file, reading it in chunks
+
+    Args:
+        file_name (str): Path to file
+        chunk_size (int): Number of bytes to read at once. Defaults to 1MB
+    """
+
+    crc = 0
+    with open(file_name, "rb") as f:
+        while chunk := f.read(chunk_size):
+            crc = zlib.crc32(chunk, crc)
+
+    return crc
+
+
+def get_cached_file_crc(
+        file_name,
+        crc_cache,
+):
+    """Get the CRC32 of a file, using a cache keyed on the file size and modification time
+
+    Will return None if the file doesn't exist
+
+    Args:
+        file_name (str): Path to file
+        crc_cache (dict): Dictionary of {file_name: [size, mtime_ns, crc]}. Will
+            be updated if the CRC needs to be calculated
+    """
+
+    try:
+        stat = os.stat(file_name)
+    except FileNotFoundError:
+        return None
+
+    cached = crc_cache.get(file_name, None)
+    if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+
+    crc = get_file_crc(file_name)
+    crc_cache[file_name] = [stat.st_size, stat.st_mtime_ns, crc]
+
+    return crc
+
+
 def unzip_file(
         zip_file_name,
         out_dir,
+        crc_cache=None,
 ):
-    """Unzip a file"""
+    """Unzip a file
+
+    Args:
+        zip_file_name (str): Path to zip file
+        out_dir (str): Directory to unzip to
+        crc_cache (dict): If set, will skip extracting any files where a file with the
+            same size and CRC32 already exists in the output directory. This is a
+            dictionary of {file_name: [size, mtime_ns, crc]}, and will be updated
+            as files are checked and extracted. Defaults to None, which will
+            extract everything
+    """
 
-    if not os.path.exists(out_dir):
-        os.makedirs(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
     out_dir = str(out_dir)
 
     with zipfile.ZipFile(zip_file_name, "r") as zip_file:
         # Get the names of all the files we're going to extract
         unzipped_files = zip_file.namelist()
 
-        # And extract
-        zip_file.extractall(out_dir)
+        # If we're not checking against existing files, just extract
+        if crc_cache is None:
+            zip_file.extractall(out_dir)
+            return unzipped_files
+
+        for member in zip_file.infolist():
+
+            member_parts = member.filename.split("/")
+
+            # Only check against things that will end up where we expect
+            is_simple_path = (not member.is_dir()
+                              and not os.path.isabs(member.filename)
+                              and ".." not in member_parts
+                              )
+
+            if is_simple_path:
+                out_file = os.path.join(out_dir, *member_parts)
+
+                # Check the size first, since that doesn't need the file to be read
+                if os.path.isfile(out_file) and os.path.getsize(out_file) == member.file_size:
+                    if get_cached_file_crc(out_file, crc_cache) == member.CRC:
+                        continue
+
+            extracted_file = zip_file.extract(member, out_dir)
+
+            # Keep track of the CRC for what we've just extracted, so we don't need to read it back later
+            if is_simple_path:
+                stat = os.stat(extracted_file)
+                crc_cache[out_file] = [stat.st_size, stat.st_mtime_ns, member.CRC]
 
     return unzipped_files
 
@@ -103,6 +191,140 @@ def save_json(
         )
 
 
+def get_cache_journal_file(cache_file):
+    """Get the name of the journal file for a JSON cache
+
+    Args:
+        cache_file (str): Path to the cache file
+    """
+
+    return f"{cache_file}.journal"
+
+
+def load_json_cache(cache_file):
+    """Load a JSON cache, replaying any journaled updates that haven't been written to it yet
+
+    Args:
+        cache_file (str): Path to the cache file
+    """
+
+    if os.path.exists(cache_file):
+        cache = load_json(cache_file)
+    else:
+        cache = {}
+
+    journal_file = get_cache_journal_file(cache_file)
+    if not os.path.exists(journal_file):
+        return cache
+
+    with open(journal_file, "r", encoding="utf-8") as f:
+        for line in f:
+
+            # If we crashed mid-write, the last line might be incomplete, so skip
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            d = cache
+            for key in entry["keys"][:-1]:
+                if not d.get(key, None):
+                    d[key] = {}
+                d = d[key]
+            d[entry["keys"][-1]] = entry["value"]
+
+    return cache
+
+
+def append_to_cache_journal(
+        cache_file,
+        keys,
+        value,
+):
+    """Append an update to the journal for a JSON cache
+
+    This is flushed to disk straight away, so if we crash we only lose
+    whatever was in progress
+
+    Args:
+        cache_file (str): Path to the cache file
+        keys (list): List of nested keys for the entry, e.g. [platform, game, rom]
+        value: Value for the entry
+    """
+
+    journal_file = get_cache_journal_file(cache_file)
+
+    with open(journal_file, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"keys": keys, "value": value}, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+    return True
+
+
+def save_json_cache(
+        cache,
+        cache_file,
+        sort_key=None,
+):
+    """Save a JSON cache, and clear out the journal
+
+    The cache is written to a temporary file and then renamed, so the cache
+    file is never left half-written
+
+    Args:
+        cache (dict): Cache to save
+        cache_file (str): Path to the cache file
+        sort_key (str): Key within the cache to sort by. Default is None, which will not sort.
+    """
+
+    # Copy the top level, so sorting doesn't touch the original
+    cache = dict(cache)
+    if sort_key not in cache:
+        sort_key = None
+
+    tmp_file = f"{cache_file}.tmp"
+    save_json(cache, tmp_file, sort_key=sort_key)
+    os.replace(tmp_file, cache_file)
+
+    # Everything's now in the main file, so we can remove the journal
+    journal_file = get_cache_journal_file(cache_file)
+    if os.path.exists(journal_file):
+        os.remove(journal_file)
+
+    return True
+
+
+def load_pickle(file):
+    """Load pickle file"""
+
+    with open(file, "rb") as f:
+        p = pickle.load(f)
+
+    return p
+
+
+def save_pickle(
+        data,
+        out_file,
+):
+    """Save data as a pickle
+
+    Writes to a temporary file first, so an interrupted save won't
+    leave behind a broken file
+
+    Args:
+        data: Data to be saved
+        out_file (str): Path to pickle file
+    """
+
+    tmp_file = f"{out_file}.tmp"
+    with open(tmp_file, "wb") as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    os.replace(tmp_file, out_file)
+
+
 def get_dat(
         dat_file_name,
 ):
@@ -126,6 +348,92 @@ def format_dat(dat):
     return rom_dict
 
 
+def element_to_dict(element):
+    """Convert an XML element to a dictionary, in the same way xmltodict would
+
+    Attributes are included without a prefix, and repeated children become lists
+
+    Args:
+        element (xml.etree.ElementTree.Element): Element to convert
+    """
+
+    element_dict = dict(element.attrib)
+
+    for child in element:
+        child_val = element_to_dict(child)
+
+        if child.tag in element_dict:
+            if not isinstance(element_dict[child.tag], list):
+                element_dict[child.tag] = [element_dict[child.tag]]
+            element_dict[child.tag].append(child_val)
+        else:
+            element_dict[child.tag] = child_val
+
+    text = element.text.strip() if element.text is not None else ""
+
+    if len(element_dict) == 0:
+        return text if text else None
+
+    if text:
+        element_dict["#text"] = text
+
+    return element_dict
+
+
+def iter_dat_games(
+        dat_file_name,
+):
+    """Stream games out of a dat file one at a time
+
+    Rather than building the whole XML tree, parse incrementally and throw
+    away each game once it's been converted. ROM entries are always given
+    as a list, even if there's only one file
+
+    Args:
+        dat_file_name (str): Path to the dat file
+    """
+
+    root = None
+
+    for event, element in iterparse(dat_file_name, events=("start", "end")):
+
+        # Keep hold of the root, so we can clear out games as we go
+        if root is None:
+            root = element
+            continue
+
+        if event != "end" or element.tag != "game":
+            continue
+
+        game = element_to_dict(element)
+
+        rom = game.get("rom", [])
+        if not isinstance(rom, list):
+            rom = [rom]
+        game["rom"] = rom
+
+        yield game
+
+        root.clear()
+
+
+def get_formatted_dat(
+        dat_file_name,
+):
+    """Parse the dat file straight into a dictionary of games, keyed by name
+
+    Args:
+        dat_file_name (str): Path to the dat file
+    """
+
+    rom_dict = {}
+
+    for game in iter_dat_games(dat_file_name):
+        rom_dict[game["name"]] = game
+
+    return rom_dict
+
+
 def find_files_case_insensitive(pattern, path='.'):
     """Find files in a directory in a case-insensitive manner.
 
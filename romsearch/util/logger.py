@@ -117,6 +117,46 @@ def setup_logger(
     return logger
 
 
+class BufferedLogger:
+
+    def __init__(self):
+        """Logger-like object that holds onto messages to write out later
+
+        Useful for work that runs in threads, so that the messages for each
+        piece of work are kept together and in order
+        """
+
+        self.records = []
+
+    def debug(self, msg, *args, **kwargs):
+        self.records.append((logging.DEBUG, msg, args, kwargs))
+
+    def info(self, msg, *args, **kwargs):
+        self.records.append((logging.INFO, msg, args, kwargs))
+
+    def warning(self, msg, *args, **kwargs):
+        self.records.append((logging.WARNING, msg, args, kwargs))
+
+    def error(self, msg, *args, **kwargs):
+        self.records.append((logging.ERROR, msg, args, kwargs))
+
+    def critical(self, msg, *args, **kwargs):
+        self.records.append((logging.CRITICAL, msg, args, kwargs))
+
+    def flush(self, logger):
+        """Write out all the held messages to a real logger
+
+        Args:
+            logger (logging.Logger): Logger to write to
+        """
+
+        for level, msg, args, kwargs in self.records:
+            logger.log(level, msg, *args, **kwargs)
+        self.records = []
+
+        return True
+
+
 def centred_string(
     str_to_centre,
     total_length=80,
@@ -0,0 +1,172 @@
+import hashlib
+import mmap
+import os
+import zipfile
+
+# Size of chunks to read when hashing
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Number of bytes to read from the start of a file when looking for a header
+RA_HEADER_START_BYTES = 16
+
+# Headers that RetroAchievements strips before hashing. Each of these is either
+# identified by some magic bytes near the start of the file (at magic_offset, if
+# not at the very start), or by the file size. For Atari 7800, the first byte is
+# the header version, so only check the bytes after that
+RA_HEADERS = {
+    "nes": {"magic": b"NES\x1a", "size": 16},
+    "fds": {"magic": b"FDS\x1a", "size": 16},
+    "lynx": {"magic": b"LYNX\x00", "size": 64},
+    "atari7800": {"magic": b"ATARI7800", "magic_offset": 1, "size": 128},
+    "snes": {"size_modulo": 8192, "size": 512},
+    "pce": {"size_modulo": 131072, "size": 512},
+}
+
+
+def get_ra_header_size(
+    start_bytes,
+    file_size,
+    header=None,
+):
+    """Get the size of any header that RetroAchievements would strip before hashing
+
+    Args:
+        start_bytes (bytes): The first bytes of the file. Should be long enough to
+            cover any magic bytes for the header, including their offset
+        file_size (int): Total size of the file
+        header (str): Header type, should be one of RA_HEADERS. Defaults to None,
+            which means there's no header to strip
+    """
+
+    if header is None:
+        return 0
+
+    if header not in RA_HEADERS:
+        raise ValueError(f"header should be one of {list(RA_HEADERS.keys())}, not {header}")
+
+    header_info = RA_HEADERS[header]
+
+    if "magic" in header_info:
+        magic_offset = header_info.get("magic_offset", 0)
+        if start_bytes[magic_offset:magic_offset + len(header_info["magic"])] == header_info["magic"]:
+            return header_info["size"]
+        return 0
+
+    if file_size % header_info["size_modulo"] == header_info["size"]:
+        return header_info["size"]
+
+    return 0
+
+
+def get_ra_hash_from_file(
+    file_name,
+    header=None,
+):
+    """Get the RetroAchievements-style md5 for an uncompressed file
+
+    This maps the file into memory, so large files don't need to be read in
+    all at once
+
+    Args:
+        file_name (str): Path to file
+        header (str): Header type to strip, should be one of RA_HEADERS.
+            Defaults to None
+    """
+
+    md5 = hashlib.md5()
+
+    file_size = os.path.getsize(file_name)
+
+    # mmap can't handle empty files
+    if file_size == 0:
+        return md5.hexdigest()
+
+    with open(file_name, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header_size = get_ra_header_size(mm[:RA_HEADER_START_BYTES], file_size, header=header)
+
+            mm_view = memoryview(mm)
+            try:
+                for i in range(header_size, file_size, HASH_CHUNK_SIZE):
+                    md5.update(mm_view[i:i + HASH_CHUNK_SIZE])
+            finally:
+                mm_view.release()
+
+    return md5.hexdigest()
+
+
+def get_ra_hash_from_zip_member(
+    zip_file,
+    member,
+    header=None,
+):
+    """Get the RetroAchievements-style md5 for a file within a zip
+
+    Args:
+        zip_file (zipfile.ZipFile): Open zip file
+        member (zipfile.ZipInfo): Member to hash
+        header (str): Header type to strip, should be one of RA_HEADERS.
+            Defaults to None
+    """
+
+    md5 = hashlib.md5()
+
+    with zip_file.open(member, "r") as f:
+        start_bytes = f.read(RA_HEADER_START_BYTES)
+        header_size = get_ra_header_size(start_bytes, member.file_size, header=header)
+
+        # Headers can be longer than what we've read so far, so skip the rest of them
+        if header_size > len(start_bytes):
+            f.read(header_size - len(start_bytes))
+
+        md5.update(start_bytes[header_size:])
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            md5.update(chunk)
+
+    return md5.hexdigest()
+
+
+def get_ra_file_hashes(
+    file_name,
+    header=None,
+    file_exts=None,
+):
+    """Get RetroAchievements-style md5s for a file
+
+    If the file is a zip, this will hash each file within it. Returns a dictionary
+    of {file name: md5}
+
+    Args:
+        file_name (str): Path to file
+        header (str): Header type to strip, should be one of RA_HEADERS.
+            Defaults to None
+        file_exts (list): If set, will only hash files with these extensions.
+            Defaults to None, which will hash everything
+    """
+
+    hashes = {}
+
+    if zipfile.is_zipfile(file_name):
+        with zipfile.ZipFile(file_name, "r") as zip_file:
+            for member in zip_file.infolist():
+
+                if member.is_dir():
+                    continue
+
+                if file_exts is not None and os.path.splitext(member.filename)[1].lower() not in file_exts:
+                    continue
+
+                hashes[member.filename] = get_ra_hash_from_zip_member(
+                    zip_file,
+                    member,
+                    header=header,
+                )
+
+    else:
+        if file_exts is None or os.path.splitext(file_name)[1].lower() in file_exts:
+            hashes[os.path.basename(file_name)] = get_ra_hash_from_file(
+                file_name,
+                header=header,
+            )
+
+    return hashes
@@ -0,0 +1,238 @@
+import hashlib
+import re
+
+from .io import load_pickle, save_pickle
+
+
+def is_ra_subset(name):
+    """Check if a name is a RetroAchievements subset
+
+    Args:
+        name (str): Name to check
+    """
+
+    match_pattern = "\\[Subset.*\\]"
+
+    is_subset = False
+    if re.search(match_pattern, name):
+        is_subset = True
+
+    return is_subset
+
+
+def get_ra_index_key(
+    ra_hashes,
+    hash_method,
+    ra_file_exts=None,
+):
+    """Get a key to check whether a saved RAIndex is still up-to-date
+
+    RAHasher only updates hashes when the modification date for a game changes,
+    so we use those rather than all the hashes
+
+    Args:
+        ra_hashes (dict): RA hash dictionary, from RAHasher
+        hash_method (str): RA hash method
+        ra_file_exts (list): File extensions stripped from RA names. Defaults to None
+    """
+
+    key = hashlib.md5()
+    key.update(f"{hash_method}|{ra_file_exts}".encode("utf-8"))
+    for r in ra_hashes:
+        key.update(f"|{r}|{ra_hashes[r].get('DateModified', None)}".encode("utf-8"))
+
+    return key.hexdigest()
+
+
+class RAIndex:
+
+    def __init__(
+        self,
+        ra_hashes=None,
+        hash_method=None,
+        ra_file_exts=None,
+    ):
+        """Index of RetroAchievements hashes for a platform
+
+        This is built once per platform and can be shared between every ROMParser. The main
+        index is keyed by md5, with secondary indexes by ID name (md5 or ROM name, depending
+        on the hash method) and by directory name
+
+        Args:
+            ra_hashes (dict): RA hash dictionary, from RAHasher. Defaults to None, which will
+                create an empty index
+            hash_method (str): RA hash method. Should be "md5" or "custom"
+            ra_file_exts (list): File extensions to strip from RA names. Defaults to None
+        """
+
+        if ra_file_exts is None:
+            ra_file_exts = []
+
+        self.hash_method = hash_method
+        self.ra_file_exts = ra_file_exts
+
+        self.entries = {}
+        self.by_name = {}
+        self.by_dir_name = {}
+
+        if ra_hashes is not None:
+            self.build(ra_hashes)
+
+    def build(
+        self,
+        ra_hashes,
+    ):
+        """Build the index from the RA hashes
+
+        Args:
+            ra_hashes (dict): RA hash dictionary, from RAHasher
+        """
+
+        # Pull out the particular key we need
+        if self.hash_method == "md5":
+            key = "MD5"
+        elif self.hash_method == "custom":
+            key = "Name"
+        else:
+            raise ValueError(f"Cannot currently handle {self.hash_method} hash method")
+
+        for r in ra_hashes:
+
+            # If the RA list is a subset, then skip
+            if is_ra_subset(r):
+                continue
+
+            for h in ra_hashes[r]["Hashes"]:
+
+                # Use the md5 as the unique key, and then name as the thing we'll match to.
+                # Ensure we lowercase the hash, just to be sure
+                md5 = h["MD5"].lower()
+                id_name = h[key]
+
+                # If for some weird reason there's no ID name, just skip
+                if id_name is None:
+                    continue
+
+                # Also just pull out the ROM name, since we need that later
+                rom_name = h["Name"]
+                rom_name = rom_name.strip()
+
+                # Ensure we also lowercase the hash here, if we need to
+                if key in ["MD5"]:
+                    id_name = id_name.lower()
+
+                # If we're dealing with names, there might
+                # be file extensions to strip
+                if key in ["Name"]:
+                    for ext in self.ra_file_exts:
+                        if id_name.endswith(ext):
+                            id_name = id_name.rstrip(ext)
+
+                # FIXME: Here as a catch-all, hopefully won't be a problem
+                if md5 in self.entries:
+                    raise ValueError(f"Hash {md5} multiply defined")
+
+                dir_name = rom_name.split(" (")[0]
+
+                self.entries[md5] = {
+                    "name": id_name,
+                    "full_name": rom_name,
+                    "dir_name": dir_name,
+                    "patch_url": h["PatchUrl"],
+                }
+
+                if id_name not in self.by_name:
+                    self.by_name[id_name] = []
+                self.by_name[id_name].append(md5)
+
+                if dir_name not in self.by_dir_name:
+                    self.by_dir_name[dir_name] = []
+                self.by_dir_name[dir_name].append(md5)
+
+        return True
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get_by_name(
+        self,
+        name,
+    ):
+        """Get the md5s for entries with a particular ID name, in the original order
+
+        Args:
+            name (str): ID name
+        """
+
+        return self.by_name.get(name, [])
+
+    def get_by_dir_name(
+        self,
+        dir_name,
+    ):
+        """Get the md5s for entries with a particular directory name, in the original order
+
+        Args:
+            dir_name (str): Directory name
+        """
+
+        return self.by_dir_name.get(dir_name, [])
+
+    def save(
+        self,
+        out_file,
+        index_key=None,
+    ):
+        """Save the index to a pickle
+
+        Args:
+            out_file (str): Path to pickle file
+            index_key (str): Key to check the index is up-to-date when loading. Defaults to None
+        """
+
+        save_pickle(
+            {
+                "key": index_key,
+                "hash_method": self.hash_method,
+                "ra_file_exts": self.ra_file_exts,
+                "entries": self.entries,
+                "by_name": self.by_name,
+                "by_dir_name": self.by_dir_name,
+            },
+            out_file,
+        )
+
+        return True
+
+    @classmethod
+    def load(
+        cls,
+        in_file,
+        index_key=None,
+    ):
+        """Load an index from a pickle
+
+        Returns None if the file can't be read, or if the key doesn't match
+
+        Args:
+            in_file (str): Path to pickle file
+            index_key (str): Key to check against the one saved. Defaults to None
+        """
+
+        try:
+            saved = load_pickle(in_file)
+        except Exception:
+            return None
+
+        if not isinstance(saved, dict) or saved.get("key", None) != index_key:
+            return None
+
+        ra_index = cls(
+            hash_method=saved["hash_method"],
+            ra_file_exts=saved["ra_file_exts"],
+        )
+        ra_index.entries = saved["entries"]
+        ra_index.by_name = saved["by_name"]
+        ra_index.by_dir_name = saved["by_dir_name"]
+
+        return ra_index
@@ -0,0 +1,111 @@
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+
+    def __init__(
+        self,
+        rate,
+        capacity=1,
+    ):
+        """Thread-safe token bucket rate limiter
+
+        Tokens are added at a steady rate, up to some capacity, and each
+        request takes one. This allows short bursts up to the capacity, but
+        keeps the average rate below the limit
+
+        Args:
+            rate (float): Number of tokens added per second
+            capacity (int): Maximum number of tokens that can build up. Defaults to 1
+        """
+
+        if rate <= 0:
+            raise ValueError("rate should be greater than 0")
+        if capacity < 1:
+            raise ValueError("capacity should be at least 1")
+
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+
+        self.tokens = float(capacity)
+        self.last_time = time.monotonic()
+
+        # If we've been told to back off, then don't give out tokens until this time
+        self.paused_until = 0.0
+
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, waiting until one is available"""
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+
+                if now < self.paused_until:
+                    wait_time = self.paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.last_time) * self.rate)
+                    self.last_time = now
+
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return True
+
+                    wait_time = (1 - self.tokens) / self.rate
+
+            time.sleep(wait_time)
+
+    def pause(
+        self,
+        wait_time,
+    ):
+        """Stop giving out tokens for a while, e.g. if a server has asked us to back off
+
+        Args:
+            wait_time (float): Time to pause for, in seconds
+        """
+
+        with self.lock:
+            now = time.monotonic()
+            self.paused_until = max(self.paused_until, now + wait_time)
+
+            # Don't let tokens build up while we're paused
+            self.tokens = 0.0
+            self.last_time = self.paused_until
+
+        return True
+
+
+def get_retry_after(
+    retry_after,
+):
+    """Parse a Retry-After header into a number of seconds
+
+    This can either be a number of seconds, or a HTTP date. Returns None if the
+    header can't be parsed
+
+    Args:
+        retry_after (str): Retry-After header value
+    """
+
+    if retry_after is None:
+        return None
+
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+
+    try:
+        retry_time = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_time.tzinfo is None:
+        retry_time = retry_time.replace(tzinfo=timezone.utc)
+
+    return max(0.0, (retry_time - datetime.now(timezone.utc)).total_seconds())
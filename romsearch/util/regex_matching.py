@@ -58,144 +58,334 @@ def get_directory_name(f):
     return f
 
 
-def get_short_name(
-    f,
-    regex_config=None,
-    default_config=None,
-):
-    """Get short game name from the ROM file naming convention"""
+REGEX_TYPES = [
+    "bool",
+    "str",
+    "list",
+]
 
-    if ".zip" in f:
-        f = f.rstrip(".zip")
+REGEX_FLAGS = {
+    "NOFLAG": re.NOFLAG,
+    "I": re.I,
+}
+
+# Keep hold of a handful of compiled configs for the name helpers
+MAX_COMPILED_REGEX_CONFIGS = 8
+COMPILED_REGEX_CONFIG_CACHE = {}
 
-    mod_dir = os.path.dirname(romsearch.__file__)
 
-    if default_config is None:
-        default_file = os.path.join(mod_dir, "configs", "defaults.yml")
-        default_config = load_yml(default_file)
+def get_regex_flags(regex_flags):
+    """Convert a regex flag string from the regex config into a re flag
 
-    if regex_config is None:
-        regex_file = os.path.join(mod_dir, "configs", "regex.yml")
-        regex_config = load_yml(regex_file)
+    Args:
+        regex_flags (str): Flag string. Should be one of 'NOFLAG', 'I'
+    """
 
-    for regex_key in regex_config:
+    if regex_flags not in REGEX_FLAGS:
+        raise ValueError("regex_flags should be one of 'NOFLAG', 'I'")
 
-        # If we have patterns that we do want to keep in the long name, then skip
-        include_in_short_title = regex_config[regex_key].get(
-            "include_in_short_name", False
-        )
-        if include_in_short_title:
-            continue
+    return REGEX_FLAGS[regex_flags]
 
-        # Is this something problematic we should be skipping?
-        ignore_names = regex_config[regex_key].get("ignore_names", [])
 
-        if len(ignore_names) != 0:
+class CompiledRegexConfig:
 
-            found_ignore_name = False
+    def __init__(
+        self,
+        regex_config=None,
+        default_config=None,
+    ):
+        """Pre-expanded, pre-compiled version of the regex config
 
-            for ignore_name in ignore_names:
+        Expanding the [regions]/[languages] style lists from the default config and
+        compiling every pattern is expensive, so do it once here and share the result
+        between the name helpers and ROMParser
 
-                if found_ignore_name:
-                    continue
+        Args:
+            regex_config (dict, optional): regex configuration dictionary. Defaults to None.
+            default_config (dict, optional): default configuration dictionary. Defaults to None.
+        """
 
-                if re.match(ignore_name, f) is not None:
-                    found_ignore_name = True
+        mod_dir = os.path.dirname(romsearch.__file__)
 
-            if found_ignore_name:
-                continue
+        if default_config is None:
+            default_file = os.path.join(mod_dir, "configs", "defaults.yml")
+            default_config = load_yml(default_file)
+        self.default_config = default_config
+
+        if regex_config is None:
+            regex_file = os.path.join(mod_dir, "configs", "regex.yml")
+            regex_config = load_yml(regex_file)
+        self.regex_config = regex_config
+
+        self.entries = {}
+        self.group_keys = {}
+
+        for regex_key in self.regex_config:
+            entry = self.compile_entry(regex_key)
+            self.entries[regex_key] = entry
+
+            for g in entry["group"]:
+                if g not in self.group_keys:
+                    self.group_keys[g] = []
+                self.group_keys[g].append(regex_key)
 
-        regex_type = regex_config[regex_key].get("type", "bool")
-        regex_flags = regex_config[regex_key].get("flags", "I")
+        # Pull out the keys we strip for the various names, since these don't change
+        self.short_name_keys = [
+            key for key in self.entries if not self.entries[key]["include_in_short_name"]
+        ]
+        self.region_free_keys = [
+            key
+            for key in ["regions", "languages"]
+            if key in self.entries and not self.entries[key]["include_in_short_name"]
+        ]
+        self.disc_free_keys = [key for key in ["multi_disc"] if key in self.entries]
 
-        pattern = regex_config[regex_key]["pattern"]
+    def compile_entry(
+        self,
+        regex_key,
+    ):
+        """Expand and compile a single regex config entry
+
+        Args:
+            regex_key (str): Key in the regex config
+        """
+
+        regex_dict = self.regex_config[regex_key]
+
+        regex_type = regex_dict.get("type", "bool")
+        if regex_type not in REGEX_TYPES:
+            raise ValueError(f"regex_type should be one of {REGEX_TYPES}")
+
+        regex_flags = get_regex_flags(regex_dict.get("flags", "I"))
+
+        pattern = regex_dict["pattern"]
+        pattern_mappings = None
 
         if regex_type == "list":
 
-            if isinstance(default_config[regex_key], dict):
+            if isinstance(self.default_config[regex_key], dict):
                 str_to_join = [
-                    default_config[regex_key][key] for key in default_config[regex_key]
+                    self.default_config[regex_key][key]
+                    for key in self.default_config[regex_key]
                 ]
+                pattern_mappings = {
+                    key: re.compile(self.default_config[regex_key][key])
+                    for key in self.default_config[regex_key]
+                }
             else:
-                str_to_join = copy.deepcopy(default_config[regex_key])
+                str_to_join = copy.deepcopy(self.default_config[regex_key])
 
             pattern = pattern.replace(f"[{regex_key}]", "|".join(str_to_join))
 
-        if regex_flags == "NOFLAG":
-            regex_flags = re.NOFLAG
-        elif regex_flags == "I":
-            regex_flags = re.I
-        else:
-            raise ValueError("regex_flags should be one of 'NOFLAG', 'I'")
+        # Combine any names to ignore into a single pattern
+        ignore_names = regex_dict.get("ignore_names", [])
+        ignore_regex = None
+        if len(ignore_names) > 0:
+            ignore_regex = re.compile("|".join([f"(?:{i})" for i in ignore_names]))
+
+        transform_pattern = regex_dict.get("transform_pattern", None)
+        transform_regex = None
+        if transform_pattern is not None:
+            transform_regex = re.compile(transform_pattern)
+
+        group = regex_dict.get("group", None)
+        if group is None:
+            group = []
+        elif isinstance(group, str):
+            group = [group]
+
+        entry = {
+            "type": regex_type,
+            "regex": re.compile(pattern, flags=regex_flags),
+            "strip_regex": re.compile(f"\\s?{pattern}", flags=regex_flags),
+            "pattern_mappings": pattern_mappings,
+            "ignore_regex": ignore_regex,
+            "search_tags": regex_dict.get("search_tags", True),
+            "group": group,
+            "transform_regex": transform_regex,
+            "transform_repl": regex_dict.get("transform_repl", None),
+            "include_in_short_name": regex_dict.get("include_in_short_name", False),
+        }
+
+        return entry
+
+    def is_ignored(
+        self,
+        regex_key,
+        f,
+    ):
+        """Check whether a name should skip a particular regex key
+
+        Args:
+            regex_key (str): Key in the regex config
+            f (str): Name to check
+        """
+
+        ignore_regex = self.entries[regex_key]["ignore_regex"]
+        if ignore_regex is None:
+            return False
+
+        return ignore_regex.match(f) is not None
+
+    def strip_patterns(
+        self,
+        f,
+        regex_keys,
+    ):
+        """Strip the patterns for a list of regex keys out of a name
+
+        Args:
+            f (str): Name to strip
+            regex_keys (list): Regex keys to strip, in order
+        """
+
+        for regex_key in regex_keys:
+
+            # Is this something problematic we should be skipping?
+            if self.is_ignored(regex_key, f):
+                continue
 
-        pattern = f"\\s?{pattern}"
+            f = self.entries[regex_key]["strip_regex"].sub("", f)
 
-        f = re.sub(pattern=pattern, repl="", string=f, flags=regex_flags)
+        return f
 
-    return f
+    def get_short_name(self, f):
+        """Get short game name from an already de-zipped name"""
+        return self.strip_patterns(f, self.short_name_keys)
 
+    def get_region_free_name(self, f):
+        """Get region-free game name from an already de-zipped name"""
+        return self.strip_patterns(f, self.region_free_keys)
 
-def get_disc_free_name(
+    def get_disc_free_name(self, f):
+        """Get disc-free game name from an already de-zipped name"""
+        return self.strip_patterns(f, self.disc_free_keys)
+
+
+def get_compiled_regex_config(
+    regex_config=None,
+    default_config=None,
+):
+    """Get a compiled regex config, reusing an earlier one for the same config dictionaries
+
+    This keeps the name helpers cheap when they're called without a pre-built
+    CompiledRegexConfig. Configs are assumed not to be edited after they've been compiled
+
+    Args:
+        regex_config (dict, optional): regex configuration dictionary. Defaults to None.
+        default_config (dict, optional): default configuration dictionary. Defaults to None.
+    """
+
+    cache_key = (id(regex_config), id(default_config))
+    cached = COMPILED_REGEX_CONFIG_CACHE.get(cache_key, None)
+
+    # Hold onto the configs themselves, so we know the IDs haven't been reused
+    if (
+        cached is not None
+        and cached[0] is regex_config
+        and cached[1] is default_config
+    ):
+        return cached[2]
+
+    compiled_regex_config = CompiledRegexConfig(
+        regex_config=regex_config,
+        default_config=default_config,
+    )
+
+    if len(COMPILED_REGEX_CONFIG_CACHE) >= MAX_COMPILED_REGEX_CONFIGS:
+        COMPILED_REGEX_CONFIG_CACHE.clear()
+    COMPILED_REGEX_CONFIG_CACHE[cache_key] = (
+        regex_config,
+        default_config,
+        compiled_regex_config,
+    )
+
+    return compiled_regex_config
+
+
+def get_short_name(
     f,
     regex_config=None,
     default_config=None,
+    compiled_regex_config=None,
 ):
-    """Get disc-free game name from the ROM file naming convention"""
+    """Get short game name from the ROM file naming convention
+
+    Args:
+        f (str): Filename
+        regex_config (dict, optional): regex configuration dictionary. Defaults to None.
+        default_config (dict, optional): default configuration dictionary. Defaults to None.
+        compiled_regex_config (CompiledRegexConfig, optional): Pre-compiled regex config. If
+            given, will be used instead of regex_config and default_config. Defaults to None.
+    """
 
     if ".zip" in f:
         f = f.rstrip(".zip")
 
-    mod_dir = os.path.dirname(romsearch.__file__)
+    if compiled_regex_config is None:
+        compiled_regex_config = get_compiled_regex_config(
+            regex_config=regex_config,
+            default_config=default_config,
+        )
+
+    return compiled_regex_config.get_short_name(f)
 
-    if default_config is None:
-        default_file = os.path.join(mod_dir, "configs", "defaults.yml")
-        default_config = load_yml(default_file)
 
-    if regex_config is None:
-        regex_file = os.path.join(mod_dir, "configs", "regex.yml")
-        regex_config = load_yml(regex_file)
+def get_disc_free_name(
+    f,
+    regex_config=None,
+    default_config=None,
+    compiled_regex_config=None,
+):
+    """Get disc-free game name from the ROM file naming convention
+
+    Args:
+        f (str): Filename
+        regex_config (dict, optional): regex configuration dictionary. Defaults to None.
+        default_config (dict, optional): default configuration dictionary. Defaults to None.
+        compiled_regex_config (CompiledRegexConfig, optional): Pre-compiled regex config. If
+            given, will be used instead of regex_config and default_config. Defaults to None.
+    """
 
-    # We only care about whether something's multi-disc here
-    regex_config = {
-        "multi_disc": copy.deepcopy(regex_config["multi_disc"]),
-    }
-    # And make sure we strip from the name
-    regex_config["multi_disc"]["include_in_short_name"] = False
+    if ".zip" in f:
+        f = f.rstrip(".zip")
 
-    disc_free_name = get_short_name(f, regex_config, default_config)
+    if compiled_regex_config is None:
+        compiled_regex_config = get_compiled_regex_config(
+            regex_config=regex_config,
+            default_config=default_config,
+        )
 
-    return disc_free_name
+    return compiled_regex_config.get_disc_free_name(f)
 
 
 def get_region_free_name(
     f,
     regex_config=None,
     default_config=None,
+    compiled_regex_config=None,
 ):
-    """Get region-free game name from the ROM file naming convention"""
+    """Get region-free game name from the ROM file naming convention
+
+    Args:
+        f (str): Filename
+        regex_config (dict, optional): regex configuration dictionary. Defaults to None.
+        default_config (dict, optional): default configuration dictionary. Defaults to None.
+        compiled_regex_config (CompiledRegexConfig, optional): Pre-compiled regex config. If
+            given, will be used instead of regex_config and default_config. Defaults to None.
+    """
 
     if ".zip" in f:
         f = f.rstrip(".zip")
 
-    mod_dir = os.path.dirname(romsearch.__file__)
-
-    if default_config is None:
-        default_file = os.path.join(mod_dir, "configs", "defaults.yml")
-        default_config = load_yml(default_file)
-
-    if regex_config is None:
-        regex_file = os.path.join(mod_dir, "configs", "regex.yml")
-        regex_config = load_yml(regex_file)
-
-    # We only care about regions and languages here
-    regex_config = {
-        "regions": regex_config["regions"],
-        "languages": regex_config["languages"],
-    }
+    if compiled_regex_config is None:
+        compiled_regex_config = get_compiled_regex_config(
+            regex_config=regex_config,
+            default_config=default_config,
+        )
 
-    region_free_name = get_short_name(f, regex_config, default_config)
+    return compiled_regex_config.get_region_free_name(f)
 
-    return region_free_name
 
 def get_sanitized_version(ver):
     """Get a sanitized version for potentially weird versioning
@@ -0,0 +1,189 @@
+import copy
+import sys
+import threading
+from collections.abc import MutableMapping
+
+# Keys are shared between all records, so each record only needs to store its values. Keys
+# are added in the order they're first seen by any record, and every record iterates in that
+# shared order. This isn't necessarily the order keys were set in a particular record, so
+# unlike a dictionary, iteration order doesn't depend on insertion order
+ROM_RECORD_KEYS = {}
+ROM_RECORD_KEY_LIST = []
+ROM_RECORD_KEY_LOCK = threading.Lock()
+
+
+class _Missing:
+    """Placeholder for keys that aren't set in a record"""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return "<missing>"
+
+    def __reduce__(self):
+        return "MISSING"
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+MISSING = _Missing()
+
+
+def get_rom_record_key_index(key):
+    """Get the index for a key, adding it to the shared keys if it's new
+
+    Args:
+        key (str): Key to look up
+    """
+
+    idx = ROM_RECORD_KEYS.get(key, None)
+    if idx is not None:
+        return idx
+
+    with ROM_RECORD_KEY_LOCK:
+        idx = ROM_RECORD_KEYS.get(key, None)
+        if idx is None:
+            if isinstance(key, str):
+                key = sys.intern(key)
+            idx = len(ROM_RECORD_KEY_LIST)
+            ROM_RECORD_KEY_LIST.append(key)
+            ROM_RECORD_KEYS[key] = idx
+
+    return idx
+
+
+def intern_value(value):
+    """Intern strings within lists, since these are generally repeated values like regions and languages
+
+    Args:
+        value: Value to intern
+    """
+
+    if isinstance(value, list):
+        for i, v in enumerate(value):
+            if isinstance(v, str):
+                value[i] = sys.intern(v)
+
+    return value
+
+
+class ROMRecord(MutableMapping):
+
+    __slots__ = ("_values",)
+
+    def __init__(
+        self,
+        *args,
+        **kwargs,
+    ):
+        """Compact record of the properties of a single ROM
+
+        This behaves like a dictionary, so can be used anywhere the parsed file dictionaries
+        were, but only stores the values. The keys are shared between all records, and
+        strings within lists (regions, languages, and so on) are interned so the same
+        values aren't stored over and over. Bools are already shared singletons, so flags
+        only take up a slot each. Keys iterate in the shared order, rather than the order
+        they were set in this record
+
+        Args:
+            *args: Passed to update, e.g. a dictionary to convert
+            **kwargs: Passed to update
+        """
+
+        self._values = []
+        if args or kwargs:
+            self.update(*args, **kwargs)
+
+    def __getitem__(self, key):
+        idx = ROM_RECORD_KEYS.get(key, None)
+        if idx is None or idx >= len(self._values):
+            raise KeyError(key)
+
+        value = self._values[idx]
+        if value is MISSING:
+            raise KeyError(key)
+
+        return value
+
+    def __setitem__(self, key, value):
+        idx = get_rom_record_key_index(key)
+
+        n_values = len(self._values)
+        if idx >= n_values:
+            self._values.extend([MISSING] * (idx + 1 - n_values))
+
+        self._values[idx] = intern_value(value)
+
+    def __delitem__(self, key):
+        idx = ROM_RECORD_KEYS.get(key, None)
+        if idx is None or idx >= len(self._values) or self._values[idx] is MISSING:
+            raise KeyError(key)
+
+        self._values[idx] = MISSING
+
+    def __contains__(self, key):
+        idx = ROM_RECORD_KEYS.get(key, None)
+        if idx is None or idx >= len(self._values):
+            return False
+
+        return self._values[idx] is not MISSING
+
+    def __iter__(self):
+        for key, value in zip(ROM_RECORD_KEY_LIST, self._values):
+            if value is not MISSING:
+                yield key
+
+    def __len__(self):
+        return sum(1 for value in self._values if value is not MISSING)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.to_dict()!r})"
+
+    def __reduce__(self):
+        # Key indices are only valid within a process, so pickle by key
+        return self.__class__, (self.to_dict(),)
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        new = self.__class__.__new__(self.__class__)
+        memo[id(self)] = new
+        new._values = [
+            value if value is MISSING else copy.deepcopy(value, memo)
+            for value in self._values
+        ]
+
+        return new
+
+    def get(self, key, default=None):
+        idx = ROM_RECORD_KEYS.get(key, None)
+        if idx is None or idx >= len(self._values):
+            return default
+
+        value = self._values[idx]
+        if value is MISSING:
+            return default
+
+        return value
+
+    def copy(self):
+        """Get a shallow copy of the record, like dict.copy"""
+
+        new = self.__class__.__new__(self.__class__)
+        new._values = list(self._values)
+
+        return new
+
+    def to_dict(self):
+        """Get the record as a plain dictionary"""
+
+        return {
+            key: value
+            for key, value in zip(ROM_RECORD_KEY_LIST, self._values)
+            if value is not MISSING
+        }
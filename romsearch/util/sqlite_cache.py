@@ -0,0 +1,276 @@
+import os
+import sqlite3
+
+from .io import load_json_cache
+
+ALLOWED_CACHE_BACKENDS = [
+    "json",
+    "sqlite",
+]
+
+
+class SQLiteROMCache:
+
+    def __init__(
+        self,
+        cache_file,
+    ):
+        """SQLite-backed ROM cache for a single platform
+
+        This holds the same information as the JSON cache, but in indexed tables
+        so lookups and updates don't need to load or write the whole thing. ROMs
+        are keyed on (game, rom), and output files are stored in a separate table
+
+        Args:
+            cache_file (str): Path to the SQLite database
+        """
+
+        self.cache_file = cache_file
+
+        self.conn = sqlite3.connect(cache_file, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+
+        with self.conn:
+            self.conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+                CREATE TABLE IF NOT EXISTS roms (
+                    game TEXT NOT NULL,
+                    rom TEXT NOT NULL,
+                    file_mod_time TEXT,
+                    patch_file TEXT,
+                    patched INTEGER,
+                    multi_disc INTEGER NOT NULL DEFAULT 0,
+                    output_directory TEXT,
+                    PRIMARY KEY (game, rom)
+                );
+                CREATE TABLE IF NOT EXISTS files (
+                    game TEXT NOT NULL,
+                    rom TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    file TEXT NOT NULL,
+                    PRIMARY KEY (game, rom, idx),
+                    FOREIGN KEY (game, rom) REFERENCES roms (game, rom) ON DELETE CASCADE
+                );
+                CREATE INDEX IF NOT EXISTS roms_file_mod_time ON roms (file_mod_time);
+                CREATE INDEX IF NOT EXISTS files_file ON files (file);
+                """
+            )
+
+    def close(self):
+        """Close the database connection"""
+
+        self.conn.close()
+
+    def migrate_json(
+        self,
+        json_cache_file,
+        platform,
+    ):
+        """Import an existing JSON cache, if we haven't already
+
+        This only happens once, so the JSON cache won't be re-imported later.
+        Returns the number of entries imported
+
+        Args:
+            json_cache_file (str): Path to the JSON cache file
+            platform (str): Platform name, since the JSON is keyed on platform
+        """
+
+        migrated = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'migrated_json'"
+        ).fetchone()
+        if migrated is not None:
+            return 0
+
+        json_cache = load_json_cache(json_cache_file).get(platform, {})
+
+        n_entries = 0
+        with self.conn:
+            for game in json_cache:
+                for rom in json_cache[game]:
+                    self._set_entry(game, rom, json_cache[game][rom])
+                    n_entries += 1
+
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_json', ?)",
+                (json_cache_file,),
+            )
+
+        return n_entries
+
+    def get_entry(
+        self,
+        game,
+        rom,
+    ):
+        """Get a single cache entry, in the same format as the JSON cache
+
+        Returns None if the entry doesn't exist
+
+        Args:
+            game (str): Game name
+            rom (str): ROM name
+        """
+
+        row = self.conn.execute(
+            "SELECT file_mod_time, patch_file, patched, multi_disc, output_directory "
+            "FROM roms WHERE game = ? AND rom = ?",
+            (game, rom),
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        return self._row_to_entry(row, self.get_files(game, rom))
+
+    def get_files(
+        self,
+        game,
+        rom,
+    ):
+        """Get the output files for a single cache entry
+
+        Args:
+            game (str): Game name
+            rom (str): ROM name
+        """
+
+        rows = self.conn.execute(
+            "SELECT file FROM files WHERE game = ? AND rom = ? ORDER BY idx",
+            (game, rom),
+        ).fetchall()
+
+        return [r[0] for r in rows]
+
+    def set_entry(
+        self,
+        game,
+        rom,
+        entry,
+    ):
+        """Add or replace a single cache entry
+
+        Args:
+            game (str): Game name
+            rom (str): ROM name
+            entry (dict): Cache entry, in the same format as the JSON cache
+        """
+
+        with self.conn:
+            self._set_entry(game, rom, entry)
+
+    def remove_entries(
+        self,
+        entries,
+    ):
+        """Remove a number of cache entries
+
+        Args:
+            entries (list): List of (game, rom) tuples to remove
+        """
+
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM roms WHERE game = ? AND rom = ?",
+                entries,
+            )
+
+    def to_dict(self):
+        """Get the whole cache as a dictionary of {game: {rom: entry}}, like the JSON cache"""
+
+        all_files = {}
+        for game, rom, f in self.conn.execute(
+            "SELECT game, rom, file FROM files ORDER BY game, rom, idx"
+        ):
+            all_files.setdefault((game, rom), []).append(f)
+
+        cache = {}
+        for row in self.conn.execute(
+            "SELECT game, rom, file_mod_time, patch_file, patched, multi_disc, output_directory "
+            "FROM roms ORDER BY game, rom"
+        ):
+            game, rom = row[0], row[1]
+            cache.setdefault(game, {})[rom] = self._row_to_entry(
+                row[2:],
+                all_files.get((game, rom), []),
+            )
+
+        return cache
+
+    def _set_entry(
+        self,
+        game,
+        rom,
+        entry,
+    ):
+        """Write a cache entry, without committing"""
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO roms "
+            "(game, rom, file_mod_time, patch_file, patched, multi_disc, output_directory) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                game,
+                rom,
+                entry.get("file_mod_time", None),
+                entry.get("patch_file", None),
+                None if "patched" not in entry else int(entry["patched"]),
+                int(entry.get("multi_disc", False)),
+                entry.get("output_directory", None),
+            ),
+        )
+
+        # INSERT OR REPLACE deletes the old row, which clears out the files too
+        self.conn.executemany(
+            "INSERT INTO files (game, rom, idx, file) VALUES (?, ?, ?, ?)",
+            [(game, rom, idx, f) for idx, f in enumerate(entry.get("all_files", []))],
+        )
+
+    @staticmethod
+    def _row_to_entry(
+        row,
+        files,
+    ):
+        """Convert a row from the roms table back into a JSON-style cache entry"""
+
+        file_mod_time, patch_file, patched, multi_disc, output_directory = row
+
+        # Multi-disc entries only hold the m3u file
+        if multi_disc:
+            return {
+                "multi_disc": True,
+                "output_directory": output_directory,
+                "all_files": files,
+            }
+
+        entry = {}
+        if file_mod_time is not None:
+            entry["file_mod_time"] = file_mod_time
+        if patch_file is not None:
+            entry["patch_file"] = patch_file
+        if patched is not None:
+            entry["patched"] = bool(patched)
+        if output_directory is not None:
+            entry["output_directory"] = output_directory
+        entry["all_files"] = files
+
+        return entry
+
+
+def get_sqlite_cache_file(
+    cache_dir,
+    platform,
+):
+    """Get the path to the SQLite cache for a platform
+
+    Args:
+        cache_dir (str): Cache directory
+        platform (str): Platform name
+    """
+
+    return os.path.join(cache_dir, f"cache ({platform}).sqlite")
@@ -0,0 +1,203 @@
+import logging
+import os
+
+from romsearch import ROMMover
+from romsearch.util import (
+    append_to_cache_journal,
+    load_json,
+    load_json_cache,
+    save_json_cache,
+    SQLiteROMCache,
+    get_sqlite_cache_file,
+)
+
+PLATFORM = "Nintendo - Super Nintendo Entertainment System"
+
+
+def get_cache_entry(file_mod_time):
+    """Get a cache entry like the ones ROMMover writes"""
+
+    cache_entry = {
+        "file_mod_time": file_mod_time,
+        "patch_file": "",
+        "patched": False,
+        "output_directory": "",
+        "all_files": [],
+    }
+
+    return cache_entry
+
+
+def test_cache_journal_replay(tmp_path):
+    """Check that journaled updates are replayed after a crash, and then compacted"""
+
+    cache_file = str(tmp_path / f"cache ({PLATFORM}).json")
+    journal_file = f"{cache_file}.journal"
+
+    save_json_cache(
+        {PLATFORM: {"Game A": {"Game A (USA)": get_cache_entry(1)}}},
+        cache_file,
+        sort_key=PLATFORM,
+    )
+
+    # Update one entry and add a new one, then crash partway through writing a third
+    append_to_cache_journal(
+        cache_file,
+        keys=[PLATFORM, "Game A", "Game A (USA)"],
+        value=get_cache_entry(2),
+    )
+    append_to_cache_journal(
+        cache_file,
+        keys=[PLATFORM, "Game B", "Game B (USA)"],
+        value=get_cache_entry(3),
+    )
+    with open(journal_file, "a", encoding="utf-8") as f:
+        f.write('{"keys": ["Nintendo - Super Nint')
+
+    expected = {
+        PLATFORM: {
+            "Game A": {"Game A (USA)": get_cache_entry(2)},
+            "Game B": {"Game B (USA)": get_cache_entry(3)},
+        }
+    }
+
+    # The main cache file shouldn't have changed, but loading picks up the journal
+    assert load_json(cache_file) == {
+        PLATFORM: {"Game A": {"Game A (USA)": get_cache_entry(1)}}
+    }
+    cache = load_json_cache(cache_file)
+    assert cache == expected
+
+    # Compacting should write everything to the main file and remove the journal
+    save_json_cache(cache, cache_file, sort_key=PLATFORM)
+    assert not os.path.exists(journal_file)
+    assert load_json(cache_file) == expected
+    assert load_json_cache(cache_file) == expected
+
+
+def test_rommover_cache_journal(tmp_path):
+    """Check ROMMover picks up journaled entries from a run that didn't finish"""
+
+    config = {
+        "dirs": {
+            "raw_dir": str(tmp_path / "raw"),
+            "rom_dir": str(tmp_path / "roms"),
+            "cache_dir": str(tmp_path / "cache"),
+        },
+        "rommover": {
+            "cache_compact_every": 3,
+        },
+    }
+    logger = logging.getLogger("test_cache")
+
+    rm = ROMMover(platform=PLATFORM, config=config, regex_config={}, logger=logger)
+    for i in range(2):
+        rm.set_cache_entry(
+            game=f"Game {i}",
+            rom=f"Game {i} (USA)",
+            entry=get_cache_entry(i),
+        )
+        rm.checkpoint_cache()
+
+    # Not enough to compact yet, so these are only in the journal
+    assert not os.path.exists(rm.cache_file)
+    assert os.path.exists(f"{rm.cache_file}.journal")
+
+    # Simulate a crash by starting a new ROMMover without saving
+    rm = ROMMover(platform=PLATFORM, config=config, regex_config={}, logger=logger)
+    assert rm.get_cache_entry(game="Game 1", rom="Game 1 (USA)") == get_cache_entry(1)
+
+    # Entries are journaled again, and compacted once there are enough
+    for i in range(2, 5):
+        rm.set_cache_entry(
+            game=f"Game {i}",
+            rom=f"Game {i} (USA)",
+            entry=get_cache_entry(i),
+        )
+        rm.checkpoint_cache()
+
+    assert not os.path.exists(f"{rm.cache_file}.journal")
+    assert sorted(load_json(rm.cache_file)[PLATFORM].keys()) == [
+        f"Game {i}" for i in range(5)
+    ]
+
+
+def test_sqlite_cache_migration(tmp_path):
+    """Check a JSON cache (including its journal) migrates to SQLite and round-trips"""
+
+    cache_file = str(tmp_path / f"cache ({PLATFORM}).json")
+
+    json_cache = {
+        PLATFORM: {
+            "Game A": {
+                "Game A (USA)": {
+                    "file_mod_time": "2024/01/01, 12:00:00",
+                    "patch_file": "",
+                    "patched": False,
+                    "output_directory": "Game A",
+                    "all_files": ["Game A (USA).sfc", "Game A (USA).srm"],
+                },
+            },
+            "Game B": {
+                "Game B (Disc 1)": {
+                    "file_mod_time": "2024/01/02, 12:00:00",
+                    "patch_file": "https://example.com/patch.zip",
+                    "patched": True,
+                    "output_directory": ".Game B",
+                    "all_files": ["Game B (Disc 1).chd"],
+                },
+                "Game B [Multi Disc]": {
+                    "multi_disc": True,
+                    "output_directory": "",
+                    "all_files": ["Game B.m3u"],
+                },
+            },
+        }
+    }
+    save_json_cache(json_cache, cache_file, sort_key=PLATFORM)
+
+    # Include something that's only in the journal
+    journal_entry = {
+        "file_mod_time": "2024/01/03, 12:00:00",
+        "patch_file": "",
+        "patched": False,
+        "output_directory": "",
+        "all_files": [],
+    }
+    append_to_cache_journal(
+        cache_file,
+        keys=[PLATFORM, "Game C", "Game C (Europe)"],
+        value=journal_entry,
+    )
+    json_cache[PLATFORM]["Game C"] = {"Game C (Europe)": journal_entry}
+
+    sqlite_file = get_sqlite_cache_file(str(tmp_path), PLATFORM)
+    sqlite_cache = SQLiteROMCache(sqlite_file)
+
+    assert sqlite_cache.migrate_json(cache_file, PLATFORM) == 4
+    assert sqlite_cache.to_dict() == json_cache[PLATFORM]
+    assert sqlite_cache.get_entry("Game B", "Game B [Multi Disc]") == (
+        json_cache[PLATFORM]["Game B"]["Game B [Multi Disc]"]
+    )
+    assert sqlite_cache.get_entry("Game D", "Game D (USA)") is None
+
+    # Updates should replace files, and removing should clear the entry out
+    updated_entry = dict(json_cache[PLATFORM]["Game A"]["Game A (USA)"])
+    updated_entry["all_files"] = ["Game A (USA).sfc"]
+    sqlite_cache.set_entry("Game A", "Game A (USA)", updated_entry)
+    sqlite_cache.remove_entries([("Game C", "Game C (Europe)")])
+    sqlite_cache.close()
+
+    # The migration should only happen once, and everything should persist
+    sqlite_cache = SQLiteROMCache(sqlite_file)
+    assert sqlite_cache.migrate_json(cache_file, PLATFORM) == 0
+
+    expected = {
+        "Game A": {"Game A (USA)": updated_entry},
+        "Game B": json_cache[PLATFORM]["Game B"],
+    }
+    assert sqlite_cache.to_dict() == expected
+    assert sqlite_cache.get_files("Game A", "Game A (USA)") == ["Game A (USA).sfc"]
+    assert sqlite_cache.get_files("Game B", "Game B [Multi Disc]") == ["Game B.m3u"]
+    assert sqlite_cache.get_files("Game C", "Game C (Europe)") == []
+    sqlite_cache.close()
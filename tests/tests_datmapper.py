@@ -0,0 +1,136 @@
+import logging
+import random
+
+from romsearch import DATMapper
+from romsearch.modules.datmapper import get_checksums
+
+PLATFORM = "Nintendo - Super Nintendo Entertainment System"
+
+
+def get_dat_entry(md5s):
+    """Get a dat entry with a ROM file for each checksum"""
+
+    roms = []
+    for i, md5 in enumerate(md5s):
+        ext = "cue" if md5 == "cue" else "bin"
+        roms.append({"name": f"Track {i}.{ext}", "md5": md5})
+
+    # Single files aren't in a list
+    if len(roms) == 1:
+        roms = roms[0]
+
+    dat_entry = {"rom": roms}
+
+    return dat_entry
+
+
+def get_linear_mappings(dat, old_dat):
+    """Map between dats by checking every pair of entries, as DATMapper used to"""
+
+    dat_mappings = {}
+
+    dat_checksums = get_checksums(dat)
+    old_dat_checksums = get_checksums(old_dat)
+
+    d_found = set()
+    od_found = set()
+
+    for d in dat:
+        if d in old_dat and dat_checksums[d]["md5"] == old_dat_checksums[d]["md5"]:
+            d_found.add(d)
+            od_found.add(d)
+
+    for d in dat:
+        if d in d_found:
+            continue
+
+        for od in old_dat:
+            if od in od_found:
+                continue
+            if dat_checksums[d]["n_files"] != old_dat_checksums[od]["n_files"]:
+                continue
+
+            if dat_checksums[d]["md5"] == old_dat_checksums[od]["md5"]:
+                d_found.add(d)
+                od_found.add(od)
+                if d != od:
+                    dat_mappings[d] = od
+                break
+
+    return dat_mappings
+
+
+def get_datmapper(tmp_path):
+    """Get a DATMapper pointing at a temporary directory"""
+
+    dm = DATMapper(
+        platform=PLATFORM,
+        config={"dirs": {"mapped_dat_dir": str(tmp_path)}},
+        logger=logging.getLogger("test_datmapper"),
+    )
+
+    return dm
+
+
+def test_datmapper_duplicate_checksums(tmp_path):
+    """Check that ambiguous and duplicate checksums map in the same order as before"""
+
+    old_dat = {
+        "Game A (USA)": get_dat_entry(["aaaa"]),
+        "Game A (USA) (Alt)": get_dat_entry(["aaaa"]),
+        "Game B (USA)": get_dat_entry(["bbbb"]),
+        "Game C (USA)": get_dat_entry(["cccc"]),
+        "Game D (USA)": get_dat_entry(["cue", "dddd", "eeee"]),
+        "Game E (USA)": get_dat_entry(["ffff"]),
+    }
+    dat = {
+        # Both copies should be used up in order, and then nothing left for the third
+        "Game A (Europe)": get_dat_entry(["aaaa"]),
+        "Game A (Japan)": get_dat_entry(["aaaa"]),
+        "Game A (World)": get_dat_entry(["aaaa"]),
+        # Exact matches don't need mapping, and take the old entry out of the running
+        "Game B (USA)": get_dat_entry(["bbbb"]),
+        "Game B (Europe)": get_dat_entry(["bbbb"]),
+        # A changed checksum under the same name shouldn't stop another entry mapping to it
+        "Game C (USA)": get_dat_entry(["cccd"]),
+        "Game C (USA) (Rev 1)": get_dat_entry(["cccc"]),
+        # Checksums are compared in any order, ignoring playlists, but the number of files must match
+        "Game D (Europe)": get_dat_entry(["eeee", "dddd", "cue"]),
+        "Game E (Europe)": get_dat_entry(["ffff", "cue"]),
+    }
+
+    dm = get_datmapper(tmp_path)
+    dat_mappings = dm.compare_dats(dat=dat, old_dat=old_dat)
+
+    assert dat_mappings == {
+        "Game A (Europe)": "Game A (USA)",
+        "Game A (Japan)": "Game A (USA) (Alt)",
+        "Game C (USA) (Rev 1)": "Game C (USA)",
+        "Game D (Europe)": "Game D (USA)",
+    }
+    assert dat_mappings == get_linear_mappings(dat, old_dat)
+
+
+def test_datmapper_random(tmp_path):
+    """Check mappings match a linear scan for dats with lots of shared names and checksums"""
+
+    rng = random.Random(42)
+
+    dm = get_datmapper(tmp_path)
+
+    for i in range(50):
+
+        dats = []
+        for j in range(2):
+            names = rng.sample([f"Game {k}" for k in range(30)], 20)
+            dat = {}
+            for name in names:
+                n_files = rng.randint(1, 3)
+                md5s = [rng.choice(["aaaa", "bbbb", "cccc", "dddd", "cue"]) for _ in range(n_files)]
+                dat[name] = get_dat_entry(md5s)
+            dats.append(dat)
+
+        dat, old_dat = dats
+        dat_mappings = dm.compare_dats(dat=dat, old_dat=old_dat)
+
+        assert list(dat_mappings.items()) == list(get_linear_mappings(dat, old_dat).items())
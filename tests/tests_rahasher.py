@@ -0,0 +1,375 @@
+import hashlib
+import logging
+import os
+import time
+import types
+import zipfile
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+import romsearch.modules.rahasher
+from romsearch import RAHasher
+from romsearch.util import TokenBucket, get_retry_after, get_ra_header_size, load_json
+
+PLATFORM = "Nintendo - Super Nintendo Entertainment System"
+
+
+class StubResponse:
+
+    def __init__(
+        self,
+        status_code,
+        headers=None,
+        json_data=None,
+    ):
+        """Stands in for a requests Response
+
+        Args:
+            status_code (int): HTTP status code
+            headers (dict): Response headers. Defaults to None
+            json_data: What to return as the JSON. Defaults to None
+        """
+
+        if headers is None:
+            headers = {}
+
+        self.status_code = status_code
+        self.headers = headers
+        self.json_data = json_data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise ValueError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return self.json_data
+
+
+class StubSession:
+
+    def __init__(
+        self,
+        responses,
+    ):
+        """Stands in for a requests Session, giving out responses in order
+
+        Args:
+            responses (list): List of StubResponses
+        """
+
+        self.responses = responses
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append((url, params))
+        return self.responses[min(len(self.calls), len(self.responses)) - 1]
+
+
+def get_rahasher(responses, max_retries=3):
+    """Get an RAHasher that talks to a stub session"""
+
+    config = {
+        "rahasher": {
+            "username": "user",
+            "api_key": "key",
+            "requests_per_second": 1000,
+            "max_retries": max_retries,
+        },
+    }
+
+    rh = RAHasher(
+        platform=PLATFORM,
+        config=config,
+        platform_config={},
+        logger=logging.getLogger("test_rahasher"),
+    )
+    rh.session = StubSession(responses)
+
+    return rh
+
+
+def test_token_bucket_pause():
+    """Check that pausing the token bucket holds off requests, and doesn't let tokens build up"""
+
+    bucket = TokenBucket(rate=1000, capacity=5)
+
+    # We should be able to burst up to the capacity straight away
+    start = time.monotonic()
+    for i in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.1
+
+    bucket.pause(0.2)
+    assert bucket.tokens == 0
+
+    # A shorter pause shouldn't cut a longer one short
+    bucket.pause(0.01)
+
+    start = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - start >= 0.19
+
+    # Tokens start building up again from the end of the pause, rather than the start
+    assert bucket.tokens < 1
+
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+    with pytest.raises(ValueError):
+        TokenBucket(rate=1, capacity=0)
+
+
+def test_get_retry_after():
+    """Check Retry-After headers are parsed as either seconds or HTTP dates"""
+
+    assert get_retry_after(None) is None
+    assert get_retry_after("not a time") is None
+    assert get_retry_after("5") == 5
+    assert get_retry_after("1.5") == 1.5
+    assert get_retry_after("-3") == 0
+
+    retry_time = datetime.now(timezone.utc) + timedelta(seconds=30)
+    retry_after = get_retry_after(format_datetime(retry_time, usegmt=True))
+    assert 25 < retry_after <= 30
+
+    retry_time = datetime.now(timezone.utc) - timedelta(seconds=30)
+    assert get_retry_after(format_datetime(retry_time, usegmt=True)) == 0
+
+
+def test_api_get_retries(monkeypatch):
+    """Check api_get backs off and retries on rate limits and server errors"""
+
+    # Only stub out the backoff sleeps in RAHasher, since the rate limiter needs to sleep
+    sleeps = []
+    monkeypatch.setattr(
+        romsearch.modules.rahasher, "time", types.SimpleNamespace(sleep=sleeps.append)
+    )
+
+    rh = get_rahasher(
+        [
+            StubResponse(429, headers={"Retry-After": "0.05"}),
+            StubResponse(503),
+            StubResponse(200, json_data=[{"ID": 1}]),
+        ]
+    )
+    # Keep track of any pauses, but still pass them through to the rate limiter
+    pauses = []
+    pause = rh.rate_limiter.pause
+
+    def record_pause(wait_time):
+        pauses.append(wait_time)
+        return pause(wait_time)
+
+    monkeypatch.setattr(rh.rate_limiter, "pause", record_pause)
+
+    assert rh.api_get("API_GetGameList.php", params={"i": 3}) == [{"ID": 1}]
+    assert len(rh.session.calls) == 3
+    assert rh.session.calls[0] == (f"{rh.api_url}/API_GetGameList.php", {"i": 3})
+
+    # The 429 should pause everything for as long as we're told, and the 503
+    # should back off exponentially
+    assert pauses == [0.05]
+    assert sleeps == [2]
+
+
+def test_api_get_raises(monkeypatch):
+    """Check api_get gives up after the maximum number of retries, and doesn't retry other errors"""
+
+    sleeps = []
+    monkeypatch.setattr(
+        romsearch.modules.rahasher, "time", types.SimpleNamespace(sleep=sleeps.append)
+    )
+
+    rh = get_rahasher([StubResponse(500)], max_retries=2)
+    with pytest.raises(ValueError, match="after 3 attempts"):
+        rh.api_get("API_GetGameList.php", params={})
+    assert len(rh.session.calls) == 3
+    assert sleeps == [1, 2]
+
+    rh = get_rahasher([StubResponse(404)])
+    with pytest.raises(ValueError, match="HTTP 404"):
+        rh.api_get("API_GetGameList.php", params={})
+    assert len(rh.session.calls) == 1
+
+
+def test_ra_header_size():
+    """Check headers are found by magic bytes (at an offset, if needed) or by file size"""
+
+    assert get_ra_header_size(b"NES\x1a" + bytes(12), 16 + 1024, header="nes") == 16
+    assert get_ra_header_size(bytes(16), 16 + 1024, header="nes") == 0
+    assert get_ra_header_size(b"NES\x1a" + bytes(12), 16 + 1024, header=None) == 0
+
+    # The first byte of an Atari 7800 header is the version, so any version should match
+    for version in range(1, 5):
+        start_bytes = bytes([version]) + b"ATARI7800" + bytes(6)
+        assert get_ra_header_size(start_bytes, 128 + 1024, header="atari7800") == 128
+    assert get_ra_header_size(b"ATARI7800" + bytes(7), 128 + 1024, header="atari7800") == 0
+
+    assert get_ra_header_size(bytes(16), 512 + 8192, header="snes") == 512
+    assert get_ra_header_size(bytes(16), 8192, header="snes") == 0
+
+    with pytest.raises(ValueError):
+        get_ra_header_size(bytes(16), 1024, header="not a header")
+
+
+def get_local_rahasher(tmp_path, header, file_exts, max_parallel_hashes=1):
+    """Get an RAHasher set up for local hashing in a temporary directory"""
+
+    config = {
+        "dirs": {
+            "raw_dir": str(tmp_path / "raw"),
+            "ra_hash_dir": str(tmp_path / "ra_hashes"),
+        },
+        "rahasher": {
+            "local_hashing": True,
+            "max_parallel_hashes": max_parallel_hashes,
+        },
+    }
+
+    rh = RAHasher(
+        platform=PLATFORM,
+        config=config,
+        platform_config={
+            "ra_hash_method": "md5",
+            "ra_hash_header": header,
+            "file_exts": file_exts,
+        },
+        logger=logging.getLogger("test_rahasher"),
+    )
+
+    return rh
+
+
+def write_rom_files(raw_dir, name, header, payload, ext):
+    """Write out a headered ROM, both bare and zipped, returning the md5 of the payload"""
+
+    os.makedirs(raw_dir, exist_ok=True)
+
+    with open(os.path.join(raw_dir, f"{name}{ext}"), "wb") as f:
+        f.write(header + payload)
+
+    with zipfile.ZipFile(os.path.join(raw_dir, f"{name}.zip"), "w") as zip_file:
+        zip_file.writestr(f"{name}{ext}", header + payload)
+
+        # Things without the right extension shouldn't be hashed
+        zip_file.writestr(f"{name}.txt", "readme")
+
+    return hashlib.md5(payload).hexdigest()
+
+
+def test_local_hashes_headers(tmp_path):
+    """Check headers are stripped from local files, both bare and zipped"""
+
+    # NES headers are found by their magic bytes
+    payload = bytes(range(256)) * 64
+    nes_header = b"NES\x1a" + bytes(12)
+
+    rh = get_local_rahasher(tmp_path / "nes", header="nes", file_exts=[".nes"])
+    raw_dir = os.path.join(rh.raw_dir, PLATFORM)
+    md5 = write_rom_files(raw_dir, "Game A (USA)", nes_header, payload, ".nes")
+    unheadered_md5 = write_rom_files(raw_dir, "Game B (USA)", b"", payload, ".nes")
+    assert md5 == unheadered_md5
+
+    assert rh.get_local_hashes() == {
+        "Game A (USA).nes": [md5],
+        "Game A (USA).zip": [md5],
+        "Game B (USA).nes": [md5],
+        "Game B (USA).zip": [md5],
+    }
+
+    # SNES headers are found by the file size
+    payload = bytes(range(256)) * 32 * 2
+    snes_header = bytes(512)
+
+    rh = get_local_rahasher(tmp_path / "snes", header="snes", file_exts=[".sfc"])
+    raw_dir = os.path.join(rh.raw_dir, PLATFORM)
+    md5 = write_rom_files(raw_dir, "Game A (USA)", snes_header, payload, ".sfc")
+
+    assert rh.get_local_hashes() == {
+        "Game A (USA).sfc": [md5],
+        "Game A (USA).zip": [md5],
+    }
+
+
+def test_local_hashes_cache(tmp_path, monkeypatch):
+    """Check unchanged files aren't hashed again, but changed and new files are"""
+
+    rh = get_local_rahasher(tmp_path, header="nes", file_exts=[".nes"])
+    raw_dir = os.path.join(rh.raw_dir, PLATFORM)
+
+    payload = bytes(range(256)) * 64
+    nes_header = b"NES\x1a" + bytes(12)
+    md5 = write_rom_files(raw_dir, "Game A (USA)", nes_header, payload, ".nes")
+
+    # Keep track of what's been hashed
+    hashed_files = []
+    get_local_hash = romsearch.modules.rahasher.get_local_hash
+
+    def record_local_hash(file_name, **kwargs):
+        hashed_files.append(os.path.basename(file_name))
+        return get_local_hash(file_name, **kwargs)
+
+    monkeypatch.setattr(romsearch.modules.rahasher, "get_local_hash", record_local_hash)
+
+    local_hashes = rh.get_local_hashes()
+    assert sorted(hashed_files) == ["Game A (USA).nes", "Game A (USA).zip"]
+
+    # Nothing has changed, so this should all come from the cache
+    hashed_files.clear()
+    assert rh.get_local_hashes() == local_hashes
+    assert hashed_files == []
+
+    # Changing the modification time should mean hashing again, even with the same size
+    full_f = os.path.join(raw_dir, "Game A (USA).nes")
+    stat = os.stat(full_f)
+    os.utime(full_f, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    hashed_files.clear()
+    assert rh.get_local_hashes() == local_hashes
+    assert hashed_files == ["Game A (USA).nes"]
+
+    # New files should be hashed, and removed files dropped from the cache
+    new_md5 = write_rom_files(raw_dir, "Game B (USA)", nes_header, payload[::-1], ".nes")
+    os.remove(os.path.join(raw_dir, "Game A (USA).zip"))
+
+    hashed_files.clear()
+    assert rh.get_local_hashes() == {
+        "Game A (USA).nes": [md5],
+        "Game B (USA).nes": [new_md5],
+        "Game B (USA).zip": [new_md5],
+    }
+    assert sorted(hashed_files) == ["Game B (USA).nes", "Game B (USA).zip"]
+
+    local_hash_file = os.path.join(rh.ra_hash_dir, f"{PLATFORM} (local hashes).json")
+    assert "Game A (USA).zip" not in load_json(local_hash_file)
+
+
+def test_local_hashes_parallel(tmp_path):
+    """Check hashing in a process pool gives the same results as hashing one file at a time"""
+
+    payload = bytes(range(256)) * 64
+    nes_header = b"NES\x1a" + bytes(12)
+
+    all_local_hashes = []
+    for max_parallel_hashes in [1, 4]:
+
+        rh = get_local_rahasher(
+            tmp_path / f"{max_parallel_hashes}",
+            header="nes",
+            file_exts=[".nes"],
+            max_parallel_hashes=max_parallel_hashes,
+        )
+        raw_dir = os.path.join(rh.raw_dir, PLATFORM)
+        for i in range(5):
+            write_rom_files(raw_dir, f"Game {i} (USA)", nes_header, payload[i:], ".nes")
+
+        # Also include something that isn't really a zip, and has no files to hash
+        with open(os.path.join(raw_dir, "Game 5 (USA).zip"), "wb") as f:
+            f.write(b"PK\x03\x04 not really a zip")
+
+        all_local_hashes.append(rh.get_local_hashes())
+
+    assert len(all_local_hashes[0]) == 11
+    assert all_local_hashes[0]["Game 5 (USA).zip"] == []
+    assert all_local_hashes[0] == all_local_hashes[1]
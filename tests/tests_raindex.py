@@ -0,0 +1,200 @@
+import copy
+import logging
+import os
+
+from romsearch import RAHasher
+from romsearch.util import RAIndex, get_ra_index_key
+
+PLATFORM = "Nintendo - Super Nintendo Entertainment System"
+
+
+def get_ra_hash(md5, name, patch_url=None):
+    """Get a single hash, like the ones the RA API returns"""
+
+    ra_hash = {
+        "MD5": md5,
+        "Name": name,
+        "PatchUrl": patch_url,
+    }
+
+    return ra_hash
+
+
+def get_ra_hashes():
+    """Get an RA hash dictionary, with a mix of shared names, directory names and subsets"""
+
+    ra_hashes = {
+        "Game A": {
+            "DateModified": "2024-01-01 12:00:00",
+            "Hashes": [
+                get_ra_hash("AAAA0001", "Game A (USA).sfc"),
+                get_ra_hash("aaaa0002", "Game A (Europe).sfc"),
+                get_ra_hash(
+                    "aaaa0003",
+                    "Game A (USA) (Rev 1).sfc",
+                    patch_url="https://example.com/Game A (Rev 1).zip",
+                ),
+            ],
+        },
+        "Game A [Subset - Bonus]": {
+            "DateModified": "2024-01-01 12:00:00",
+            "Hashes": [
+                get_ra_hash("aaaa0004", "Game A (USA).sfc"),
+            ],
+        },
+        "Game A II": {
+            "DateModified": "2024-01-02 12:00:00",
+            "Hashes": [
+                get_ra_hash("bbbb0001", "Game A (Japan).sfc"),
+                get_ra_hash("bbbb0002", "Game A II (USA).sfc"),
+                get_ra_hash("bbbb0003", "Game A (USA).sfc"),
+            ],
+        },
+        "Game B": {
+            "DateModified": "2024-01-03 12:00:00",
+            "Hashes": [
+                get_ra_hash("cccc0001", "Game B (USA).sfc"),
+                get_ra_hash("cccc0002", "Game B (USA) (Beta).sfc"),
+            ],
+        },
+    }
+
+    return ra_hashes
+
+
+def test_ra_index_save_load(tmp_path):
+    """Check a saved index is only loaded if the RA hashes and settings haven't changed"""
+
+    ra_hashes = get_ra_hashes()
+    index_file = str(tmp_path / "ra index.pkl")
+
+    index_key = get_ra_index_key(ra_hashes, hash_method="custom", ra_file_exts=[".sfc"])
+    ra_index = RAIndex(ra_hashes, hash_method="custom", ra_file_exts=[".sfc"])
+    ra_index.save(index_file, index_key=index_key)
+
+    loaded_index = RAIndex.load(index_file, index_key=index_key)
+    assert loaded_index is not None
+    assert loaded_index.entries == ra_index.entries
+    assert loaded_index.by_name == ra_index.by_name
+    assert loaded_index.by_dir_name == ra_index.by_dir_name
+
+    # Changing the modification date, the hash method, or the file extensions should all
+    # invalidate the saved index
+    new_ra_hashes = copy.deepcopy(ra_hashes)
+    new_ra_hashes["Game B"]["DateModified"] = "2024-02-01 12:00:00"
+
+    new_game_ra_hashes = copy.deepcopy(ra_hashes)
+    new_game_ra_hashes["Game C"] = {
+        "DateModified": "2024-01-01 12:00:00",
+        "Hashes": [get_ra_hash("dddd0001", "Game C (USA).sfc")],
+    }
+
+    new_keys = [
+        get_ra_index_key(new_ra_hashes, hash_method="custom", ra_file_exts=[".sfc"]),
+        get_ra_index_key(new_game_ra_hashes, hash_method="custom", ra_file_exts=[".sfc"]),
+        get_ra_index_key(ra_hashes, hash_method="md5", ra_file_exts=[".sfc"]),
+        get_ra_index_key(ra_hashes, hash_method="custom", ra_file_exts=None),
+        None,
+    ]
+    assert len(set(new_keys)) == len(new_keys)
+    for new_key in new_keys:
+        assert RAIndex.load(index_file, index_key=new_key) is None
+
+    # Missing or broken files should also just mean rebuilding
+    assert RAIndex.load(str(tmp_path / "missing.pkl"), index_key=index_key) is None
+    with open(index_file, "w") as f:
+        f.write("not a pickle")
+    assert RAIndex.load(index_file, index_key=index_key) is None
+
+
+def test_rahasher_ra_index_cache(tmp_path, monkeypatch):
+    """Check RAHasher rebuilds a cached index when the RA hashes change"""
+
+    config = {
+        "dirs": {
+            "ra_hash_dir": str(tmp_path / "ra_hashes"),
+        },
+        "rahasher": {
+            "cache_index": True,
+        },
+    }
+
+    rh = RAHasher(
+        platform=PLATFORM,
+        config=config,
+        platform_config={"ra_hash_method": "md5"},
+        logger=logging.getLogger("test_raindex"),
+    )
+
+    ra_hashes = get_ra_hashes()
+    ra_index = rh.get_ra_index(ra_hashes)
+    index_file = os.path.join(config["dirs"]["ra_hash_dir"], f"{PLATFORM} (ra index).pkl")
+    assert os.path.exists(index_file)
+
+    # If nothing's changed, we should get the saved index back without rebuilding
+    def fail(*args, **kwargs):
+        raise AssertionError("Should not rebuild an up-to-date index")
+
+    with monkeypatch.context() as m:
+        m.setattr(RAIndex, "build", fail)
+        loaded_index = rh.get_ra_index(ra_hashes)
+    assert loaded_index.entries == ra_index.entries
+
+    # If a game has been updated, then the index should be rebuilt and saved again
+    ra_hashes["Game B"]["DateModified"] = "2024-02-01 12:00:00"
+    ra_hashes["Game B"]["Hashes"].append(get_ra_hash("cccc0003", "Game B (Europe).sfc"))
+
+    new_index = rh.get_ra_index(ra_hashes)
+    assert "cccc0003" in new_index.entries
+    assert "cccc0003" not in ra_index.entries
+
+    new_key = get_ra_index_key(ra_hashes, hash_method="md5")
+    assert RAIndex.load(index_file, index_key=new_key).entries == new_index.entries
+
+
+def test_ra_index_lookups():
+    """Check name and directory name lookups match a scan over every hash"""
+
+    ra_hashes = get_ra_hashes()
+
+    for hash_method in ["md5", "custom"]:
+
+        ra_index = RAIndex(ra_hashes, hash_method=hash_method, ra_file_exts=[".sfc"])
+
+        # Subsets should be skipped, and hashes lowercased
+        assert list(ra_index.entries.keys()) == [
+            "aaaa0001",
+            "aaaa0002",
+            "aaaa0003",
+            "bbbb0001",
+            "bbbb0002",
+            "bbbb0003",
+            "cccc0001",
+            "cccc0002",
+        ]
+
+        names = {ra_index.entries[r]["name"] for r in ra_index.entries}
+        dir_names = {ra_index.entries[r]["dir_name"] for r in ra_index.entries}
+
+        for name in sorted(names) + ["Game C (USA)", "dddd0001"]:
+            assert ra_index.get_by_name(name) == [
+                r for r in ra_index.entries if ra_index.entries[r]["name"] == name
+            ]
+
+        for dir_name in sorted(dir_names) + ["Game C"]:
+            assert ra_index.get_by_dir_name(dir_name) == [
+                r for r in ra_index.entries if ra_index.entries[r]["dir_name"] == dir_name
+            ]
+
+        # Names shared between games should give every match, in order
+        assert ra_index.get_by_dir_name("Game A") == [
+            "aaaa0001",
+            "aaaa0002",
+            "aaaa0003",
+            "bbbb0001",
+            "bbbb0003",
+        ]
+        if hash_method == "custom":
+            assert ra_index.get_by_name("Game A (USA)") == ["aaaa0001", "bbbb0003"]
+        else:
+            assert ra_index.get_by_name("aaaa0001") == ["aaaa0001"]
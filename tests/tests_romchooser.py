@@ -1,6 +1,9 @@
+import copy
+
 import numpy as np
 
-from romsearch import ROMParser, ROMChooser
+from romsearch import ROMParser, ROMChooser, ROMBatchChooser
+from romsearch.util import load_yml
 
 TEST_NAME = "Example Game"
 
@@ -155,3 +158,108 @@ def test_romchooser_priority():
             roms_found.append(r)
 
     assert roms_found == ["Example Game (Highest Priority)"]
+
+
+def get_best_roms(test_case, config):
+    """Run a test case through the ROMParser and ROMChooser, and return the highest ranked ROMs"""
+
+    rp = ROMParser(
+        config=config,
+        platform="Nintendo - Super Nintendo Entertainment System",
+        game="Example Game",
+    )
+    rom_dict = rp.run(test_case)
+
+    rc = ROMChooser(
+        config=config,
+        platform="Nintendo - Super Nintendo Entertainment System",
+        game="Example Game",
+    )
+    rom_dict = rc.run(rom_dict)
+
+    best_score = max([rom_dict[r]["romchooser_score"] for r in rom_dict])
+    roms_found = [r for r in rom_dict if rom_dict[r]["romchooser_score"] == best_score]
+
+    return roms_found
+
+
+def test_romchooser_languages_over_budget():
+    """Check that enough preferred languages outweighs a budget edition"""
+
+    config = load_yml("test_config.yml")
+    config["region_preferences"] = ["Europe"]
+    config["language_preferences"] = [
+        "English",
+        "French",
+        "German",
+        "Spanish",
+        "Italian",
+        "Dutch",
+    ]
+
+    test_case = {
+        f"{TEST_NAME} (Europe) (En,Fr,De,Es,It,Nl)": {"priority": 1},
+        f"{TEST_NAME} (Europe) (En) (Budget)": {"priority": 1},
+    }
+
+    roms_found = get_best_roms(test_case, config)
+
+    assert roms_found == ["Example Game (Europe) (En,Fr,De,Es,It,Nl)"]
+
+
+def test_romchooser_revisions_over_priority():
+    """Check that enough newer revisions outweighs a lower priority"""
+
+    config = load_yml("test_config.yml")
+
+    test_case = {TEST_NAME: {"priority": 1}}
+    for i in range(1, 11):
+        test_case[f"{TEST_NAME} (Rev {i})"] = {"priority": 3}
+    test_case[f"{TEST_NAME} (Rev 11)"] = {"priority": 2}
+
+    roms_found = get_best_roms(test_case, config)
+
+    assert roms_found == ["Example Game (Rev 11)"]
+
+
+def test_rombatchchooser():
+    """Put a number of games through and check ROMBatchChooser matches the ROMChooser"""
+
+    test_cases = {
+        "Example Game": {
+            "Example Game (Europe)": {"priority": 1},
+            "Example Game (USA)": {"priority": 1},
+            "Example Game (USA) (Rev 1)": {"priority": 1},
+        },
+        "Other Game": {
+            "Other Game (Japan)": {"priority": 1},
+            "Other Game (USA) (Higher Priority)": {"priority": 2},
+            "Other Game (USA) (Highest Priority)": {"priority": 1},
+        },
+    }
+
+    all_roms_dict = {}
+    for game in test_cases:
+        rp = ROMParser(
+            config_file="test_config.yml",
+            platform="Nintendo - Super Nintendo Entertainment System",
+            game=game,
+        )
+        all_roms_dict[game] = rp.run(test_cases[game])
+
+    expected = {}
+    for game in all_roms_dict:
+        rc = ROMChooser(
+            config_file="test_config.yml",
+            platform="Nintendo - Super Nintendo Entertainment System",
+            game=game,
+        )
+        expected[game] = rc.run(copy.deepcopy(all_roms_dict[game]))
+
+    rc = ROMBatchChooser(
+        config_file="test_config.yml",
+        platform="Nintendo - Super Nintendo Entertainment System",
+    )
+    all_roms_dict = rc.run(all_roms_dict)
+
+    assert all_roms_dict == expected
@@ -0,0 +1,145 @@
+import logging
+import os
+
+from romsearch import ROMCleaner
+from romsearch.util import save_json_cache
+
+PLATFORM = "Nintendo - Super Nintendo Entertainment System"
+
+
+def get_cache_entry(output_directory, all_files):
+    """Get a cache entry like the ones ROMMover writes"""
+
+    cache_entry = {
+        "file_mod_time": 1,
+        "patch_file": "",
+        "patched": False,
+        "output_directory": output_directory,
+        "all_files": all_files,
+    }
+
+    return cache_entry
+
+
+def get_rom_entry(short_name, excluded=False, is_compilation=False):
+    """Get the ROM properties that ROMCleaner needs"""
+
+    rom_entry = {
+        "short_name": short_name,
+        "excluded": excluded,
+        "is_compilation": is_compilation,
+        "is_superset": False,
+    }
+
+    return rom_entry
+
+
+def run_romcleaner(tmp_path, separate_directories):
+    """Set up a ROM directory and cache, and run ROMCleaner over it"""
+
+    compilation = "Game Collection (USA)"
+
+    config = {
+        "dirs": {
+            "rom_dir": str(tmp_path / "roms"),
+            "cache_dir": str(tmp_path / "cache"),
+            "log_dir": str(tmp_path / "logs"),
+        },
+        "romsearch": {
+            "separate_directories": separate_directories,
+        },
+    }
+
+    full_rom_dir = os.path.join(config["dirs"]["rom_dir"], PLATFORM)
+
+    # Lay out the files how ROMMover would, along with one it doesn't know about
+    output_dirs = {
+        "Game A": "",
+        "Game B": "",
+        "Game Collection": "",
+        "Game Stray": "",
+    }
+    if separate_directories:
+        output_dirs = {d: d for d in output_dirs}
+
+    rom_files = {
+        "Game A": "Game A (USA).zip",
+        "Game B": "Game B (USA).zip",
+        "Game Collection": f"{compilation}.zip",
+        "Game Stray": "Game Stray (USA).zip",
+    }
+    for game in rom_files:
+        out_dir = os.path.join(full_rom_dir, output_dirs[game])
+        os.makedirs(out_dir, exist_ok=True)
+        with open(os.path.join(out_dir, rom_files[game]), "w") as f:
+            f.write(game)
+
+    cache = {
+        PLATFORM: {
+            game: {
+                rom_files[game].replace(".zip", ""): get_cache_entry(
+                    output_directory=output_dirs[game],
+                    all_files=[rom_files[game]],
+                )
+            }
+            for game in ["Game A", "Game B", "Game Collection"]
+        }
+    }
+    os.makedirs(config["dirs"]["cache_dir"])
+    cache_file = os.path.join(config["dirs"]["cache_dir"], f"cache ({PLATFORM}).json")
+    save_json_cache(cache, cache_file, sort_key=PLATFORM)
+
+    # Game A claims the compilation, and Game B is no longer wanted
+    rom_dict = {
+        "Game A": {
+            "Game A (USA)": get_rom_entry("Game A"),
+            compilation: get_rom_entry("Game Collection", is_compilation=True),
+        },
+        "Game B": {
+            "Game B (USA)": get_rom_entry("Game B", excluded=True),
+        },
+    }
+
+    rc = ROMCleaner(
+        platform=PLATFORM,
+        config=config,
+        platform_config={},
+        logger=logging.getLogger("test_romcleaner"),
+    )
+    cleaned = rc.run(rom_dict)
+
+    return rc, cleaned, full_rom_dir, output_dirs
+
+
+def test_romcleaner(tmp_path):
+    """Check claimed compilations are kept, and files we don't want are removed"""
+
+    for separate_directories in [True, False]:
+
+        rc, cleaned, full_rom_dir, output_dirs = run_romcleaner(
+            tmp_path / f"{separate_directories}",
+            separate_directories=separate_directories,
+        )
+
+        assert cleaned["ROMs"] == ["Game B (USA).zip", "Game Stray (USA).zip"]
+        assert cleaned["Cache"] == ["Game B"]
+
+        assert os.path.exists(
+            os.path.join(
+                full_rom_dir,
+                output_dirs["Game Collection"],
+                "Game Collection (USA).zip",
+            )
+        )
+        assert os.path.exists(
+            os.path.join(full_rom_dir, output_dirs["Game A"], "Game A (USA).zip")
+        )
+        assert not os.path.exists(
+            os.path.join(full_rom_dir, output_dirs["Game Stray"], "Game Stray (USA).zip")
+        )
+
+        # Empty directories should be cleared out as well
+        if separate_directories:
+            assert sorted(os.listdir(full_rom_dir)) == ["Game A", "Game Collection"]
+
+        assert sorted(rc.cache[PLATFORM].keys()) == ["Game A", "Game Collection"]
@@ -0,0 +1,304 @@
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import time
+
+import pytest
+
+from romsearch import ROMDownloader
+
+PLATFORM = "Nintendo - Super Nintendo Entertainment System"
+
+# Stands in for rclone. Prints out the lines for this attempt and exits with the
+# matching return code, counting attempts in a file
+STUB_RCLONE = """
+import sys
+
+attempts_file = sys.argv[1]
+with open(attempts_file) as f:
+    attempt = len(f.read())
+with open(attempts_file, "a") as f:
+    f.write("x")
+
+attempts = {attempts}
+lines, retcode = attempts[min(attempt, len(attempts) - 1)]
+for line in lines:
+    print(line)
+sys.exit(retcode)
+"""
+
+NOT_FOUND = "ERROR : Game (USA).zip: Failed to copy: object not found"
+NETWORK_ERROR = "ERROR : Game (Europe).zip: Failed to copy: connection reset by peer"
+
+
+def get_romdownloader(tmp_path, romdownloader_config=None):
+    """Get a ROMDownloader with everything pointing at a temporary directory"""
+
+    if romdownloader_config is None:
+        romdownloader_config = {}
+
+    config = {
+        "dirs": {
+            "raw_dir": str(tmp_path / "raw"),
+            "cache_dir": str(tmp_path / "cache"),
+            "log_dir": str(tmp_path / "logs"),
+        },
+        "romdownloader": {
+            "remote_name": "rclone_remote",
+            **romdownloader_config,
+        },
+    }
+
+    rd = ROMDownloader(
+        platform=PLATFORM,
+        config=config,
+        platform_config={"dir": "/No-Intro/"},
+        logger=logging.getLogger("test_romdownloader"),
+    )
+
+    return rd
+
+
+def run_stub_rclone(tmp_path, attempts, kill_on_not_found):
+    """Run the stub rclone through run_rclone_copy, returning the return code and number of attempts"""
+
+    stub_file = tmp_path / "stub_rclone.py"
+    with open(stub_file, "w") as f:
+        f.write(STUB_RCLONE.format(attempts=repr(attempts)))
+
+    attempts_file = tmp_path / "attempts.txt"
+    with open(attempts_file, "w") as f:
+        f.write("")
+
+    rd = get_romdownloader(tmp_path)
+
+    try:
+        retcode = rd.run_rclone_copy(
+            cmd=[sys.executable, str(stub_file), str(attempts_file)],
+            game_log=[],
+            max_retries=3,
+            kill_on_not_found=kill_on_not_found,
+        )
+    finally:
+        with open(attempts_file) as f:
+            n_attempts = len(f.read())
+
+    return retcode, n_attempts
+
+
+def stub_run_rclone_copy(rd, remote_files, failing_file=None):
+    """Stand in for running rclone copy, copying files if they're on the remote"""
+
+    def run_rclone_copy(cmd, game_log, max_retries=5, kill_on_not_found=True):
+        remote_file, out_dir = re.findall('"(.*?)"', cmd)
+        f = remote_file.split(rd.remote_dir)[-1]
+
+        if f == failing_file:
+            raise subprocess.CalledProcessError(1, cmd)
+
+        # Finish out of order, so later games can finish first
+        time.sleep(0.01 * remote_files.get(f, 0))
+
+        if f not in remote_files:
+            return 9999
+
+        with open(os.path.join(out_dir, f), "w") as out_f:
+            out_f.write(f)
+        return 0
+
+    rd.run_rclone_copy = run_rclone_copy
+
+    return True
+
+
+def get_copy_files():
+    """Get games to copy, with files at different priorities"""
+
+    copy_files = {}
+    for game in ["Game A", "Game B", "Game C", "Game D"]:
+        copy_files[game] = {
+            "USA": {"name": f"{game} (USA).zip", "score": 2},
+            "Europe": {"name": f"{game} (Europe).zip", "score": 1},
+        }
+
+    return copy_files
+
+
+def test_rclone_copy_parallel(tmp_path, caplog):
+    """Check parallel copies pick the same files, and log the same way, as copying one at a time"""
+
+    # How long each copy takes, so earlier games finish last
+    remote_files = {
+        "Game A (USA).zip": 4,
+        "Game A (Europe).zip": 4,
+        "Game B (Europe).zip": 3,
+        "Game C (USA).zip": 2,
+        "Game D (Europe).zip": 1,
+    }
+
+    all_logs = []
+    for max_parallel_copies in [1, 4]:
+
+        rd = get_romdownloader(
+            tmp_path / f"{max_parallel_copies}",
+            {"max_parallel_copies": max_parallel_copies},
+        )
+        rd.copy_files = get_copy_files()
+        stub_run_rclone_copy(rd, remote_files)
+        os.makedirs(rd.out_dir)
+
+        caplog.clear()
+        with caplog.at_level(logging.INFO, logger="test_romdownloader"):
+            rd.rclone_copy(remote_dir=rd.remote_dir, out_dir=rd.out_dir)
+        all_logs.append(caplog.messages)
+
+        # Only the highest priority file that exists should be kept
+        assert sorted(os.listdir(rd.out_dir)) == [
+            "Game A (USA).zip",
+            "Game B (Europe).zip",
+            "Game C (USA).zip",
+            "Game D (Europe).zip",
+        ]
+
+    assert any("Could not find" in message for message in all_logs[0])
+    assert all_logs[0] == all_logs[1]
+
+
+def test_rclone_copy_parallel_raises(tmp_path):
+    """Check an rclone failure while copying in parallel is raised"""
+
+    rd = get_romdownloader(tmp_path, {"max_parallel_copies": 4})
+    rd.copy_files = get_copy_files()
+    stub_run_rclone_copy(
+        rd,
+        remote_files={"Game A (USA).zip": 1},
+        failing_file="Game C (USA).zip",
+    )
+    os.makedirs(rd.out_dir)
+
+    with pytest.raises(subprocess.CalledProcessError):
+        rd.rclone_copy(remote_dir=rd.remote_dir, out_dir=rd.out_dir)
+
+
+def test_rclone_copy_not_found(tmp_path):
+    """Check missing files aren't retried, whether copying one file or many"""
+
+    for kill_on_not_found in [True, False]:
+        retcode, n_attempts = run_stub_rclone(
+            tmp_path,
+            attempts=[([NOT_FOUND], 1)],
+            kill_on_not_found=kill_on_not_found,
+        )
+
+        assert retcode == 9999
+        assert n_attempts == 1
+
+
+def test_rclone_copy_batch_retries_other_errors(tmp_path):
+    """Check that other errors in a batch copy are retried, even if some files are missing"""
+
+    retcode, n_attempts = run_stub_rclone(
+        tmp_path,
+        attempts=[([NOT_FOUND, NETWORK_ERROR], 1), ([NOT_FOUND], 1)],
+        kill_on_not_found=False,
+    )
+
+    assert retcode == 9999
+    assert n_attempts == 2
+
+
+def test_rclone_copy_batch_raises(tmp_path):
+    """Check that a batch copy that keeps failing raises an error"""
+
+    with pytest.raises(subprocess.CalledProcessError):
+        run_stub_rclone(
+            tmp_path,
+            attempts=[([NOT_FOUND, NETWORK_ERROR], 5)],
+            kill_on_not_found=False,
+        )
+
+
+def stub_lsjson(monkeypatch, files, retcode=0):
+    """Stand in for rclone lsjson, returning a list of calls that have been made"""
+
+    calls = []
+
+    def run(cmd, **kwargs):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(
+            cmd,
+            retcode,
+            stdout=json.dumps([{"Path": f} for f in files]) if retcode == 0 else "",
+            stderr="",
+        )
+
+    monkeypatch.setattr(subprocess, "run", run)
+
+    return calls
+
+
+def test_remote_listing_cache(tmp_path, monkeypatch):
+    """Check the remote listing is cached until it expires, or the remote changes"""
+
+    rd = get_romdownloader(tmp_path, {"remote_listing_cache_period": 1})
+    calls = stub_lsjson(monkeypatch, ["Game B (USA).zip", "Game A (USA).zip"])
+
+    expected = {"Game A (USA).zip", "Game B (USA).zip"}
+    assert rd.get_remote_listing("/No-Intro/") == expected
+    assert len(calls) == 1
+
+    cache_file = os.path.join(rd.cache_dir, f"remote listing ({PLATFORM}).json")
+    with open(cache_file) as f:
+        assert json.load(f) == {
+            "remote": "rclone_remote:/No-Intro/",
+            "files": ["Game A (USA).zip", "Game B (USA).zip"],
+        }
+
+    # Within the cache period, we shouldn't call rclone again
+    assert rd.get_remote_listing("/No-Intro/") == expected
+    assert len(calls) == 1
+
+    # A different remote should get a fresh listing, and subchannels are cached separately
+    assert rd.get_remote_listing("/Other/") == expected
+    assert len(calls) == 2
+    assert rd.get_remote_listing("/No-Intro/Unofficial/", subchannel="Unofficial") == expected
+    assert len(calls) == 3
+    assert os.path.exists(
+        os.path.join(rd.cache_dir, f"remote listing ({PLATFORM} Unofficial).json")
+    )
+
+    # Once the cache has expired, we should get a new listing
+    calls = stub_lsjson(monkeypatch, ["Game C (USA).zip"])
+    two_hours_ago = time.time() - 2 * 3600
+    os.utime(cache_file, (two_hours_ago, two_hours_ago))
+
+    assert rd.get_remote_listing("/No-Intro/") == {"Game C (USA).zip"}
+    assert len(calls) == 1
+    assert rd.get_remote_listing("/No-Intro/") == {"Game C (USA).zip"}
+    assert len(calls) == 1
+
+
+def test_remote_listing_fails(tmp_path, monkeypatch):
+    """Check we fall back to no listing if rclone fails, rather than using an expired cache"""
+
+    rd = get_romdownloader(tmp_path, {"remote_listing_cache_period": 1})
+
+    calls = stub_lsjson(monkeypatch, [], retcode=1)
+    assert rd.get_remote_listing("/No-Intro/", max_retries=3) is None
+    assert len(calls) == 3
+
+    cache_file = os.path.join(rd.cache_dir, f"remote listing ({PLATFORM}).json")
+    assert not os.path.exists(cache_file)
+
+    stub_lsjson(monkeypatch, ["Game A (USA).zip"])
+    assert rd.get_remote_listing("/No-Intro/") == {"Game A (USA).zip"}
+
+    two_hours_ago = time.time() - 2 * 3600
+    os.utime(cache_file, (two_hours_ago, two_hours_ago))
+
+    calls = stub_lsjson(monkeypatch, [], retcode=1)
+    assert rd.get_remote_listing("/No-Intro/", max_retries=3) is None
+    assert len(calls) == 3
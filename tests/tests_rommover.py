@@ -0,0 +1,175 @@
+import logging
+import os
+import zipfile
+
+import pytest
+
+import romsearch.util.io
+from romsearch import ROMMover
+from romsearch.util import load_json, unzip_file
+
+PLATFORM = "Nintendo - Super Nintendo Entertainment System"
+
+
+def get_test_config(tmp_path, max_parallel_moves=1):
+    """Get a config with everything pointing at a temporary directory"""
+
+    config = {
+        "dirs": {
+            "raw_dir": str(tmp_path / "raw"),
+            "rom_dir": str(tmp_path / "roms"),
+            "cache_dir": str(tmp_path / "cache"),
+            "log_dir": str(tmp_path / "logs"),
+        },
+        "romsearch": {
+            "separate_directories": True,
+        },
+        "rommover": {
+            "max_parallel_moves": max_parallel_moves,
+        },
+    }
+
+    return config
+
+
+def get_rom_entry(rom, short_name, is_compilation=False):
+    """Get the ROM properties that ROMMover needs"""
+
+    rom_entry = {
+        "full_name": rom,
+        "download_name": f"{rom}.zip",
+        "short_name": short_name,
+        "dir_name": short_name,
+        "disc_free_name": rom,
+        "is_compilation": is_compilation,
+        "is_superset": False,
+        "multi_disc": False,
+        "patch_file": "",
+        "patched": False,
+        "file_mod_time": 1,
+    }
+
+    return rom_entry
+
+
+def test_rommover_shared_compilation(tmp_path):
+    """Check a compilation claimed by multiple games is only placed once"""
+
+    compilation = "Game Collection (USA)"
+
+    raw_dir = tmp_path / "raw" / PLATFORM
+    raw_dir.mkdir(parents=True)
+    for rom in [compilation, "Game A (USA)", "Game B (USA)"]:
+        with open(raw_dir / f"{rom}.zip", "w") as f:
+            f.write(rom)
+
+    for max_parallel_moves in [1, 4]:
+
+        config = get_test_config(
+            tmp_path / f"{max_parallel_moves}",
+            max_parallel_moves=max_parallel_moves,
+        )
+        config["dirs"]["raw_dir"] = str(tmp_path / "raw")
+
+        all_rom_dict = {
+            "Game A": {
+                "Game A (USA)": get_rom_entry("Game A (USA)", "Game A"),
+                compilation: get_rom_entry(
+                    compilation, "Game Collection", is_compilation=True
+                ),
+            },
+            "Game B": {
+                "Game B (USA)": get_rom_entry("Game B (USA)", "Game B"),
+                compilation: get_rom_entry(
+                    compilation, "Game Collection", is_compilation=True
+                ),
+            },
+        }
+
+        logger = logging.getLogger("test_rommover")
+
+        rm = ROMMover(
+            platform=PLATFORM,
+            config=config,
+            regex_config={},
+            logger=logger,
+        )
+        roms_moved = rm.run(all_rom_dict)
+
+        assert sorted(roms_moved) == [
+            "Game A (USA).zip",
+            "Game B (USA).zip",
+            f"{compilation}.zip",
+        ]
+
+        # The compilation should be in its own directory, and in the cache once
+        out_dir = os.path.join(config["dirs"]["rom_dir"], PLATFORM, "Game Collection")
+        assert os.listdir(out_dir) == [f"{compilation}.zip"]
+        assert list(rm.cache[PLATFORM]["Game Collection"].keys()) == [compilation]
+
+
+def test_unzip_file_crc_cache(tmp_path, monkeypatch):
+    """Check that unchanged files are not extracted again when there's a CRC cache hit"""
+
+    zip_file_name = str(tmp_path / "Game A (USA).zip")
+    with zipfile.ZipFile(zip_file_name, "w") as zip_file:
+        zip_file.writestr("Game A (USA).sfc", "Game A")
+
+    out_dir = str(tmp_path / "roms")
+    out_file = os.path.join(out_dir, "Game A (USA).sfc")
+
+    crc_cache = {}
+    assert unzip_file(zip_file_name, out_dir, crc_cache=crc_cache) == ["Game A (USA).sfc"]
+    assert list(crc_cache.keys()) == [out_file]
+
+    # With a cache hit, we shouldn't extract or even read the file
+    def fail(*args, **kwargs):
+        raise AssertionError("Should not be called on a CRC cache hit")
+
+    with monkeypatch.context() as m:
+        m.setattr(zipfile.ZipFile, "extract", fail)
+        m.setattr(romsearch.util.io, "get_file_crc", fail)
+        assert unzip_file(zip_file_name, out_dir, crc_cache=crc_cache) == ["Game A (USA).sfc"]
+
+    # If the file has changed on disk, even keeping the size the same, it should be extracted again
+    with open(out_file, "w") as f:
+        f.write("Game B")
+    stat = os.stat(out_file)
+    os.utime(out_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    with monkeypatch.context() as m:
+        m.setattr(zipfile.ZipFile, "extract", fail)
+        with pytest.raises(AssertionError):
+            unzip_file(zip_file_name, out_dir, crc_cache=crc_cache)
+
+    unzip_file(zip_file_name, out_dir, crc_cache=crc_cache)
+    with open(out_file) as f:
+        assert f.read() == "Game A"
+
+
+def test_rommover_crc_cache_pruned(tmp_path):
+    """Check CRCs for files that have since been removed are dropped from the CRC cache"""
+
+    logger = logging.getLogger("test_rommover")
+    config = get_test_config(tmp_path)
+
+    out_dir = str(tmp_path / "roms" / PLATFORM)
+    zip_file_name = str(tmp_path / "Game A (USA).zip")
+    with zipfile.ZipFile(zip_file_name, "w") as zip_file:
+        zip_file.writestr("Game A (USA).sfc", "Game A")
+        zip_file.writestr("Game A (USA).txt", "readme")
+
+    rm = ROMMover(platform=PLATFORM, config=config, regex_config={}, logger=logger)
+    unzip_file(zip_file_name, out_dir, crc_cache=rm.crc_cache)
+    assert len(rm.crc_cache) == 2
+
+    os.remove(os.path.join(out_dir, "Game A (USA).txt"))
+    rm.save_crc_cache()
+
+    assert list(load_json(rm.crc_cache_file).keys()) == [
+        os.path.join(out_dir, "Game A (USA).sfc")
+    ]
+
+    # And this should be what gets loaded back in
+    rm = ROMMover(platform=PLATFORM, config=config, regex_config={}, logger=logger)
+    assert list(rm.crc_cache.keys()) == [os.path.join(out_dir, "Game A (USA).sfc")]
@@ -1,4 +1,11 @@
 from romsearch import ROMParser
+from romsearch.util import (
+    CompiledRegexConfig,
+    get_short_name,
+    get_region_free_name,
+    get_disc_free_name,
+    load_yml,
+)
 
 TEST_NAME = "Example Game (USA) (En,De,Fr,Es+It)"
 
@@ -37,3 +44,62 @@ def test_romparser_languages():
     roms_parsed = rp.run(test_case)
 
     assert roms_parsed[TEST_NAME]["languages"] == expected_languages
+
+
+def test_romparser_compiled_regex():
+    """Check the pre-compiled regex config gives the same names as the uncompiled one"""
+
+    test_name = "Example Game (USA) (Disc 1) (Rev 1).zip"
+
+    compiled_regex_config = CompiledRegexConfig()
+
+    for name_func in [get_short_name, get_region_free_name, get_disc_free_name]:
+        assert name_func(test_name) == name_func(
+            test_name,
+            compiled_regex_config=compiled_regex_config,
+        )
+
+    assert get_short_name(
+        test_name,
+        compiled_regex_config=compiled_regex_config,
+    ) == "Example Game (Disc 1)"
+    assert get_region_free_name(
+        test_name,
+        compiled_regex_config=compiled_regex_config,
+    ) == "Example Game (Disc 1) (Rev 1)"
+    assert get_disc_free_name(
+        test_name,
+        compiled_regex_config=compiled_regex_config,
+    ) == "Example Game (USA) (Rev 1)"
+
+
+def test_romparser_local_ra_hashes():
+    """Check that locally calculated hashes are used to match RetroAchievements"""
+
+    test_file = f"{TEST_NAME}.zip"
+    test_case = {TEST_NAME: {"priority": 1,
+                             "original_name": test_file,
+                             }
+                 }
+
+    config = load_yml("test_config.yml")
+    config["romparser"]["use_ra_hashes"] = True
+
+    ra_hashes = {"Some Other Game": {"Hashes": [{"MD5": "ABCDEF0123456789ABCDEF0123456789",
+                                                 "Name": "Some Other Game (USA)",
+                                                 "PatchUrl": None,
+                                                 }
+                                                ]
+                                     }
+                 }
+
+    rp = ROMParser(
+        config=config,
+        platform="Nintendo - Super Nintendo Entertainment System",
+        game="Example Game",
+        ra_hashes=ra_hashes,
+        local_ra_hashes={test_file: ["abcdef0123456789abcdef0123456789"]},
+    )
+    roms_parsed = rp.run(test_case)
+
+    assert roms_parsed[TEST_NAME]["has_cheevos"]
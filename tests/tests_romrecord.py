@@ -0,0 +1,151 @@
+import copy
+import multiprocessing
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from romsearch.util import ROMRecord
+
+
+def get_file_dict():
+    """Get a dictionary like the ones ROMParser makes"""
+
+    file_dict = {
+        "short_name": "Game A",
+        "regions": ["USA", "Europe"],
+        "languages": ["En", "Fr"],
+        "excluded": False,
+        "is_compilation": False,
+        "priority": 1,
+        "patch_file": None,
+    }
+
+    return file_dict
+
+
+def update_record(record):
+    """Update a record inside a worker process, including a key the parent might not have seen"""
+
+    record["priority"] += 1
+    record["regions"].append("Japan")
+    record["record_worker_key"] = True
+
+    return record
+
+
+def test_romrecord_dict():
+    """Check a record behaves like the dictionary it was made from"""
+
+    file_dict = get_file_dict()
+    record = ROMRecord(file_dict)
+
+    assert record == file_dict
+    assert record.to_dict() == file_dict
+    assert dict(record) == file_dict
+    assert len(record) == len(file_dict)
+    assert sorted(record.items()) == sorted(file_dict.items())
+
+    # Missing keys, including ones no record has ever had
+    for key in ["record_never_seen", "dir_name"]:
+        assert key not in record
+        assert record.get(key) is None
+        assert record.get(key, "default") == "default"
+        with pytest.raises(KeyError):
+            record[key]
+        with pytest.raises(KeyError):
+            del record[key]
+
+    # None values are still set
+    assert "patch_file" in record
+    assert record.get("patch_file", "default") is None
+
+    record["dir_name"] = "Game A"
+    record.update({"priority": 2}, excluded=True)
+    assert record.pop("is_compilation") is False
+    assert record.setdefault("is_superset", False) is False
+    del record["languages"]
+
+    file_dict["dir_name"] = "Game A"
+    file_dict.update({"priority": 2}, excluded=True)
+    file_dict.pop("is_compilation")
+    file_dict.setdefault("is_superset", False)
+    del file_dict["languages"]
+
+    assert record == file_dict
+    assert len(record) == len(file_dict)
+
+
+def test_romrecord_key_order():
+    """Check records iterate in the shared key order, whatever order they were set in"""
+
+    record_a = ROMRecord()
+    record_a["record_order_a"] = 1
+    record_a["record_order_b"] = 2
+
+    dict_b = {"record_order_c": 3, "record_order_b": 2, "record_order_a": 1}
+    record_b = ROMRecord(dict_b)
+
+    # Keys are ordered by when they were first seen by any record, unlike a dictionary
+    assert list(record_b) == ["record_order_a", "record_order_b", "record_order_c"]
+    assert list(dict_b) == ["record_order_c", "record_order_b", "record_order_a"]
+    assert record_b == dict_b
+    assert list(record_b.to_dict()) == list(record_b)
+
+    # Deleting and setting a key again doesn't move it to the end
+    del record_a["record_order_a"]
+    record_a["record_order_a"] = 1
+    assert list(record_a) == ["record_order_a", "record_order_b"]
+
+
+def test_romrecord_copy():
+    """Check shallow and deep copies behave like they would for a dictionary"""
+
+    record = ROMRecord(get_file_dict())
+
+    shallow_copy = copy.copy(record)
+    deep_copy = copy.deepcopy(record)
+    assert shallow_copy == record
+    assert deep_copy == record
+
+    record["priority"] = 2
+    record["regions"].append("Japan")
+
+    assert shallow_copy["priority"] == 1
+    assert shallow_copy["regions"] == ["USA", "Europe", "Japan"]
+
+    assert deep_copy["priority"] == 1
+    assert deep_copy["regions"] == ["USA", "Europe"]
+
+    # Values shared within a record should stay shared in the copy
+    record["languages"] = record["regions"]
+    deep_copy = copy.deepcopy(record)
+    assert deep_copy["languages"] is deep_copy["regions"]
+
+
+def test_romrecord_pickle():
+    """Check records pickle by key, including through a process pool"""
+
+    file_dict = get_file_dict()
+    record = ROMRecord(file_dict)
+
+    unpickled = pickle.loads(pickle.dumps(record))
+    assert isinstance(unpickled, ROMRecord)
+    assert unpickled == file_dict
+
+    expected = get_file_dict()
+    expected["priority"] += 1
+    expected["regions"].append("Japan")
+    expected["record_worker_key"] = True
+
+    # Use a fresh process, so the shared keys have to be rebuilt there
+    mp_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=2, mp_context=mp_context) as executor:
+        records = list(executor.map(update_record, [record, ROMRecord(record)]))
+
+    for r in records:
+        assert isinstance(r, ROMRecord)
+        assert r == expected
+
+    # The original shouldn't have been touched
+    assert record == file_dict